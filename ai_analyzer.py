@@ -9,146 +9,430 @@ Supports:
 - OpenAI GPT (cloud, paid)
 - DeepSeek (cloud, very cheap!)
 - Ollama (local, free!)
+- Heuristic (local layout analysis, no AI model at all)
+
+Provider calls are asynchronous: analyze_with_ai_async() and
+analyze_chunked_async() can be awaited from an async web entry point,
+so one process keeps many analyses in flight without a thread each.
+The sync methods are thin wrappers that run the same coroutines on a
+shared background event loop.
 """
 
-import pdfplumber
-from anthropic import Anthropic
-from openai import OpenAI
+import asyncio
+import contextvars
 import os
 import json
+import threading
+import time
+import weakref
+import httpx
 import requests
+from text_cache import file_sha256
+from provider_clients import get_async_client, get_async_http_client, get_client, get_http_session
+from pdf_session import PDFSession
+from response_cache import ResponseCache
+from outline_analyzer import analyze_outline, outline_page_indexes
+from page_sampler import DEFAULT_PAGE_TOKENS, DEFAULT_TOKEN_BUDGET, PageSampler
+from chunked_analysis import build_window_prompt, merge_windows, parse_window_response, plan_windows
+from suggestion_stream import SuggestionStreamParser
+from heuristic_analyzer import analyze_features, extract_page_features, features_from_page_contents
+from split_engine import get_process_pool
+import metrics
+
+
+SYSTEM_PROMPT = "You are a helpful assistant that analyzes PDF documents and suggests how to split them intelligently."
+
+PROVIDER_NAMES = {
+    "anthropic": "Anthropic",
+    "deepseek": "DeepSeek",
+    "openai": "OpenAI"
+}
+
+# Model used for each cloud provider (Ollama uses the configured ollama_model)
+PROVIDER_MODELS = {
+    "anthropic": "claude-3-5-sonnet-20241022",
+    "deepseek": "deepseek-chat",
+    "openai": "gpt-4o-mini"
+}
+
+
+DEFAULT_MAX_CONCURRENCY = 4   # provider calls in flight at once
+RATE_LIMIT_RETRIES = 3        # extra attempts after an HTTP 429
+MAX_RETRY_DELAY = 30          # seconds
+
+# One semaphore per provider and event loop, shared by every analyzer, so
+# concurrent analyses together stay under the provider's rate limits (all
+# sync callers share one loop, see run_sync)
+_provider_slots = weakref.WeakKeyDictionary()  # event loop -> {provider: asyncio.Semaphore}
+
+_shared_loop = None
+_shared_loop_pid = None
+_shared_loop_lock = threading.Lock()
+
+# The CancelScope that sync calls made in this context register with (see run_sync)
+_cancel_scope = contextvars.ContextVar("cancel_scope", default=None)
+
+
+class ProviderError(Exception):
+    """Error answer from a provider's HTTP API, with its status code"""
+
+    def __init__(self, message, status_code=None, response=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+
+def _provider_semaphore(provider, limit):
+    """The running event loop's call limiter for a provider, created on first use"""
+    slots = _provider_slots.setdefault(asyncio.get_running_loop(), {})
+    if provider not in slots:
+        slots[provider] = asyncio.Semaphore(max(1, limit))
+    return slots[provider]
+
+
+def _get_shared_loop():
+    """The background event loop of the sync API, started on first use (again after a fork)"""
+    global _shared_loop, _shared_loop_pid
+
+    with _shared_loop_lock:
+        if _shared_loop is None or _shared_loop_pid != os.getpid():
+            _shared_loop = asyncio.new_event_loop()
+            _shared_loop_pid = os.getpid()
+            threading.Thread(target=_shared_loop.run_forever, name="ai-analyzer-loop", daemon=True).start()
+        return _shared_loop
+
+
+class CancelScope:
+    """
+    Lets another thread stop the sync calls made inside a with block
+
+    run_sync registers each call's pending future with the active scope;
+    cancel() cancels those futures, which cancels the coroutines on the
+    shared loop (releasing their provider slot and closing the request).
+    The blocked sync call then raises concurrent.futures.CancelledError.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._futures = []
+        self._lock = threading.Lock()
+        self._token = None
+
+    def __enter__(self):
+        self._token = _cancel_scope.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _cancel_scope.reset(self._token)
+        with self._lock:
+            self._futures.clear()
+
+    def attach(self, future):
+        """Track a pending future; it is cancelled right away if the scope already was"""
+        with self._lock:
+            if not self.cancelled:
+                self._futures.append(future)
+                return
+        future.cancel()
+
+    def cancel(self):
+        """Cancel every call in the scope, now and later"""
+        with self._lock:
+            self.cancelled = True
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.cancel()
+
+
+def run_sync(coroutine):
+    """
+    Run a coroutine on the shared background event loop and wait for its result
+
+    Every sync caller (e.g. each Flask worker thread) uses this one loop,
+    so they share its async clients' warm connections and provider limits.
+    The caller's context variables (e.g. the request's metrics timer) are
+    carried over to the coroutine.
+
+    Raises:
+        RuntimeError: if called from the shared loop itself (await instead)
+        concurrent.futures.CancelledError: if the caller's CancelScope was cancelled
+    """
+    loop = _get_shared_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coroutine.close()
+        raise RuntimeError("The sync PDFAnalyzer API cannot run inside its own event loop; await the *_async methods")
+
+    context = contextvars.copy_context()
+
+    async def in_caller_context():
+        for variable, value in context.items():
+            variable.set(value)
+        return await coroutine
+
+    future = asyncio.run_coroutine_threadsafe(in_caller_context(), loop)
+    scope = _cancel_scope.get()
+    if scope is not None:
+        scope.attach(future)
+    return future.result()
+
+
+def _retry_delay(error, attempt):
+    """Seconds to wait after a rate-limit error: Retry-After if sent, else exponential backoff"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        delay = float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        delay = 2 ** attempt
+    return min(max(delay, 0), MAX_RETRY_DELAY)
 
 
 class PDFAnalyzer:
     """Analyzes PDF content using AI to suggest intelligent splitting strategies"""
 
-    def __init__(self, api_key=None, provider="anthropic", ollama_model="llama3.2"):
+    def __init__(self, api_key=None, provider="anthropic", ollama_model="llama3.2", text_cache=None,
+                 response_cache=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
         """
         Initialize the PDF Analyzer
 
         Args:
             api_key: API key for the AI provider (not needed for ollama)
-            provider: "anthropic", "openai", "deepseek", or "ollama"
+            provider: "anthropic", "openai", "deepseek", "ollama", or "heuristic"
             ollama_model: Model name for Ollama (default: llama3.2)
+            text_cache: Optional PageTextCache to reuse extracted page text
+            response_cache: Optional ResponseCache to reuse parsed AI answers
+            max_concurrency: Calls to this provider allowed at once in this
+                             process (the first analyzer of a provider sets it)
         """
         self.provider = provider.lower()
         self.ollama_model = ollama_model
         self.api_key = api_key
+        self.text_cache = text_cache
+        self.response_cache = response_cache
+        self.max_concurrency = max_concurrency
+        self.model = ollama_model if self.provider == "ollama" else PROVIDER_MODELS.get(self.provider, PROVIDER_MODELS["openai"])
+        self.base_url = None
 
         if self.provider == "ollama":
             self.client = None  # Ollama uses REST API
             self.ollama_url = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+            self.http = get_http_session()  # shared keep-alive connections (streaming)
+        elif self.provider == "heuristic":
+            self.client = None  # Runs locally on layout signals, no model
+            self.model = "heuristic"
         elif self.provider == "anthropic":
             self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
-            self.client = Anthropic(api_key=self.api_key) if self.api_key else None
+            self.client = get_client("anthropic", self.api_key) if self.api_key else None
         elif self.provider == "deepseek":
             self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
             # DeepSeek uses OpenAI-compatible API
-            self.client = OpenAI(
-                api_key=self.api_key,
-                base_url="https://api.deepseek.com"
-            ) if self.api_key else None
+            self.base_url = "https://api.deepseek.com"
+            self.client = get_client("deepseek", self.api_key, base_url=self.base_url) if self.api_key else None
         else:  # openai
             self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-            self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+            self.client = get_client("openai", self.api_key) if self.api_key else None
 
-    def extract_text_from_pdf(self, pdf_path, max_pages=50):
+    def extract_text_from_pdf(self, pdf_path, token_budget=DEFAULT_TOKEN_BUDGET, workers=0, file_hash=None,
+                              progress=None, session=None, page_tokens=DEFAULT_PAGE_TOKENS, max_pages=None,
+                              page_range=None, priority_pages=None):
         """
-        Extract text content from PDF with page information
+        Extract text from pages sampled across the PDF, within a token budget
+
+        Bookmark targets and pages spread evenly over the whole document are
+        extracted one batch at a time until the budget is used up (see
+        page_sampler.py); pages that are not sampled are never extracted.
 
         Args:
             pdf_path: Path to the PDF file
-            max_pages: Maximum number of pages to analyze (to save on API costs)
+            token_budget: Approximate tokens of page text for the prompt
+            workers: Worker processes for layout analysis; the expected
+                     sample is extracted in parallel, then topped up if
+                     budget is left (default: 0, extract in this process)
+            file_hash: SHA-256 of the PDF if already known (e.g. a document ID);
+                       computed when a text cache is configured and it is missing
+            progress: Optional callback progress(pages_done, pages_total), called
+                      as pages become available (pages_total is an estimate)
+            session: Optional PDFSession already open on pdf_path, so the file
+                     is not parsed again by this call
+            page_tokens: Most tokens taken from any single page
+            max_pages: Optional hard limit on the number of sampled pages
+            page_range: Optional (first, stop) 0-based page indexes to sample
+                        from instead of the whole document (stop exclusive)
+            priority_pages: 0-based likely section starts to sample first;
+                            read from the PDF's bookmarks when not given
 
         Returns:
-            dict with page_count and page_contents
+            dict with total_pages, analyzed_pages, tokens_used and
+            page_contents (sampled pages in page order). The heuristic
+            provider samples no text: page_contents is empty and
+            page_features holds the layout of every page instead
         """
-        page_contents = []
+        owns_session = session is None
+        session = session or PDFSession(pdf_path)
+        started = time.perf_counter()
+        pages_read = 0
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                total_pages = len(pdf.pages)
-                pages_to_analyze = min(max_pages, total_pages)
-
-                for i, page in enumerate(pdf.pages[:pages_to_analyze]):
-                    text = page.extract_text() or ""
-                    page_contents.append({
-                        "page_number": i + 1,
-                        "text": text[:2000],  # Limit text per page to save tokens
-                        "char_count": len(text)
-                    })
-
+            if self.text_cache is not None:
+                file_hash = file_hash or file_sha256(pdf_path)
+                total_pages = self.text_cache.get_page_count(file_hash)
+            else:
+                total_pages = None
+
+            if total_pages is None:
+                total_pages = session.page_count
+                if self.text_cache is not None:
+                    self.text_cache.set_page_count(file_hash, total_pages)
+
+            # The heuristic provider looks at the layout of every page and
+            # never uses sampled text, so skip the sampling entirely
+            if self.provider == "heuristic":
+                page_features = extract_page_features(pdf_path, session=session)
+                pages_read = len(page_features)
+                if progress:
+                    progress(pages_read, total_pages)
                 return {
                     "total_pages": total_pages,
-                    "analyzed_pages": pages_to_analyze,
-                    "page_contents": page_contents
+                    "analyzed_pages": pages_read,
+                    "tokens_used": 0,
+                    "page_contents": [],
+                    "page_features": page_features
                 }
 
+            if priority_pages is None:
+                priority_pages = outline_page_indexes(session.reader) if session.has_outline else []
+
+            first, stop = page_range or (0, total_pages)
+            stop = min(stop, total_pages)
+            sampler = PageSampler(
+                max(0, stop - first),
+                token_budget=token_budget,
+                page_tokens=page_tokens,
+                priority_pages=priority_pages,
+                max_pages=max_pages,
+                first_page=first
+            )
+            expected = sampler.estimated_pages()
+
+            def report(done):
+                if progress:
+                    progress(done, max(done, expected))
+
+            batch_size = expected if workers > 1 else 1
+            batch = sampler.next_batch(batch_size)
+            while batch:
+                # Only pages missing from the cache go through pdfplumber
+                texts = {}
+                if self.text_cache is not None:
+                    cached = self.text_cache.get_pages(file_hash, batch)
+                    texts = {index: text for index, (text, _) in cached.items()}
+
+                missing = [index for index in batch if index not in texts]
+                if missing:
+                    if workers > 1 and len(missing) > 1:
+                        done = len(sampler.samples) + len(texts)
+                        extracted = _extract_texts_parallel(pdf_path, missing, workers,
+                                                            on_pages=lambda count: report(done + count))
+                    else:
+                        extracted = {index: session.page_text(index) for index in missing}
+                    pages_read += len(extracted)
+                    texts.update(extracted)
+                    if self.text_cache is not None:
+                        self.text_cache.put_pages(file_hash, extracted)
+
+                for index in batch:
+                    if not sampler.add(index, texts[index]):
+                        break
+                report(len(sampler.samples))
+
+                batch = sampler.next_batch(workers if workers > 1 else 1)
+
+            page_contents = sampler.page_contents()
+            return {
+                "total_pages": total_pages,
+                "analyzed_pages": len(page_contents),
+                "tokens_used": sampler.tokens_used,
+                "page_contents": page_contents
+            }
+
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
 
-    def analyze_with_ai(self, pdf_data, user_question=None):
+        finally:
+            if owns_session:
+                session.close()
+            metrics.record_stage("extract", time.perf_counter() - started)
+            metrics.count_pages(pages_read, "extract")
+
+    async def extract_text_from_pdf_async(self, pdf_path, **options):
+        """
+        Like extract_text_from_pdf (same arguments), without blocking the event loop
+
+        pdfplumber is CPU-bound and synchronous, so the extraction runs in
+        the loop's default thread pool executor.
+        """
+        return await asyncio.to_thread(self.extract_text_from_pdf, pdf_path, **options)
+
+    def analyze_with_ai(self, pdf_data, user_question=None, use_cache=True, timeout=None):
         """
         Use AI to analyze PDF content and suggest splitting strategies
 
+        Sync wrapper around analyze_with_ai_async.
+
         Args:
             pdf_data: Dictionary containing page contents from extract_text_from_pdf
             user_question: Optional specific question from user about how to split
+            use_cache: Return a cached answer for an identical prompt if one exists
+                       (False forces a fresh call, whose result still refreshes the cache)
+            timeout: Optional seconds to wait for the provider (default: the
+                     client's own timeout)
 
         Returns:
             dict with analysis results and splitting suggestions
         """
+        return run_sync(self.analyze_with_ai_async(pdf_data, user_question, use_cache, timeout))
+
+    async def analyze_with_ai_async(self, pdf_data, user_question=None, use_cache=True, timeout=None):
+        """Async version of analyze_with_ai (same arguments and result)"""
+        if self.provider == "heuristic":
+            # Local boundary detection - no prompt, no network
+            with metrics.stage("heuristic"):
+                features = pdf_data.get("page_features") or features_from_page_contents(
+                    pdf_data["page_contents"], pdf_data["total_pages"])
+                return analyze_features(features, pdf_data["total_pages"])
+
         # Build the analysis prompt
-        prompt = self._build_analysis_prompt(pdf_data, user_question)
+        with metrics.stage("prompt"):
+            prompt = self._build_analysis_prompt(pdf_data, user_question)
+
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = ResponseCache.make_key(self.provider, self.model, prompt)
+            if use_cache:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+        missing_client = self._missing_client_error()
+        if missing_client:
+            return missing_client
 
         try:
-            if self.provider == "ollama":
-                # Use Ollama local AI
-                ai_response = self._call_ollama(prompt)
-
-            elif self.provider == "anthropic":
-                if not self.client:
-                    return {"error": "No Anthropic API key configured", "suggestions": []}
-
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=2000,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                ai_response = response.content[0].text
-
-            elif self.provider == "deepseek":
-                if not self.client:
-                    return {"error": "No DeepSeek API key configured", "suggestions": []}
-
-                response = self.client.chat.completions.create(
-                    model="deepseek-chat",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that analyzes PDF documents and suggests how to split them intelligently."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=2000
-                )
-                ai_response = response.choices[0].message.content
-
-            else:  # OpenAI
-                if not self.client:
-                    return {"error": "No OpenAI API key configured", "suggestions": []}
-
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that analyzes PDF documents and suggests how to split them intelligently."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=2000
-                )
-                ai_response = response.choices[0].message.content
+            with metrics.stage("provider"):
+                ai_response = await self._call_with_backoff(prompt, timeout)
 
             # Parse the AI response
-            return self._parse_ai_response(ai_response, pdf_data["total_pages"])
+            with metrics.stage("parse"):
+                result = self._parse_ai_response(ai_response, pdf_data["total_pages"])
+
+            # Only cache answers that parsed cleanly
+            if cache_key and "error" not in result and "raw_response" not in result:
+                self.response_cache.put(cache_key, result)
+
+            return result
 
         except Exception as e:
             return {
@@ -156,43 +440,350 @@ class PDFAnalyzer:
                 "suggestions": []
             }
 
-    def _call_ollama(self, prompt):
+    def analyze_chunked(self, pdf_path, user_question=None, use_cache=True, max_concurrency=None,
+                        window_pages=None, window_token_budget=DEFAULT_TOKEN_BUDGET, workers=0,
+                        file_hash=None, progress=None, session=None):
+        """
+        Analyze a long document window by window and merge the results
+
+        The document is split into page windows (see chunked_analysis.py).
+        Each window is sampled within its own token budget and sent to the
+        provider as soon as its text is extracted, so calls for earlier
+        windows run while later windows are still being read. At most
+        max_concurrency calls run at once.
+
+        Sync wrapper around analyze_chunked_async.
+
+        Args:
+            pdf_path: Path to the PDF file
+            user_question: Optional specific question from user about how to split
+            use_cache: Reuse cached answers for identical window prompts
+            max_concurrency: Provider calls in flight at once (default: the
+                             analyzer's max_concurrency)
+            window_pages: Pages per window (default: about one window per call)
+            window_token_budget: Token budget of each window's page sample
+            workers: Worker processes for text extraction
+            file_hash: SHA-256 of the PDF if already known (for the text cache)
+            progress: Optional callback progress(windows_done, windows_total)
+            session: Optional PDFSession already open on pdf_path
+
+        Returns:
+            dict like analyze_with_ai whose suggestions cover every page
+        """
+        return run_sync(self.analyze_chunked_async(
+            pdf_path, user_question, use_cache, max_concurrency, window_pages,
+            window_token_budget, workers, file_hash, progress, session
+        ))
+
+    async def analyze_chunked_async(self, pdf_path, user_question=None, use_cache=True, max_concurrency=None,
+                                    window_pages=None, window_token_budget=DEFAULT_TOKEN_BUDGET, workers=0,
+                                    file_hash=None, progress=None, session=None):
+        """Async version of analyze_chunked (same arguments and result)"""
+        if self.provider == "heuristic":
+            pdf_data = await self.extract_text_from_pdf_async(pdf_path, workers=workers, file_hash=file_hash,
+                                                              session=session)
+            return await self.analyze_with_ai_async(pdf_data, user_question)
+
+        missing_client = self._missing_client_error()
+        if missing_client:
+            return missing_client
+
+        concurrency = max_concurrency or self.max_concurrency
+        owns_session = session is None
+        if owns_session:
+            session = await asyncio.to_thread(PDFSession, pdf_path)
+
+        def read_structure():
+            digest = file_hash
+            if self.text_cache is not None:
+                digest = digest or file_sha256(pdf_path)
+            outline = outline_page_indexes(session.reader) if session.has_outline else []
+            return digest, session.page_count, outline
+
+        tasks = []
+        try:
+            file_hash, total_pages, priority_pages = await asyncio.to_thread(read_structure)
+            windows = plan_windows(total_pages, concurrency, window_pages)
+
+            slots = asyncio.Semaphore(concurrency)
+            finished = []
+
+            async def analyze(pdf_data, window):
+                async with slots:
+                    result = await self._analyze_window(pdf_data, window, user_question, use_cache)
+                finished.append(window)
+                if progress:
+                    progress(len(finished), len(windows))
+                return result
+
+            for window in windows:
+                pdf_data = await self.extract_text_from_pdf_async(
+                    pdf_path,
+                    token_budget=window_token_budget,
+                    workers=workers,
+                    file_hash=file_hash,
+                    session=session,
+                    page_range=window,
+                    priority_pages=priority_pages
+                )
+                tasks.append(asyncio.create_task(analyze(pdf_data, window)))
+
+            results = await asyncio.gather(*tasks)
+
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        finally:
+            if owns_session:
+                session.close()
+
+        analysis = merge_windows(results, windows, total_pages)
+        if "error" in analysis:
+            analysis["error"] = f"AI analysis failed: {results[0]['error']}"
+        analysis["total_pages"] = total_pages
+        return analysis
+
+    async def _analyze_window(self, pdf_data, window, user_question, use_cache):
+        """Ask the provider for the section starts inside one window"""
+        prompt = build_window_prompt(pdf_data, window, user_question)
+
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = ResponseCache.make_key(self.provider, self.model, prompt)
+            if use_cache:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+        try:
+            with metrics.stage("provider"):
+                ai_response = await self._call_with_backoff(prompt)
+            with metrics.stage("parse"):
+                result = parse_window_response(ai_response, window)
+        except Exception as e:
+            return {"error": str(e)}
+
+        if cache_key and "error" not in result:
+            self.response_cache.put(cache_key, result)
+        return result
+
+    def _missing_client_error(self):
+        """Error result when a cloud provider has no API key, else None"""
+        if self.provider not in ("ollama", "heuristic") and not self.client:
+            return {"error": f"No {PROVIDER_NAMES.get(self.provider, 'OpenAI')} API key configured", "suggestions": []}
+        return None
+
+    async def _call_with_backoff(self, prompt, timeout=None):
+        """
+        Call the provider within the event loop's concurrency limit
+
+        Rate-limit answers (HTTP 429) are retried after the server's
+        Retry-After delay, or an exponential backoff when it sends none.
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            async with _provider_semaphore(self.provider, self.max_concurrency):
+                try:
+                    return await self._call_provider(prompt, timeout)
+                except Exception as e:
+                    if attempt == RATE_LIMIT_RETRIES or getattr(e, "status_code", None) != 429:
+                        raise
+                    delay = _retry_delay(e, attempt)
+            await asyncio.sleep(delay)
+
+    async def _call_provider(self, prompt, timeout=None):
+        """Send a prompt to the configured provider and return the answer text"""
+        if self.provider == "ollama":
+            # Use Ollama local AI
+            return await self._call_ollama(prompt, timeout)
+
+        # The SDKs treat timeout=None as "wait forever", so only pass a real one
+        options = {"timeout": timeout} if timeout else {}
+        client = get_async_client(self.provider, self.api_key, self.base_url)
+
+        if self.provider == "anthropic":
+            response = await client.messages.create(
+                model=self.model,
+                max_tokens=2000,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                **options
+            )
+            return response.content[0].text
+
+        else:  # DeepSeek and OpenAI share the OpenAI-compatible API
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=2000,
+                **options
+            )
+            return response.choices[0].message.content
+
+    def stream_analysis(self, pdf_data, user_question=None, use_cache=True):
+        """
+        Like analyze_with_ai, but stream the answer while the model writes it
+
+        Args:
+            pdf_data: Dictionary containing page contents from extract_text_from_pdf
+            user_question: Optional specific question from user about how to split
+            use_cache: Return a cached answer for an identical prompt if one exists
+
+        Yields:
+            (event, payload) tuples:
+            ("token", text) for each piece of the answer as it arrives,
+            ("suggestion", dict) as soon as each suggestion is complete,
+            ("result", dict) once, at the end, with the same dict
+            analyze_with_ai would return
+        """
+        if self.provider == "heuristic":
+            yield "result", self.analyze_with_ai(pdf_data, user_question)
+            return
+
+        with metrics.stage("prompt"):
+            prompt = self._build_analysis_prompt(pdf_data, user_question)
+
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = ResponseCache.make_key(self.provider, self.model, prompt)
+            cached = self.response_cache.get(cache_key) if use_cache else None
+            if cached is not None:
+                for suggestion in cached.get("suggestions", []):
+                    yield "suggestion", suggestion
+                yield "result", cached
+                return
+
+        missing_client = self._missing_client_error()
+        if missing_client:
+            yield "result", missing_client
+            return
+
+        parser = SuggestionStreamParser()
+        try:
+            for token in metrics.timed_iter(self._stream_provider(prompt), "provider"):
+                yield "token", token
+                for suggestion in parser.feed(token):
+                    yield "suggestion", suggestion
+
+            with metrics.stage("parse"):
+                result = self._parse_ai_response(parser.text, pdf_data["total_pages"])
+
+            # Only cache answers that parsed cleanly
+            if cache_key and "error" not in result and "raw_response" not in result:
+                self.response_cache.put(cache_key, result)
+
+        except Exception as e:
+            result = {
+                "error": f"AI analysis failed: {str(e)}",
+                "suggestions": []
+            }
+
+        yield "result", result
+
+    def _stream_provider(self, prompt):
+        """Yield the configured provider's answer to a prompt piece by piece"""
+        if self.provider == "ollama":
+            yield from self._stream_ollama(prompt)
+
+        elif self.provider == "anthropic":
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=2000,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            ) as stream:
+                yield from stream.text_stream
+
+        else:  # DeepSeek and OpenAI share the OpenAI-compatible API
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=2000,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    def _stream_ollama(self, prompt):
+        """Call Ollama REST API with streaming enabled and yield response pieces"""
+        try:
+            with self.http.post(
+                f"{self.ollama_url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": True
+                },
+                stream=True,
+                timeout=120  # per read - time to the next token, not the whole answer
+            ) as response:
+                if response.status_code != 200:
+                    raise Exception(f"Ollama error: {response.status_code} - {response.text}")
+
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("response"):
+                        yield data["response"]
+                    if data.get("done"):
+                        break
+
+        except requests.exceptions.ConnectionError:
+            raise Exception("Cannot connect to Ollama. Make sure Ollama is running. Install from https://ollama.com")
+        except requests.exceptions.Timeout:
+            raise Exception("Ollama request timed out. Try a smaller PDF or restart Ollama.")
+
+    async def _call_ollama(self, prompt, timeout=None):
         """Call Ollama REST API for local AI inference"""
         try:
-            response = requests.post(
+            response = await get_async_http_client().post(
                 f"{self.ollama_url}/api/generate",
                 json={
-                    "model": self.ollama_model,
+                    "model": self.model,
                     "prompt": prompt,
                     "stream": False
                 },
-                timeout=120  # 2 minutes timeout for local processing
+                timeout=timeout or 120  # 2 minutes timeout for local processing
             )
 
             if response.status_code == 200:
                 return response.json().get("response", "")
             else:
-                raise Exception(f"Ollama error: {response.status_code} - {response.text}")
+                raise ProviderError(f"Ollama error: {response.status_code} - {response.text}",
+                                    status_code=response.status_code, response=response)
 
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             raise Exception("Cannot connect to Ollama. Make sure Ollama is running. Install from https://ollama.com")
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             raise Exception("Ollama request timed out. Try a smaller PDF or restart Ollama.")
+        except ProviderError:
+            raise
         except Exception as e:
             raise Exception(f"Ollama error: {str(e)}")
 
     def _build_analysis_prompt(self, pdf_data, user_question):
         """Build the prompt for AI analysis"""
 
-        # Create a summary of the PDF
+        # Page excerpts are already sampled and trimmed to the token budget
         page_summaries = []
-        for page in pdf_data["page_contents"][:20]:  # Limit to first 20 pages
-            preview = page["text"][:300].replace("\n", " ")
-            page_summaries.append(f"Page {page['page_number']}: {preview}...")
+        for page in pdf_data["page_contents"]:
+            preview = page["text"] or "[blank page]"
+            page_summaries.append(f"Page {page['page_number']}: {preview}")
 
         prompt = f"""I have a PDF document with {pdf_data['total_pages']} total pages. I need help deciding how to split it into smaller, logical sections.
 
-Here's a preview of the first pages:
+Here are the opening lines of {len(page_summaries)} pages sampled across the whole document (evenly spaced pages plus likely section starts):
 
 {chr(10).join(page_summaries)}
 
@@ -262,35 +853,96 @@ Format your response as JSON:
                 "suggestions": []
             }
 
-    def get_quick_summary(self, pdf_path):
+    def get_quick_summary(self, pdf_path, session=None):
         """
         Get a quick summary of the PDF without AI analysis
 
         Args:
             pdf_path: Path to PDF file
+            session: Optional PDFSession already open on pdf_path
 
         Returns:
             dict with basic PDF information
         """
+        owns_session = session is None
+        session = session or PDFSession(pdf_path)
+
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                total_pages = len(pdf.pages)
+            total_pages = session.page_count
 
-                # Get first page text
-                first_page_text = pdf.pages[0].extract_text()[:500] if total_pages > 0 else ""
+            # Get first page text
+            first_page_text = session.page_text(0)[:500] if total_pages > 0 else ""
 
-                return {
-                    "total_pages": total_pages,
-                    "first_page_preview": first_page_text,
-                    "file_size_mb": os.path.getsize(pdf_path) / (1024 * 1024)
-                }
+            return {
+                "total_pages": total_pages,
+                "first_page_preview": first_page_text,
+                "file_size_mb": os.path.getsize(pdf_path) / (1024 * 1024)
+            }
         except Exception as e:
             return {
                 "error": f"Could not read PDF: {str(e)}"
             }
+        finally:
+            if owns_session:
+                session.close()
+
 
+# Sessions opened inside a worker process, reused across top-up batches and
+# chunked-analysis windows of the same file
+_worker_sessions = {}
+_WORKER_SESSION_LIMIT = 4
 
-def analyze_pdf(pdf_path, user_question=None, api_key=None, provider="anthropic"):
+
+def _worker_session(pdf_path):
+    """Open (or reuse) this worker's PDFSession for a file"""
+    key = (pdf_path, os.path.getmtime(pdf_path))
+    session = _worker_sessions.get(key)
+    if session is None:
+        if len(_worker_sessions) >= _WORKER_SESSION_LIMIT:
+            for stale in _worker_sessions.values():
+                stale.close()
+            _worker_sessions.clear()
+        session = PDFSession(pdf_path)
+        _worker_sessions[key] = session
+    return session
+
+
+def _extract_page_texts(pdf_path, page_indexes):
+    """Worker entry point: extract the text of the given pages in one process"""
+    session = _worker_session(pdf_path)
+    return [session.page_text(index) for index in page_indexes]
+
+
+def _extract_texts_parallel(pdf_path, page_indexes, workers, on_pages=None):
+    """
+    Extract the text of the given pages on the shared process pool
+
+    The pool for this worker count is created on first use and kept for
+    the life of the process (see split_engine.get_process_pool). Each
+    worker handles one contiguous chunk of the page list and keeps the
+    file open, so later batches of the same PDF are not parsed again.
+
+    Args:
+        on_pages: Optional callback with the number of pages extracted so
+                  far, called as each chunk finishes
+
+    Returns:
+        dict of page_index -> full page text
+    """
+    pool = get_process_pool(workers)
+    chunk_size = -(-len(page_indexes) // min(workers, len(page_indexes)))  # ceiling division
+    chunks = [page_indexes[start:start + chunk_size] for start in range(0, len(page_indexes), chunk_size)]
+
+    texts = []
+    for chunk in pool.map(_extract_page_texts, [pdf_path] * len(chunks), chunks):
+        texts.extend(chunk)
+        if on_pages:
+            on_pages(len(texts))
+
+    return dict(zip(page_indexes, texts))
+
+
+def analyze_pdf(pdf_path, user_question=None, api_key=None, provider="anthropic", use_outline=True):
     """
     Convenience function to analyze a PDF in one call
 
@@ -299,10 +951,17 @@ def analyze_pdf(pdf_path, user_question=None, api_key=None, provider="anthropic"
         user_question: Optional user question about splitting
         api_key: API key for AI provider
         provider: "anthropic" or "openai"
+        use_outline: Answer from the PDF's bookmarks when they are detailed
+                     enough and no question was asked
 
     Returns:
         Analysis results
     """
+    if use_outline and not user_question:
+        results = analyze_outline(pdf_path)
+        if results:
+            return results
+
     analyzer = PDFAnalyzer(api_key=api_key, provider=provider)
 
     # Extract text
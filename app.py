@@ -7,14 +7,32 @@ A Flask web application that allows users to:
 3. Download the extracted pages as a new PDF
 """
 
-from flask import Flask, render_template, request, send_file, flash, redirect, url_for, jsonify
-from PyPDF2 import PdfReader, PdfWriter
+from flask import Flask, Response, g, render_template, request, send_file, flash, redirect, url_for, jsonify
+from PyPDF2 import PdfReader
 import os
 from werkzeug.utils import secure_filename
 import tempfile
 import shutil
 import json
+import time
+import metrics
 from ai_analyzer import PDFAnalyzer
+import provider_clients
+from provider_router import ProviderRouter, health_report
+from document_store import DocumentStore
+from chunked_upload import ChunkedUploadStore, UploadError
+from pdf_sniffer import save_stream
+from text_cache import PageTextCache
+from response_cache import ResponseCache
+from outline_analyzer import analyze_outline
+from job_queue import JobQueue, QueueFullError
+from pdf_session import PDFSession
+from page_extractor import extract_pages
+from page_selection import PageSelection
+from split_engine import iter_split_parts
+from resource_dedup import new_report
+from zip_stream import stream_zip
+from batch_split import BatchSplit, parse_manifest
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here-change-in-production'
@@ -22,13 +40,115 @@ app.secret_key = 'your-secret-key-here-change-in-production'
 # Configuration
 UPLOAD_FOLDER = tempfile.gettempdir()
 ALLOWED_EXTENSIONS = {'pdf'}
+NOT_A_PDF_ERROR = "The file is not a PDF (no %PDF header)."
+UNKNOWN_DOCUMENT_ERROR = "Unknown or expired document. Please upload the PDF again."
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size
 
 # AI Configuration - Set your API key here or as environment variable
-AI_PROVIDER = os.getenv('AI_PROVIDER', 'anthropic')  # 'anthropic', 'openai', 'deepseek', or 'ollama'
+AI_PROVIDER = os.getenv('AI_PROVIDER', 'anthropic')  # 'anthropic', 'openai', 'deepseek', 'ollama', or 'heuristic'
 API_KEY = os.getenv('ANTHROPIC_API_KEY') or os.getenv('OPENAI_API_KEY') or os.getenv('DEEPSEEK_API_KEY')
 OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'llama3.2')  # Model for Ollama
+LOCAL_PROVIDERS = ('ollama', 'heuristic')  # Providers that need no API key
+PROVIDER_KEY_VARS = {'anthropic': 'ANTHROPIC_API_KEY', 'openai': 'OPENAI_API_KEY', 'deepseek': 'DEEPSEEK_API_KEY'}
+
+# Optional failover list, e.g. "anthropic,openai,ollama": tried in order, with
+# hedged requests and circuit breaking (see provider_router.py)
+AI_PROVIDERS = [name.strip().lower() for name in os.getenv('AI_PROVIDERS', '').split(',') if name.strip()]
+# Seconds each provider may take before the next one is tried, e.g. "anthropic=30,ollama=90"
+AI_LATENCY_BUDGETS = {
+    name.strip().lower(): float(seconds)
+    for name, _, seconds in (item.partition('=') for item in os.getenv('AI_LATENCY_BUDGETS', '').split(','))
+    if seconds.strip()
+}
+# Opt-in: a hedged request is a second paid call (see provider_router.py)
+AI_HEDGE = os.getenv('AI_HEDGE', 'false').lower() in ('1', 'true', 'yes')
+
+# Use the PDF's bookmarks for suggestions when they are detailed enough
+USE_OUTLINE_ANALYSIS = os.getenv('USE_OUTLINE_ANALYSIS', 'true').lower() in ('1', 'true', 'yes')
+
+# Document store - PDFs are uploaded once and referenced by ID afterwards
+DOCUMENT_STORE_FOLDER = os.getenv('DOCUMENT_STORE_FOLDER', os.path.join(UPLOAD_FOLDER, 'pdf_splitter_documents'))
+DOCUMENT_TTL_SECONDS = int(os.getenv('DOCUMENT_TTL_SECONDS', 3600))  # 1 hour since last use
+DOCUMENT_STORE_MAX_MB = int(os.getenv('DOCUMENT_STORE_MAX_MB', 2048))  # 2GB total
+document_store = DocumentStore(
+    DOCUMENT_STORE_FOLDER,
+    ttl_seconds=DOCUMENT_TTL_SECONDS,
+    max_bytes=DOCUMENT_STORE_MAX_MB * 1024 * 1024
+)
+
+# Chunked, resumable uploads (/uploads/...) - finished files go into the document store
+UPLOAD_CHUNK_MB = int(os.getenv('UPLOAD_CHUNK_MB', 8))
+UPLOAD_TTL_SECONDS = int(os.getenv('UPLOAD_TTL_SECONDS', 24 * 3600))  # unfinished uploads are removed after this
+upload_store = ChunkedUploadStore(
+    document_store,
+    ttl_seconds=UPLOAD_TTL_SECONDS,
+    max_bytes=DOCUMENT_STORE_MAX_MB * 1024 * 1024,
+    default_chunk_size=UPLOAD_CHUNK_MB * 1024 * 1024
+)
+
+# Extracted page text cache - repeat uploads of the same PDF skip pdfplumber
+TEXT_CACHE_PATH = os.getenv('TEXT_CACHE_PATH', os.path.join(UPLOAD_FOLDER, 'pdf_splitter_text_cache.sqlite3'))
+TEXT_CACHE_MAX_MB = int(os.getenv('TEXT_CACHE_MAX_MB', 256))
+text_cache = PageTextCache(TEXT_CACHE_PATH, max_bytes=TEXT_CACHE_MAX_MB * 1024 * 1024)
+
+# AI response cache - identical prompts reuse the parsed answer
+AI_CACHE_TTL_SECONDS = int(os.getenv('AI_CACHE_TTL_SECONDS', 24 * 3600))
+AI_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', 500))
+response_cache = ResponseCache(ttl_seconds=AI_CACHE_TTL_SECONDS, max_entries=AI_CACHE_MAX_ENTRIES)
+
+# Worker processes for building split sections in parallel (0 = build serially)
+SPLIT_WORKERS = int(os.getenv('SPLIT_WORKERS', 0))
+# Worker processes for pdfplumber text extraction in /analyze (0 = extract serially)
+EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', 0))
+# Approximate tokens of sampled page text sent to the AI per analysis
+ANALYSIS_TOKEN_BUDGET = int(os.getenv('ANALYSIS_TOKEN_BUDGET', 4000))
+# Keep-alive connection pools of the shared AI provider clients
+provider_clients.configure(
+    max_connections=int(os.getenv('AI_POOL_MAX_CONNECTIONS', provider_clients.DEFAULT_MAX_CONNECTIONS)),
+    max_keepalive=int(os.getenv('AI_POOL_MAX_KEEPALIVE', provider_clients.DEFAULT_MAX_KEEPALIVE))
+)
+
+# Documents longer than this are analyzed window by window (map-reduce); 0 disables it
+CHUNKED_ANALYSIS_MIN_PAGES = int(os.getenv('CHUNKED_ANALYSIS_MIN_PAGES', 150))
+# AI calls allowed in flight at once (per provider, across all requests)
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', 4))
+# Collapse identical fonts/images within each split part and reuse their bytes across parts
+DEDUP_SPLIT_RESOURCES = os.getenv('DEDUP_SPLIT_RESOURCES', 'true').lower() == 'true'
+
+# Background jobs (/jobs/...) - bounded workers, overload is rejected with 503
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+JOB_MAX_QUEUED = int(os.getenv('JOB_MAX_QUEUED', 20))
+JOBS_FOLDER = os.path.join(UPLOAD_FOLDER, 'pdf_splitter_jobs')
+os.makedirs(JOBS_FOLDER, exist_ok=True)
+job_queue = JobQueue(workers=JOB_WORKERS, max_queued=JOB_MAX_QUEUED)
+
+# Batch splits (/jobs/batch-split) - one worker pool shared by all files of a manifest
+BATCH_SPLIT_WORKERS = int(os.getenv('BATCH_SPLIT_WORKERS', os.cpu_count() or 1))
+# Server folder that manifest "file" paths are read from (unset = document IDs only)
+BATCH_INPUT_FOLDER = os.getenv('BATCH_INPUT_FOLDER')
+
+# Prometheus-text metrics at /metrics, and per-request stage timings in a
+# Server-Timing response header (visible in the browser's network panel)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'false').lower() in ('1', 'true', 'yes')
+
+
+@app.before_request
+def start_request_timer():
+    """Time every request; stages run during it are attributed to its route"""
+    g.request_timer, g.request_timer_token = metrics.start_request(request.endpoint or 'unknown')
+
+
+@app.after_request
+def finish_request_timer(response):
+    """Record the request and add the Server-Timing header when enabled"""
+    timer = g.pop('request_timer', None)
+    if timer:
+        if SERVER_TIMING_HEADER:
+            response.headers['Server-Timing'] = timer.server_timing()
+        metrics.finish_request(timer, g.pop('request_timer_token'), response.status_code)
+    return response
 
 
 def allowed_file(filename):
@@ -36,29 +156,110 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def parse_page_input(page_string):
+def error_status(error):
+    """HTTP status for an input error: 404 when the referenced document is gone, else 400"""
+    return 404 if error == UNKNOWN_DOCUMENT_ERROR else 400
+
+
+def resolve_input_pdf(temp_prefix):
     """
-    Parse page numbers from user input.
-    Supports: "1,3,5" or "1-5,8,10-12" format
-    Returns list of page numbers
+    Find the PDF for the current request.
+
+    A request either references a stored document with a `document_id`
+    form field, or uploads the file itself as `pdf_file`. Uploaded files
+    are saved to a temp path that the caller must remove afterwards;
+    stored documents are left alone.
+
+    Args:
+        temp_prefix: Prefix for the temp filename of a direct upload
+
+    Returns:
+        Tuple of (input_path, filename, is_temp, error_message)
     """
-    pages = []
-    parts = page_string.replace(" ", "").split(",")
+    document_id = request.form.get('document_id', '').strip()
+    if document_id:
+        input_path = document_store.get_path(document_id)
+        if not input_path:
+            return None, None, False, UNKNOWN_DOCUMENT_ERROR
+        filename = secure_filename(document_store.get_filename(document_id))
+        return input_path, filename, False, None
 
-    for part in parts:
-        if "-" in part:
-            try:
-                start, end = part.split("-")
-                pages.extend(range(int(start), int(end) + 1))
-            except:
-                pass
-        else:
-            try:
-                pages.append(int(part))
-            except:
-                pass
+    if 'pdf_file' not in request.files:
+        return None, None, False, "No file uploaded"
 
-    return sorted(list(set(pages)))  # Remove duplicates and sort
+    file = request.files['pdf_file']
+
+    if file.filename == '':
+        return None, None, False, "No file selected"
+
+    if not allowed_file(file.filename):
+        return None, None, False, "Invalid file type. Please upload a PDF file."
+
+    filename = secure_filename(file.filename)
+    input_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{temp_prefix}{filename}")
+    with metrics.stage("save"):
+        sniffer = save_stream(file.stream, input_path)
+    metrics.count_bytes(sniffer.size, "save")
+
+    # The header was checked while saving, before anything parses the file
+    if sniffer.result()["pdf_version"] is None:
+        os.remove(input_path)
+        return None, None, False, NOT_A_PDF_ERROR
+    return input_path, filename, True, None
+
+
+def store_uploaded_pdf():
+    """
+    Store the request's PDF in the document store, or reuse the one it references.
+
+    Returns:
+        Tuple of (document_id, error_message)
+    """
+    document_id = request.form.get('document_id', '').strip()
+    if document_id:
+        if not document_store.get_path(document_id):
+            return None, UNKNOWN_DOCUMENT_ERROR
+        return document_id, None
+
+    if 'pdf_file' not in request.files:
+        return None, "No file uploaded"
+
+    file = request.files['pdf_file']
+
+    if file.filename == '':
+        return None, "No file selected"
+
+    if not allowed_file(file.filename):
+        return None, "Invalid file type"
+
+    filename = secure_filename(file.filename)
+    with metrics.stage("save"):
+        document_id = document_store.put(file.stream, filename=filename)
+    stored_path = document_store.get_path(document_id)
+    if not stored_path:
+        # Evicted again by a concurrent upload before it could be used
+        return None, "The document store is full. Please try again."
+    metrics.count_bytes(os.path.getsize(stored_path), "save")
+    return document_id, reject_non_pdf(document_id)
+
+
+def reject_non_pdf(document_id):
+    """
+    Remove a stored document whose upload had no PDF header
+
+    Returns:
+        An error message if it was removed, otherwise None
+    """
+    if document_store.get_info(document_id).get("pdf_version") is None:
+        document_store.delete(document_id)
+        return NOT_A_PDF_ERROR
+    return None
+
+
+def open_session(input_path, document_id):
+    """PDFSession for a stored document, seeded with what was sniffed during its upload"""
+    info = document_store.get_info(document_id)
+    return PDFSession(input_path, page_count=info.get("page_count"), has_outline=info.get("has_outline"))
 
 
 def extract_pdf_pages(input_path, output_path, page_numbers):
@@ -68,31 +269,21 @@ def extract_pdf_pages(input_path, output_path, page_numbers):
     Args:
         input_path: Path to input PDF
         output_path: Path to save extracted PDF
-        page_numbers: List of page numbers to extract (1-based)
+        page_numbers: PageSelection, or list of page numbers to extract (1-based)
 
     Returns:
         Tuple of (success: bool, message: str, pages_extracted: int)
     """
     try:
-        pdf_reader = PdfReader(input_path)
-        pdf_writer = PdfWriter()
-        total_pages = len(pdf_reader.pages)
-
-        extracted_count = 0
-        invalid_pages = []
-
-        for page_num in page_numbers:
-            if 1 <= page_num <= total_pages:
-                pdf_writer.add_page(pdf_reader.pages[page_num - 1])
-                extracted_count += 1
-            else:
-                invalid_pages.append(page_num)
+        with metrics.stage("extract"):
+            # Memory-mapped fast path: only the selected pages are resolved
+            extracted_count, invalid_pages = extract_pages(input_path, output_path, page_numbers)
 
         if extracted_count == 0:
             return False, "No valid pages to extract", 0
 
-        with open(output_path, 'wb') as output_file:
-            pdf_writer.write(output_file)
+        metrics.count_pages(extracted_count, "extract")
+        metrics.count_bytes(os.path.getsize(output_path), "extract")
 
         message = f"Successfully extracted {extracted_count} page(s)"
         if invalid_pages:
@@ -104,29 +295,172 @@ def extract_pdf_pages(input_path, output_path, page_numbers):
         return False, f"Error processing PDF: {str(e)}", 0
 
 
+def iter_section_parts(sections, total_pages):
+    """
+    Turn the requested sections into (archive_name, page_numbers) parts
+
+    Args:
+        sections: List of {"name": ..., "pages": ...} dicts
+        total_pages: Page count of the PDF; page numbers are clamped to it
+
+    Returns:
+        List of parts for sections that have valid page numbers
+    """
+    parts = []
+    for section in sections:
+        app.logger.debug("Processing section: %s", section)
+        section_name = section.get('name', 'Section')
+        page_numbers = PageSelection.parse(section.get('pages', '')).resolve(total_pages)
+
+        if page_numbers:
+            safe_name = section_name.replace('/', '_').replace('\\', '_')
+            parts.append((f"{safe_name}.pdf", page_numbers))
+
+    return parts
+
+
+def part_page_counts(parts):
+    """Pages per archive name of (archive_name, page_numbers) parts"""
+    return {name: len(page_numbers) for name, page_numbers in parts}
+
+
+def stream_split_zip(section_pdfs, page_counts):
+    """
+    ZIP split parts as they are written, timing the "split" and "zip" stages
+
+    Args:
+        section_pdfs: Iterable of (archive_name, pdf_bytes) from iter_split_parts
+        page_counts: Dict of archive_name -> pages in that part (looked up
+                     as each part is written, so it may still be filling)
+
+    Yields:
+        Chunks of the ZIP archive
+    """
+    split_seconds = 0.0
+
+    def written_parts():
+        nonlocal split_seconds
+        section_iter = iter(section_pdfs)
+        while True:
+            started = time.perf_counter()
+            part = next(section_iter, None)
+            split_seconds += time.perf_counter() - started
+            if part is None:
+                return
+            metrics.count_pages(page_counts.get(part[0], 0), "split")
+            metrics.count_bytes(len(part[1]), "split")
+            yield part
+
+    # stream_zip pulls the parts, so the split time is taken out of the zip time
+    zip_seconds = 0.0
+    chunks = stream_zip(written_parts())
+    try:
+        while True:
+            started, split_before = time.perf_counter(), split_seconds
+            chunk = next(chunks, None)
+            zip_seconds += time.perf_counter() - started - (split_seconds - split_before)
+            if chunk is None:
+                return
+            metrics.count_bytes(len(chunk), "zip")
+            yield chunk
+    finally:
+        metrics.record_stage("split", split_seconds)
+        metrics.record_stage("zip", zip_seconds)
+
+
 @app.route('/')
 def index():
     """Display the main upload form"""
-    # AI is enabled if we have an API key OR using Ollama
-    ai_enabled = API_KEY is not None or AI_PROVIDER == 'ollama'
+    # AI is enabled if we have an API key OR using a local provider
+    ai_enabled = API_KEY is not None or AI_PROVIDER in LOCAL_PROVIDERS
     return render_template('index.html', ai_enabled=ai_enabled)
 
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
-    """Handle file upload and page extraction"""
+@app.route('/documents', methods=['POST'])
+def upload_document():
+    """Store an uploaded PDF once and return its document ID"""
+    document_id, error = store_uploaded_pdf()
+    if error:
+        return jsonify({"error": error}), error_status(error)
 
-    # Check if file was uploaded
-    if 'pdf_file' not in request.files:
-        flash('No file uploaded', 'error')
-        return redirect(url_for('index'))
+    return jsonify({
+        "document_id": document_id,
+        "filename": document_store.get_filename(document_id),
+        "pages": document_store.get_info(document_id).get("page_count")
+    })
 
-    file = request.files['pdf_file']
 
-    # Check if file was selected
-    if file.filename == '':
-        flash('No file selected', 'error')
-        return redirect(url_for('index'))
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a chunked upload (JSON or form: filename, size, optional chunk_size and sha256)"""
+    options = request.get_json(silent=True) or request.form
+    filename = secure_filename(str(options.get('filename', '')))
+    if not allowed_file(filename):
+        return jsonify({"error": "Invalid file type. Please upload a PDF file."}), 400
+
+    try:
+        size = int(options.get('size', 0))
+        chunk_size = int(options['chunk_size']) if options.get('chunk_size') else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "size and chunk_size must be numbers of bytes"}), 400
+
+    try:
+        upload = upload_store.create(filename, size, chunk_size, options.get('sha256'))
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status_code
+
+    return jsonify(upload), 201
+
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Chunks received and still missing, to resume an interrupted upload"""
+    upload = upload_store.status(upload_id)
+    if upload is None:
+        return jsonify({"error": "Unknown or expired upload"}), 404
+    return jsonify(upload)
+
+
+@app.route('/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """Store one chunk (raw request body); an optional X-Chunk-SHA256 header is verified"""
+    try:
+        with metrics.stage("save"):
+            result = upload_store.write_chunk(upload_id, index, request.stream, request.headers.get('X-Chunk-SHA256'))
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status_code
+
+    if not result["duplicate"]:
+        metrics.count_bytes(request.content_length or 0, "save")
+    return jsonify(result)
+
+
+@app.route('/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """Assemble the chunks into a stored document and return its document ID"""
+    try:
+        with metrics.stage("finalize"):
+            document = upload_store.finalize(upload_id)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status_code
+
+    error = reject_non_pdf(document["document_id"])
+    if error:
+        return jsonify({"error": error}), 400
+    document["pages"] = document_store.get_info(document["document_id"]).get("page_count")
+    return jsonify(document)
+
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    """Discard an unfinished upload"""
+    upload_store.abort(upload_id)
+    return jsonify({"upload_id": upload_id, "deleted": True})
+
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    """Handle file upload and page extraction"""
 
     # Check if pages were specified
     page_input = request.form.get('pages', '').strip()
@@ -134,221 +468,628 @@ def upload_file():
         flash('Please specify which pages to extract', 'error')
         return redirect(url_for('index'))
 
-    # Validate file type
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
+    # Parse page numbers (resolved against the page count while extracting)
+    page_numbers = PageSelection.parse(page_input)
 
-        # Create temporary files
-        input_path = os.path.join(app.config['UPLOAD_FOLDER'], f"temp_input_{filename}")
-        output_filename = f"extracted_{filename}"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+    if not page_numbers:
+        flash('Invalid page numbers format', 'error')
+        return redirect(url_for('index'))
 
-        try:
-            # Save uploaded file
-            file.save(input_path)
+    # Use the stored document or save the uploaded file
+    input_path, filename, is_temp, error = resolve_input_pdf("temp_input_")
+    if error == UNKNOWN_DOCUMENT_ERROR:
+        # Only scripted requests send a document ID; let them upload the file instead
+        return jsonify({"error": error}), 404
+    if error:
+        flash(error, 'error')
+        return redirect(url_for('index'))
 
-            # Parse page numbers
-            page_numbers = parse_page_input(page_input)
+    output_filename = f"extracted_{filename}"
+    output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
 
-            if not page_numbers:
-                flash('Invalid page numbers format', 'error')
-                os.remove(input_path)
-                return redirect(url_for('index'))
-
-            # Extract pages
-            success, message, count = extract_pdf_pages(input_path, output_path, page_numbers)
-
-            if success:
-                # Send file and clean up
-                response = send_file(
-                    output_path,
-                    as_attachment=True,
-                    download_name=output_filename,
-                    mimetype='application/pdf'
-                )
-
-                # Clean up temp files after sending
-                @response.call_on_close
-                def cleanup():
-                    try:
-                        os.remove(input_path)
-                        os.remove(output_path)
-                    except:
-                        pass
-
-                return response
-            else:
-                flash(message, 'error')
-                os.remove(input_path)
-                return redirect(url_for('index'))
+    def cleanup_input():
+        if is_temp and os.path.exists(input_path):
+            os.remove(input_path)
 
-        except Exception as e:
-            flash(f'Error: {str(e)}', 'error')
-            # Clean up files
-            try:
-                if os.path.exists(input_path):
-                    os.remove(input_path)
-                if os.path.exists(output_path):
+    try:
+        # Extract pages
+        success, message, count = extract_pdf_pages(input_path, output_path, page_numbers)
+
+        if success:
+            # Send file and clean up
+            response = send_file(
+                output_path,
+                as_attachment=True,
+                download_name=output_filename,
+                mimetype='application/pdf'
+            )
+
+            # Clean up temp files after sending
+            @response.call_on_close
+            def cleanup():
+                try:
+                    cleanup_input()
                     os.remove(output_path)
-            except:
-                pass
+                except:
+                    pass
+
+            return response
+        else:
+            flash(message, 'error')
+            cleanup_input()
             return redirect(url_for('index'))
 
-    else:
-        flash('Invalid file type. Please upload a PDF file.', 'error')
+    except Exception as e:
+        flash(f'Error: {str(e)}', 'error')
+        # Clean up files
+        try:
+            cleanup_input()
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        except:
+            pass
         return redirect(url_for('index'))
 
 
-@app.route('/analyze', methods=['POST'])
-def analyze_pdf():
-    """Analyze PDF content with AI and return splitting suggestions"""
+def outline_analysis(session, document_id, user_question):
+    """
+    Suggestions from the PDF's outline, or None when the AI should decide
 
+    Bookmarked PDFs can be split from their outline without the AI,
+    unless the user asked something specific.
+    """
+    # has_outline is usually known from the upload, so unbookmarked PDFs are not parsed here
+    if not USE_OUTLINE_ANALYSIS or user_question or not session.has_outline:
+        return None
+
+    with metrics.stage("outline"):
+        analysis = analyze_outline(session.pdf_path, pdf_reader=session.reader)
+    if analysis:
+        analysis["document_id"] = document_id
+    return analysis
+
+
+def create_analyzer():
+    """
+    Build a PDFAnalyzer for the configured provider
+
+    Raises:
+        ValueError: if the provider needs an API key and none is set
+    """
     # Check if AI is available
-    if AI_PROVIDER != 'ollama' and not API_KEY:
-        return jsonify({
-            "error": "AI analysis is not configured. Please set ANTHROPIC_API_KEY, OPENAI_API_KEY, or use Ollama."
-        }), 400
+    if AI_PROVIDER not in LOCAL_PROVIDERS and not API_KEY:
+        raise ValueError("AI analysis is not configured. Please set ANTHROPIC_API_KEY, OPENAI_API_KEY, or use Ollama.")
 
-    # Check if file was uploaded
-    if 'pdf_file' not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
+    return PDFAnalyzer(
+        api_key=API_KEY,
+        provider=AI_PROVIDER,
+        ollama_model=OLLAMA_MODEL,
+        text_cache=text_cache,
+        response_cache=response_cache,
+        max_concurrency=AI_MAX_CONCURRENCY
+    )
 
-    file = request.files['pdf_file']
 
-    if file.filename == '':
-        return jsonify({"error": "No file selected"}), 400
+def create_router():
+    """
+    Build the failover router over AI_PROVIDERS, or None when it is not configured
 
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        input_path = os.path.join(app.config['UPLOAD_FOLDER'], f"temp_analyze_{filename}")
+    Cloud providers without an API key are left out of the list.
 
-        try:
-            # Save uploaded file
-            file.save(input_path)
+    Raises:
+        ValueError: if none of the listed providers is usable
+    """
+    if not AI_PROVIDERS:
+        return None
+
+    analyzers = []
+    for provider in AI_PROVIDERS:
+        api_key = API_KEY if provider == AI_PROVIDER else os.getenv(PROVIDER_KEY_VARS.get(provider, ''))
+        if provider not in LOCAL_PROVIDERS and not api_key:
+            continue
+        analyzers.append(PDFAnalyzer(
+            api_key=api_key,
+            provider=provider,
+            ollama_model=OLLAMA_MODEL,
+            text_cache=text_cache,
+            response_cache=response_cache,
+            max_concurrency=AI_MAX_CONCURRENCY
+        ))
+
+    if not analyzers:
+        raise ValueError("None of the providers in AI_PROVIDERS is configured. Set their API keys or add ollama.")
+
+    return ProviderRouter(analyzers, latency_budgets=AI_LATENCY_BUDGETS, hedge=AI_HEDGE)
+
+
+def extract_for_analysis(analyzer, session, document_id, progress=None):
+    """Extract the page text the analysis prompt is built from"""
+    # Document IDs are the file's SHA-256, so the text cache needs no re-hashing
+    return analyzer.extract_text_from_pdf(
+        session.pdf_path,
+        token_budget=ANALYSIS_TOKEN_BUDGET,
+        workers=EXTRACT_WORKERS,
+        file_hash=document_id,
+        progress=progress,
+        session=session
+    )
+
+
+def use_chunked_analysis(analyzer, session):
+    """Whether a document is long enough for window-by-window analysis"""
+    return (analyzer.provider != "heuristic"
+            and CHUNKED_ANALYSIS_MIN_PAGES > 0
+            and session.page_count > CHUNKED_ANALYSIS_MIN_PAGES)
+
+
+def chunked_analysis(analyzer, session, document_id, user_question, use_cache, progress=None):
+    """Map-reduce analysis of a long document; progress is (windows_done, windows_total)"""
+    return analyzer.analyze_chunked(
+        session.pdf_path,
+        user_question,
+        use_cache=use_cache,
+        workers=EXTRACT_WORKERS,
+        file_hash=document_id,
+        progress=progress,
+        session=session
+    )
+
+
+def run_analysis(input_path, document_id, user_question='', use_cache=True, progress=None,
+                 window_progress=None):
+    """
+    Produce splitting suggestions for a stored document
 
-            # Get user's question if any
-            user_question = request.form.get('question', '').strip()
+    Uses the PDF's outline when it is detailed enough and no question was
+    asked, and the configured AI provider otherwise.
 
-            # Initialize AI analyzer
-            analyzer = PDFAnalyzer(
-                api_key=API_KEY,
-                provider=AI_PROVIDER,
-                ollama_model=OLLAMA_MODEL
-            )
+    Args:
+        input_path: Path to the stored PDF
+        document_id: Its document ID (also its SHA-256)
+        user_question: Optional question about how to split
+        use_cache: Reuse a cached AI answer for an identical prompt
+        progress: Optional callback progress(pages_done, pages_total)
+        window_progress: Optional callback (windows_done, windows_total) for
+                         long documents analyzed window by window
 
-            # Extract PDF text
-            pdf_data = analyzer.extract_text_from_pdf(input_path, max_pages=30)
+    Returns:
+        Analysis dict including document_id
 
-            # Analyze with AI
-            analysis = analyzer.analyze_with_ai(pdf_data, user_question)
+    Raises:
+        ValueError: if the AI is needed but not configured
+    """
+    # One session per analysis: the outline check and text extraction
+    # share a single parse of the file
+    with open_session(input_path, document_id) as session:
+        analysis = outline_analysis(session, document_id, user_question)
+        if analysis:
+            return analysis
 
-            # Clean up
-            os.remove(input_path)
+        router = create_router()
+        analyzer = router.primary() if router else create_analyzer()
+        if use_chunked_analysis(analyzer, session):
+            analysis = chunked_analysis(analyzer, session, document_id, user_question, use_cache, window_progress)
+            analysis["document_id"] = document_id
+            return analysis
 
-            return jsonify(analysis)
+        pdf_data = extract_for_analysis(analyzer, session, document_id, progress)
 
-        except Exception as e:
-            # Clean up on error
-            try:
-                if os.path.exists(input_path):
-                    os.remove(input_path)
-            except:
-                pass
+    # Analyze with AI (with failover across providers when configured)
+    analysis = (router or analyzer).analyze_with_ai(pdf_data, user_question, use_cache=use_cache)
+    analysis["document_id"] = document_id
+    return analysis
 
-            return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
 
-    else:
-        return jsonify({"error": "Invalid file type"}), 400
+def iter_analysis_events(input_path, document_id, user_question='', use_cache=True):
+    """
+    Streaming counterpart of run_analysis
+
+    Yields:
+        (event, payload) tuples: "status" while preparing, then the
+        "token" / "suggestion" / "result" events of PDFAnalyzer.stream_analysis
+    """
+    with open_session(input_path, document_id) as session:
+        analysis = outline_analysis(session, document_id, user_question)
+        if analysis:
+            for suggestion in analysis["suggestions"]:
+                yield "suggestion", suggestion
+            yield "result", analysis
+            return
+
+        router = create_router()
+        # Streaming follows one provider: the first whose circuit is closed
+        analyzer = router.primary() if router else create_analyzer()
+
+        if use_chunked_analysis(analyzer, session):
+            # Windows are answered concurrently, so there is no single token stream
+            yield "status", {"stage": "analyzing", "mode": "chunked", "pages": session.page_count}
+            analysis = chunked_analysis(analyzer, session, document_id, user_question, use_cache)
+            for suggestion in analysis.get("suggestions", []):
+                yield "suggestion", suggestion
+            analysis["document_id"] = document_id
+            yield "result", analysis
+            return
+
+        yield "status", {"stage": "extracting"}
+        pdf_data = extract_for_analysis(analyzer, session, document_id)
+        yield "status", {"stage": "analyzing", "pages": pdf_data["analyzed_pages"]}
+
+    for event, payload in analyzer.stream_analysis(pdf_data, user_question, use_cache=use_cache):
+        if event == "result":
+            payload["document_id"] = document_id
+        yield event, payload
+
+
+@app.route('/providers', methods=['GET'])
+def provider_status():
+    """Configured AI providers and their health (latency p95, circuit state)"""
+    return jsonify({
+        "providers": AI_PROVIDERS or [AI_PROVIDER],
+        "hedge": AI_HEDGE,
+        "latency_budgets": AI_LATENCY_BUDGETS,
+        "health": health_report()
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Request, stage, page and byte metrics in the Prometheus text format"""
+    if not METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def read_analysis_options():
+    """Read the question and cache option of an analysis request"""
+    user_question = request.form.get('question', '').strip()
+    # "no_cache" forces a fresh AI answer
+    use_cache = request.form.get('no_cache', '').lower() not in ('1', 'true', 'on')
+    return user_question, use_cache
+
+
+@app.route('/analyze', methods=['POST'])
+def analyze_pdf():
+    """Analyze PDF content with AI and return splitting suggestions"""
+
+    # Keep the upload in the document store so suggestions can be applied
+    # without sending the file again
+    document_id, error = store_uploaded_pdf()
+    if error:
+        return jsonify({"error": error}), error_status(error)
+
+    user_question, use_cache = read_analysis_options()
+
+    try:
+        input_path = document_store.get_path(document_id)
+        analysis = run_analysis(input_path, document_id, user_question, use_cache)
+        return jsonify(analysis)
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
+
+
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_pdf_stream():
+    """Analyze PDF content and stream the AI's answer as server-sent events"""
+
+    document_id, error = store_uploaded_pdf()
+    if error:
+        return jsonify({"error": error}), error_status(error)
+
+    user_question, use_cache = read_analysis_options()
+    input_path = document_store.get_path(document_id)
+    timer = metrics.current_timer()
+
+    def generate():
+        # The body is sent after the request has finished; keep its stages on this route
+        with metrics.track(timer=timer):
+            try:
+                for event, payload in iter_analysis_events(input_path, document_id, user_question, use_cache):
+                    yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            except ValueError as e:
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'error': f'Analysis failed: {str(e)}'})}\n\n"
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 @app.route('/split-multiple', methods=['POST'])
 def split_multiple():
     """Split PDF into multiple files based on sections"""
 
-    if 'pdf_file' not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
-
-    file = request.files['pdf_file']
     sections_json = request.form.get('sections', '[]')
 
-    if file.filename == '':
-        return jsonify({"error": "No file selected"}), 400
-
     try:
         sections = json.loads(sections_json)
-        print(f"DEBUG: Received {len(sections)} sections: {sections}")  # Debug
+        app.logger.debug("Received %d sections: %s", len(sections), sections)
     except Exception as e:
-        print(f"DEBUG: JSON parse error: {e}")  # Debug
+        app.logger.debug("Invalid sections JSON: %s", e)
         return jsonify({"error": "Invalid sections data"}), 400
 
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        input_path = os.path.join(app.config['UPLOAD_FOLDER'], f"temp_split_{filename}")
+    # Use the stored document or save the uploaded file
+    input_path, filename, is_temp, error = resolve_input_pdf("temp_split_")
+    if error:
+        return jsonify({"error": error}), error_status(error)
+
+    try:
+        pdf_reader = PdfReader(input_path)
+    except Exception as e:
+        if is_temp and os.path.exists(input_path):
+            os.remove(input_path)
+        return jsonify({"error": f"Split failed: {str(e)}"}), 500
+
+    timer = metrics.current_timer()
 
+    def generate():
+        report = new_report() if DEDUP_SPLIT_RESOURCES else None
         try:
-            # Save uploaded file
-            file.save(input_path)
+            parts = iter_section_parts(sections, len(pdf_reader.pages))
+            section_pdfs = iter_split_parts(
+                input_path,
+                parts,
+                workers=SPLIT_WORKERS,
+                pdf_reader=pdf_reader,
+                report=report
+            )
+            # The body is sent after the request has finished; keep its stages on this route
+            with metrics.track(timer=timer):
+                yield from stream_split_zip(section_pdfs, part_page_counts(parts))
+            if report:
+                app.logger.debug("Split of '%s': wrote %d bytes in %d part(s), deduplication saved %d bytes",
+                                 filename, report['bytes_written'], report['parts'], report['bytes_saved'])
+        except Exception:
+            # Headers are already sent, so the client just sees a truncated ZIP
+            app.logger.exception("Split failed while streaming")
+            raise
+        finally:
+            # Clean up input file
+            if is_temp and os.path.exists(input_path):
+                os.remove(input_path)
 
-            # Create output folder
-            import uuid
-            import zipfile
-            from io import BytesIO
+    # Stream the ZIP so each section is sent as soon as it is written
+    download_name = f"split_{os.path.splitext(filename)[0]}.zip"
+    return Response(
+        generate(),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
+    )
 
-            zip_buffer = BytesIO()
-            files_created = 0
 
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                pdf_reader = PdfReader(input_path)
+def analysis_job(job, input_path, document_id, user_question, use_cache):
+    """Background analysis; reports pages extracted as it goes"""
+    def progress(pages_done, pages_total):
+        job.update_progress(pages_extracted=pages_done, pages_total=pages_total)
 
-                for section in sections:
-                    print(f"DEBUG: Processing section: {section}")  # Debug
-                    section_name = section.get('name', 'Section')
-                    page_range = section.get('pages', '')
+    def window_progress(windows_done, windows_total):
+        job.update_progress(windows_analyzed=windows_done, windows_total=windows_total)
 
-                    # Parse page range
-                    page_numbers = parse_page_input(page_range)
+    with metrics.track("job_analyze"):
+        return run_analysis(input_path, document_id, user_question, use_cache, progress=progress,
+                            window_progress=window_progress)
 
-                    if page_numbers:
-                        # Create PDF for this section
-                        pdf_writer = PdfWriter()
 
-                        for page_num in page_numbers:
-                            if 1 <= page_num <= len(pdf_reader.pages):
-                                pdf_writer.add_page(pdf_reader.pages[page_num - 1])
+def split_job(job, input_path, document_id, filename, sections):
+    """Background split; writes the ZIP to the jobs folder and reports sections written"""
+    with open_session(input_path, document_id) as session:
+        parts = iter_section_parts(sections, session.page_count)
+    job.update_progress(sections_total=len(parts), sections_written=0)
 
-                        # Write to bytes
-                        pdf_bytes = BytesIO()
-                        pdf_writer.write(pdf_bytes)
-                        pdf_bytes.seek(0)
+    def counted(section_pdfs):
+        for written, item in enumerate(section_pdfs, start=1):
+            yield item
+            job.update_progress(sections_written=written)
 
-                        # Add to zip
-                        safe_name = section_name.replace('/', '_').replace('\\', '_')
-                        zip_file.writestr(f"{safe_name}.pdf", pdf_bytes.read())
+    zip_path = os.path.join(JOBS_FOLDER, f"{job.id}.zip")
+    job.result_path = zip_path
+    report = new_report() if DEDUP_SPLIT_RESOURCES else None
+    with metrics.track("job_split"), open(zip_path, 'wb') as zip_file:
+        section_pdfs = iter_split_parts(input_path, parts, workers=SPLIT_WORKERS, report=report)
+        for chunk in stream_split_zip(counted(section_pdfs), part_page_counts(parts)):
+            zip_file.write(chunk)
 
-            # Clean up input file
-            os.remove(input_path)
+    if report:
+        job.update_progress(bytes_written=report['bytes_written'], bytes_saved=report['bytes_saved'])
 
-            # Send zip file
-            zip_buffer.seek(0)
-            return send_file(
-                zip_buffer,
-                mimetype='application/zip',
-                as_attachment=True,
-                download_name=f"split_{os.path.splitext(filename)[0]}.zip"
-            )
+    return {
+        "document_id": document_id,
+        "download_name": f"split_{os.path.splitext(filename)[0]}.zip",
+        "sections_written": len(parts),
+        "dedup_report": report
+    }
 
-        except Exception as e:
-            # Clean up on error
-            try:
-                if os.path.exists(input_path):
-                    os.remove(input_path)
-            except:
-                pass
 
-            return jsonify({"error": f"Split failed: {str(e)}"}), 500
+def batch_split_job(job, items):
+    """Background job: split every file of a batch manifest into one ZIP"""
+    def item_finished(item):
+        job.update_progress(**batch.counters())
+
+    batch = BatchSplit(items, workers=BATCH_SPLIT_WORKERS, dedup=DEDUP_SPLIT_RESOURCES, on_item=item_finished)
+    job.update_progress(**batch.counters())
+
+    zip_path = os.path.join(JOBS_FOLDER, f"{job.id}.zip")
+    job.result_path = zip_path
+    with metrics.track("job_batch_split"), open(zip_path, 'wb') as zip_file:
+        for chunk in stream_split_zip(batch.iter_parts(), batch.page_counts):
+            zip_file.write(chunk)
+
+    summary = batch.summary()
+    summary["download_name"] = "batch_split.zip"
+    job.update_progress(pages_per_second=summary["pages_per_second"])
+    return summary
+
+
+def resolve_batch_input(item):
+    """
+    Point a manifest item at its PDF: a stored document, or a file below BATCH_INPUT_FOLDER
+
+    Returns:
+        The item with "file" set to a local path, or with "error" set; a
+        stored document is pinned (see queue_job) unless there is an error
+    """
+    if item.get("document_id"):
+        document_id = item["document_id"]
+        path = document_store.pin(document_id)  # released when the job finishes
+        if not path:
+            return dict(item, label=document_id, file=None, error="Unknown or expired document")
+        return dict(item, label=document_store.get_filename(document_id), file=path)
+
+    if not BATCH_INPUT_FOLDER:
+        return dict(item, label=item["file"], file=None,
+                    error="File paths are not enabled on this server (BATCH_INPUT_FOLDER); use document IDs")
+
+    root = os.path.realpath(BATCH_INPUT_FOLDER)
+    path = os.path.realpath(os.path.join(root, item["file"]))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return dict(item, label=item["file"], file=None, error="File not found in the batch input folder")
+    return dict(item, label=item["file"], file=path)
+
+
+def queue_job(kind, func, *args, pinned=()):
+    """
+    Submit a background job and answer 202, or 503 when the queue is full
+
+    Args:
+        pinned: Document IDs pinned in the store for this job; they are
+                unpinned when the job finishes (or is rejected)
+    """
+    def unpin_all():
+        for document_id in pinned:
+            document_store.unpin(document_id)
+
+    def run(job, *job_args):
+        try:
+            return func(job, *job_args)
+        finally:
+            unpin_all()
+
+    try:
+        job = job_queue.submit(kind, run, *args)
+    except QueueFullError as e:
+        unpin_all()
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = '10'
+        return response, 503
+
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": url_for('job_status', job_id=job.id)
+    }), 202
+
+
+@app.route('/jobs/analyze', methods=['POST'])
+def submit_analysis_job():
+    """Queue an analysis and return a job ID to poll"""
+    document_id, error = store_uploaded_pdf()
+    if error:
+        return jsonify({"error": error}), error_status(error)
+
+    user_question, use_cache = read_analysis_options()
+    # Pinned so that later uploads cannot evict it while the job waits or runs
+    input_path = document_store.pin(document_id)
+    if not input_path:
+        return jsonify({"error": UNKNOWN_DOCUMENT_ERROR}), 404
+    return queue_job('analyze', analysis_job, input_path, document_id, user_question, use_cache,
+                     pinned=[document_id])
+
+
+@app.route('/jobs/split-multiple', methods=['POST'])
+def submit_split_job():
+    """Queue a multi-section split and return a job ID to poll"""
+    try:
+        sections = json.loads(request.form.get('sections', '[]'))
+    except Exception:
+        return jsonify({"error": "Invalid sections data"}), 400
+
+    # The job outlives the request, so the PDF goes into the document store
+    document_id, error = store_uploaded_pdf()
+    if error:
+        return jsonify({"error": error}), error_status(error)
+
+    # Pinned so that later uploads cannot evict it while the job waits or runs
+    input_path = document_store.pin(document_id)
+    if not input_path:
+        return jsonify({"error": UNKNOWN_DOCUMENT_ERROR}), 404
+    filename = document_store.get_filename(document_id)
+    return queue_job('split', split_job, input_path, document_id, filename, sections, pinned=[document_id])
+
+
+@app.route('/jobs/batch-split', methods=['POST'])
+def submit_batch_split_job():
+    """
+    Queue a batch split of many PDFs, each with its own sections
+
+    The manifest (see batch_split.py) is a JSON request body, an uploaded
+    `manifest` file (.json or .csv), or a `manifest` form field with an
+    optional `format`. Items name stored documents by `document_id`, or
+    files below BATCH_INPUT_FOLDER by `file`.
+    """
+    try:
+        if request.is_json:
+            items = parse_manifest(request.get_data(as_text=True), "json")
+        elif 'manifest' in request.files:
+            manifest = request.files['manifest']
+            fmt = "csv" if manifest.filename.lower().endswith(".csv") else "json"
+            items = parse_manifest(manifest.read().decode('utf-8-sig'), fmt)
+        else:
+            items = parse_manifest(request.form.get('manifest', ''), request.form.get('format', 'json'))
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": f"Invalid manifest: {e}"}), 400
+
+    if not items:
+        return jsonify({"error": "The manifest lists no files"}), 400
+
+    items = [resolve_batch_input(item) for item in items]
+    pinned = [item["document_id"] for item in items if item.get("document_id") and not item.get("error")]
+    return queue_job('batch_split', batch_split_job, items, pinned=pinned)
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report a job's status and progress; analysis results are included when done"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    status = job.to_dict()
+    if job.status == 'done':
+        if job.result_path:
+            status["result_url"] = url_for('job_result', job_id=job.id)
+            # Batch splits report the status of every file next to the ZIP
+            if job.kind == 'batch_split':
+                status["result"] = job.result
+        else:
+            status["result"] = job.result
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Download a finished job's result"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    if job.status != 'done':
+        return jsonify({"error": f"Job is {job.status}", "status": job.status}), 409
+
+    if job.result_path:
+        return send_file(
+            job.result_path,
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name=job.result["download_name"]
+        )
 
-    else:
-        return jsonify({"error": "Invalid file type"}), 400
+    return jsonify(job.result)
 
 
 if __name__ == '__main__':
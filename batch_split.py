@@ -0,0 +1,336 @@
+"""
+Batch Splitting
+
+Splits many PDFs in one run, each by its own list of sections, without
+any prompts. A manifest names every input file and the sections to cut
+from it, with page numbers in the same "1-5,8,10-" syntax as the web
+form (see page_selection.py):
+
+    JSON:  [{"file": "in/a.pdf", "sections": [{"name": "Summary", "pages": "1-2"}, ...]}, ...]
+           or {"in/a.pdf": [{"name": "Summary", "pages": "1-2"}, ...], ...}
+    CSV:   file,name,pages          (header row; one row per section)
+           in/a.pdf,Summary,1-2
+
+The parts of all files go through one shared worker pool (see
+split_engine.iter_batch_parts), so the pool stays busy across file
+boundaries. Output is a directory (one subfolder per input file) or a
+single streamed ZIP with the same layout. Every file gets its own status
+(done, partial or failed, with the reasons), and the run reports its
+totals and pages per second.
+
+Used by the web app's /jobs/batch-split route and from the command line:
+
+    python batch_split.py manifest.json --output split_output --jobs 4
+    python batch_split.py manifest.csv --zip statements.zip
+    python batch_split.py manifest.csv --zip - > statements.zip
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from page_extractor import LazyPageReader
+from page_selection import PageSelection
+from resource_dedup import new_report
+from split_engine import iter_batch_parts
+from zip_stream import stream_zip
+
+
+def parse_manifest(text, fmt="json"):
+    """
+    Read a batch manifest
+
+    Args:
+        text: Manifest content
+        fmt: "json" or "csv"
+
+    Returns:
+        List of {"file" or "document_id": ..., "sections": [{"name", "pages"}]}
+        dicts in manifest order (CSV rows of the same file are grouped)
+
+    Raises:
+        ValueError: if the manifest is malformed
+    """
+    if fmt == "csv":
+        items = {}
+        reader = csv.DictReader(io.StringIO(text))
+        source_key = "document_id" if "document_id" in (reader.fieldnames or []) else "file"
+        if source_key not in (reader.fieldnames or []) or "pages" not in reader.fieldnames:
+            raise ValueError("CSV manifest needs a header with file (or document_id), name and pages columns")
+        for row_number, row in enumerate(reader, start=2):
+            source = (row.get(source_key) or "").strip()
+            if not source:
+                raise ValueError(f"CSV manifest row {row_number} has no {source_key}")
+            item = items.setdefault(source, {source_key: source, "sections": []})
+            name = (row.get("name") or "").strip() or f"Section {len(item['sections']) + 1}"
+            item["sections"].append({"name": name, "pages": (row.get("pages") or "").strip()})
+        return list(items.values())
+
+    if fmt != "json":
+        raise ValueError(f"Unknown manifest format '{fmt}' (use json or csv)")
+
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON manifest: {e}")
+
+    if isinstance(data, dict):
+        data = [{"file": source, "sections": sections} for source, sections in data.items()]
+    if not isinstance(data, list):
+        raise ValueError("JSON manifest must be a list of items or an object of file -> sections")
+
+    items = []
+    for position, entry in enumerate(data, start=1):
+        if not isinstance(entry, dict) or not (entry.get("file") or entry.get("document_id")):
+            raise ValueError(f"Manifest item {position} needs a file (or document_id) and sections")
+        sections = entry.get("sections") or []
+        if isinstance(sections, dict):
+            sections = [{"name": name, "pages": pages} for name, pages in sections.items()]
+        if not isinstance(sections, list) or not all(isinstance(section, dict) for section in sections):
+            raise ValueError(f"Manifest item {position}: sections must be a list of {{name, pages}} objects")
+
+        item = {key: entry[key] for key in ("file", "document_id") if entry.get(key)}
+        item["sections"] = [
+            {"name": str(section.get("name") or f"Section {number}"), "pages": str(section.get("pages", ""))}
+            for number, section in enumerate(sections, start=1)
+        ]
+        items.append(item)
+    return items
+
+
+def load_manifest(path, fmt=None):
+    """
+    Read a manifest file; relative input paths are taken from the manifest's folder
+
+    Args:
+        path: Path to a .json or .csv manifest
+        fmt: "json" or "csv"; detected from the extension when not given
+    """
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "json")
+    with open(path, encoding="utf-8-sig") as manifest_file:
+        items = parse_manifest(manifest_file.read(), fmt)
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for item in items:
+        if "file" in item:
+            item["file"] = os.path.join(base_dir, os.path.expanduser(item["file"]))
+    return items
+
+
+def _safe_name(name):
+    return name.replace("/", "_").replace("\\", "_").strip() or "Section"
+
+
+class BatchSplit:
+    """One run over a manifest: per-file status, shared-pool splitting and totals"""
+
+    def __init__(self, items, workers=0, dedup=True, on_item=None):
+        """
+        Prepare a batch; nothing is read until the parts are iterated
+
+        Args:
+            items: Manifest items with "file" set to a readable path; an
+                   item may carry "error" instead (e.g. an unknown document),
+                   and a "label" to show instead of the path
+            workers: Worker processes shared by all files (0 = serial)
+            dedup: Collapse duplicate fonts/images within each part
+            on_item: Optional callback on_item(status) when a file is finished
+        """
+        self.workers = workers
+        self.report = new_report() if dedup else None
+        self.on_item = on_item
+        self.page_counts = {}  # archive name -> pages, filled as parts are planned
+        self.seconds = 0.0
+
+        folders = set()
+        self.items = []
+        for item in items:
+            label = item.get("label") or item.get("file") or item.get("document_id")
+            folder = base = _safe_name(os.path.splitext(os.path.basename(str(label)))[0])
+            suffix = 2
+            while folder in folders:
+                folder, suffix = f"{base}_{suffix}", suffix + 1
+            folders.add(folder)
+
+            self.items.append({
+                "file": label,
+                "output": folder,
+                "status": "failed" if item.get("error") else "pending",
+                "sections": len(item.get("sections", [])),
+                "sections_written": 0,
+                "pages": 0,
+                "bytes_written": 0,
+                "errors": [item["error"]] if item.get("error") else [],
+                "_path": item.get("file"),
+                "_sections": item.get("sections", [])
+            })
+
+    def iter_parts(self):
+        """
+        Build every part, in manifest order
+
+        Yields:
+            (archive_name, pdf_bytes) for each part written, where the
+            archive name is "<file folder>/<section name>.pdf"
+        """
+        started = time.perf_counter()
+        finished = 0  # items before this index have all their results
+        try:
+            for (index, archive_name, section), pdf_data, error in iter_batch_parts(
+                    self._tasks(), workers=self.workers, report=self.report):
+                while finished < index:
+                    self._finish(finished)
+                    finished += 1
+
+                status = self.items[index]
+                if error:
+                    status["errors"].append(f"{section}: {error}")
+                    continue
+                status["sections_written"] += 1
+                status["pages"] += self.page_counts[archive_name]
+                status["bytes_written"] += len(pdf_data)
+                yield archive_name, pdf_data
+
+            while finished < len(self.items):
+                self._finish(finished)
+                finished += 1
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def iter_zip(self):
+        """The whole batch as one streamed ZIP (chunks of bytes)"""
+        return stream_zip(self.iter_parts())
+
+    def write_to_directory(self, output_dir):
+        """Write every part below output_dir, one subfolder per input file"""
+        for archive_name, pdf_data in self.iter_parts():
+            output_path = os.path.join(output_dir, *archive_name.split("/"))
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "wb") as output_file:
+                output_file.write(pdf_data)
+
+    def counters(self):
+        """Running totals, e.g. for job progress"""
+        return {
+            "files_total": len(self.items),
+            "files_done": sum(1 for item in self.items if item["status"] in ("done", "partial", "failed")),
+            "files_failed": sum(1 for item in self.items if item["status"] == "failed"),
+            "sections_written": sum(item["sections_written"] for item in self.items),
+            "pages": sum(item["pages"] for item in self.items),
+            "bytes_written": sum(item["bytes_written"] for item in self.items)
+        }
+
+    def summary(self):
+        """Totals, throughput and the status of every file"""
+        summary = self.counters()
+        summary["seconds"] = round(self.seconds, 3)
+        summary["pages_per_second"] = round(summary["pages"] / self.seconds, 1) if self.seconds else None
+        if self.report:
+            summary["bytes_saved"] = self.report["bytes_saved"]
+        summary["items"] = [{key: value for key, value in item.items() if not key.startswith("_")}
+                            for item in self.items]
+        return summary
+
+    def _tasks(self):
+        """Check each file and its sections, yielding ((index, archive name, section), path, pages)"""
+        for index, item in enumerate(self.items):
+            if item["status"] == "failed":
+                continue
+
+            path = item["_path"]
+            try:
+                # Only the cross-reference table is read to learn the page count
+                with LazyPageReader(path) as reader:
+                    total_pages = reader.page_count
+            except Exception as e:
+                item["errors"].append(f"Cannot read PDF: {e}")
+                continue
+
+            names = set()
+            for section in item["_sections"]:
+                page_numbers = PageSelection.parse(
+                    section["pages"],
+                    warn=lambda message: item["errors"].append(f"{section['name']}: {message}")).resolve(total_pages)
+                if not page_numbers:
+                    item["errors"].append(f"{section['name']}: no valid pages in '{section['pages']}' "
+                                          f"(the PDF has {total_pages})")
+                    continue
+
+                name = base = _safe_name(section["name"])
+                suffix = 2
+                while name in names:
+                    name, suffix = f"{base}_{suffix}", suffix + 1
+                names.add(name)
+
+                archive_name = f"{item['output']}/{name}.pdf"
+                self.page_counts[archive_name] = len(page_numbers)
+                yield (index, archive_name, section["name"]), path, page_numbers
+
+    def _finish(self, index):
+        item = self.items[index]
+        if item["status"] == "pending":
+            if not item["errors"]:
+                item["status"] = "done"
+            else:
+                item["status"] = "partial" if item["sections_written"] else "failed"
+        if self.on_item:
+            self.on_item(item)
+
+
+def _print_item(item):
+    line = f"{item['status']:>7}  {item['file']}: {item['sections_written']}/{item['sections']} section(s), " \
+           f"{item['pages']} page(s)"
+    for error in item["errors"]:
+        line += f"\n         - {error}"
+    print(line, file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split many PDFs by a JSON or CSV manifest of sections.")
+    parser.add_argument("manifest", help="Manifest file (.json or .csv)")
+    parser.add_argument("--format", choices=("json", "csv"), help="Manifest format (default: from the extension)")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--output", metavar="DIR", help="Write the parts below this folder")
+    output.add_argument("--zip", metavar="PATH", help="Write one ZIP archive ('-' for stdout)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes shared by all files (default: CPU count; 0 = serial)")
+    parser.add_argument("--no-dedup", action="store_true", help="Do not deduplicate shared fonts/images")
+    parser.add_argument("--report", metavar="PATH", help="Also write the summary as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        items = load_manifest(args.manifest, args.format)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    batch = BatchSplit(items, workers=args.jobs, dedup=not args.no_dedup, on_item=_print_item)
+    if args.output:
+        batch.write_to_directory(args.output)
+    elif args.zip == "-":
+        for chunk in batch.iter_zip():
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.zip, "wb") as zip_file:
+            for chunk in batch.iter_zip():
+                zip_file.write(chunk)
+
+    summary = batch.summary()
+    print(f"\n{summary['files_total']} file(s): {summary['files_done'] - summary['files_failed']} split, "
+          f"{summary['files_failed']} failed; {summary['sections_written']} section(s), "
+          f"{summary['pages']:,} page(s), {summary['bytes_written']:,} bytes in {summary['seconds']:.1f}s "
+          f"({summary['pages_per_second'] or 0:,.0f} pages/s)", file=sys.stderr)
+
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(summary, report_file, indent=2)
+
+    return 1 if any(item["status"] != "done" for item in batch.items) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,490 @@
+"""
+PDF Splitter Benchmark Suite
+
+Times the hot paths of the splitter on a synthetic PDF corpus and prints
+the results as JSON, so runs on different commits can be compared:
+
+- extract:        app.extract_pdf_pages on every other page
+- split:          split_engine.iter_split_parts into 10-page parts
+- zip:            zip_stream.stream_zip over the already split parts
+- split_multiple: the /split-multiple endpoint end to end (split + ZIP)
+- text:           PDFAnalyzer.extract_text_from_pdf (sampled page text;
+                  pages and pages/s count the sampled pages only)
+- analyze:        text extraction plus analyze_with_ai against a local
+                  stub of the Ollama API, so no network or key is needed
+
+The corpus is generated locally and deterministically (fixed seed): many
+pages in a nested page tree, large images, one embedded font shared by
+every page, and a deep bookmark outline. Every stage runs in a fresh
+process, so its peak RSS is not inflated by earlier stages.
+
+Usage:
+    python benchmark.py                                # all stages, all sizes
+    python benchmark.py --sizes small,medium --stages split,zip
+    python benchmark.py --output after.json --compare before.json
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource  # Unix only; peak RSS is reported as null elsewhere
+except ImportError:
+    resource = None
+
+
+BENCHMARK_VERSION = 1        # bump when stages or the corpus change meaning
+CORPUS_SEED = 20240601       # fixed, so every run measures the same files
+CORPUS_SIZES = {"small": 50, "medium": 500, "large": 2000}
+STAGES = ("extract", "split", "zip", "split_multiple", "text", "analyze")
+
+IMAGE_KB = 48                # bytes of pixel data per page image
+DISTINCT_IMAGES = 4          # pages cycle through this many different images
+FONT_KB = 256                # embedded font program shared by every page
+PAGES_PER_CHAPTER = 20
+OUTLINE_DEPTH = 3            # chapters > sections > subsections
+PAGE_TREE_FANOUT = 16        # kids per /Pages node
+LINES_PER_PAGE = 24
+PART_PAGES = 10              # pages per part in the split stages
+
+WORDS = ("analysis data system report section value table figure result method model process "
+         "review summary policy market design project budget schedule quality risk control").split()
+
+
+class _RawPdf:
+    """Minimal PDF object writer (fast enough for thousands of pages)"""
+
+    def __init__(self):
+        self.objects = [None]  # object number -> body bytes; 0 is unused
+
+    def reserve(self):
+        self.objects.append(None)
+        return len(self.objects) - 1
+
+    def add(self, body):
+        number = self.reserve()
+        self.objects[number] = body
+        return number
+
+    def add_stream(self, entries, data):
+        return self.add(b"<< %s /Length %d >>\nstream\n%s\nendstream" % (entries.encode(), len(data), data))
+
+    def write(self, path, root):
+        out = bytearray(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(self.objects[1:], start=1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % len(self.objects)
+        out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(self.objects), root, xref)
+        with open(path, "wb") as f:
+            f.write(out)
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _outline_tree(total_pages, depth):
+    """Nested (title, page_index, children) bookmarks: chapters, sections, subsections"""
+    def children(prefix, first, stop, level):
+        if level > depth or stop - first < 2:
+            return []
+        count = 3 if level > 1 else max(1, (stop - first) // PAGES_PER_CHAPTER)
+        step = max(1, (stop - first) // count)
+        nodes = []
+        for i, start in enumerate(range(first, stop, step)[:count]):
+            number = f"{prefix}{i + 1}"
+            title = f"Chapter {number}" if level == 1 else f"{number} Topic {number}"
+            end = min(stop, start + step)
+            inner_first = start + 1 if level == 1 else start
+            nodes.append((title, start, children(f"{number}.", inner_first, end, level + 1)))
+        return nodes
+
+    return children("", 0, total_pages, 1)
+
+
+def _write_outline(pdf, nodes, parent, page_refs):
+    """Add outline items for nodes under parent; returns (first, last, total count)"""
+    numbers = [pdf.reserve() for _ in nodes]
+    total = len(nodes)
+    for i, (title, page_index, kids) in enumerate(nodes):
+        entries = [f"/Title ({_escape(title)})", f"/Parent {parent} 0 R",
+                   f"/Dest [{page_refs[page_index]} 0 R /Fit]"]
+        if i > 0:
+            entries.append(f"/Prev {numbers[i - 1]} 0 R")
+        if i + 1 < len(nodes):
+            entries.append(f"/Next {numbers[i + 1]} 0 R")
+        if kids:
+            first, last, count = _write_outline(pdf, kids, numbers[i], page_refs)
+            entries.append(f"/First {first} 0 R /Last {last} 0 R /Count -{count}")
+            total += count
+        pdf.objects[numbers[i]] = f"<< {' '.join(entries)} >>".encode()
+    return numbers[0], numbers[-1], total
+
+
+def build_synthetic_pdf(path, total_pages, seed=CORPUS_SEED):
+    """
+    Write a deterministic test PDF
+
+    Every page has a few dozen lines of text (headings where the outline
+    points), an image, the shared embedded font and a standard font. The
+    images are separate objects that repeat DISTINCT_IMAGES pixel blocks,
+    like a logo copied onto each page. Pages sit in a nested page tree.
+
+    Args:
+        path: Where to write the file
+        total_pages: Number of pages
+        seed: Random seed for text and image bytes
+    """
+    rng = random.Random(seed)
+    pdf = _RawPdf()
+    catalog = pdf.reserve()
+
+    font_file = pdf.add_stream(f"/Length1 {FONT_KB * 1024}", rng.randbytes(FONT_KB * 1024))
+    descriptor = pdf.add(f"<< /Type /FontDescriptor /FontName /BenchSerif /Flags 32 /FontBBox [0 0 1000 1000] "
+                         f"/ItalicAngle 0 /Ascent 800 /Descent -200 /CapHeight 700 /StemV 80 "
+                         f"/FontFile2 {font_file} 0 R >>".encode())
+    embedded_font = pdf.add(f"<< /Type /Font /Subtype /TrueType /BaseFont /BenchSerif /FirstChar 32 "
+                            f"/LastChar 32 /Widths [250] /FontDescriptor {descriptor} 0 R >>".encode())
+    text_font = pdf.add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pixels = [rng.randbytes(IMAGE_KB * 1024) for _ in range(DISTINCT_IMAGES)]
+
+    # Page objects are numbered up front so bookmarks can point at them
+    page_refs = [pdf.reserve() for _ in range(total_pages)]
+    outline = _outline_tree(total_pages, OUTLINE_DEPTH)
+    headings = {}
+    stack = list(outline)
+    while stack:
+        title, page_index, kids = stack.pop()
+        headings.setdefault(page_index, title)
+        stack.extend(kids)
+
+    # Page tree: /Pages nodes of PAGE_TREE_FANOUT kids, level by level up to one root
+    counts = dict.fromkeys(page_refs, 1)
+    parent_of = {}
+    nodes = []
+    level = page_refs
+    while len(level) > 1 or not nodes:
+        parents = []
+        for i in range(0, len(level), PAGE_TREE_FANOUT):
+            kids = level[i:i + PAGE_TREE_FANOUT]
+            number = pdf.reserve()
+            counts[number] = sum(counts[kid] for kid in kids)
+            parent_of.update(dict.fromkeys(kids, number))
+            nodes.append((number, kids))
+            parents.append(number)
+        level = parents
+    root_pages = level[0]
+    for number, kids in nodes:
+        entries = f"/Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {counts[number]}"
+        if number in parent_of:
+            entries += f" /Parent {parent_of[number]} 0 R"
+        pdf.objects[number] = f"<< {entries} >>".encode()
+
+    for index, page_ref in enumerate(page_refs):
+        image = pdf.add_stream(f"/Type /XObject /Subtype /Image /Width 128 /Height {IMAGE_KB * 8} "
+                               f"/ColorSpace /DeviceGray /BitsPerComponent 8", pixels[index % DISTINCT_IMAGES])
+        lines = [headings.get(index, "")] + [
+            " ".join(rng.choice(WORDS) for _ in range(10)) for _ in range(LINES_PER_PAGE)
+        ]
+        text = "".join(f"({_escape(line)}) Tj 0 -24 Td " for line in lines if line)
+        content = (f"BT /F1 12 Tf 72 740 Td {text}ET q 128 0 0 {IMAGE_KB * 8} 72 40 cm /Im1 Do Q "
+                   f"BT /F2 1 Tf 0 0 Td ( ) Tj ET").encode()
+        contents = pdf.add_stream("", content)
+        pdf.objects[page_ref] = (
+            f"<< /Type /Page /Parent {parent_of[page_ref]} 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {text_font} 0 R /F2 {embedded_font} 0 R >> "
+            f"/XObject << /Im1 {image} 0 R >> >> /Contents {contents} 0 R >>"
+        ).encode()
+
+    outlines = pdf.reserve()
+    first, last, count = _write_outline(pdf, outline, outlines, page_refs)
+    pdf.objects[outlines] = f"<< /Type /Outlines /First {first} 0 R /Last {last} 0 R /Count {count} >>".encode()
+    pdf.objects[catalog] = f"<< /Type /Catalog /Pages {root_pages} 0 R /Outlines {outlines} 0 R >>".encode()
+    pdf.write(path, catalog)
+
+
+class _StubOllama(BaseHTTPRequestHandler):
+    """Answers /api/generate instantly with a fixed analysis"""
+
+    ANSWER = json.dumps({
+        "document_type": "benchmark",
+        "structure": "synthetic chapters",
+        "suggestions": [{"name": "Halves", "description": "stub", "page_ranges": "1-1", "sections": []}]
+    })
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"response": self.ANSWER, "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_stub_provider():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _peak_rss_mb():
+    """High-water resident memory of this process in MB, or None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _prepare_stage(stage, pdf_path, total_pages, workdir):
+    """
+    Set up one stage; returns (run, pages) where run() does the timed work
+    and returns the bytes it produced. pages is the number of pages one run
+    processes, or a function giving it after the runs (for stages that only
+    read a sample of the document)
+    """
+    parts = [(f"part_{first + 1}.pdf", list(range(first + 1, min(first + PART_PAGES, total_pages) + 1)))
+             for first in range(0, total_pages, PART_PAGES)]
+
+    if stage == "extract":
+        import app
+        selected = list(range(1, total_pages + 1, 2))
+        output_path = os.path.join(workdir, "extracted.pdf")
+
+        def run():
+            success, message, _ = app.extract_pdf_pages(pdf_path, output_path, selected)
+            if not success:
+                raise RuntimeError(message)
+            return os.path.getsize(output_path)
+        return run, len(selected)
+
+    if stage == "split":
+        from PyPDF2 import PdfReader
+        from resource_dedup import new_report
+        from split_engine import iter_split_parts
+
+        def run():
+            report = new_report()
+            return sum(len(data) for _, data in iter_split_parts(pdf_path, parts, pdf_reader=PdfReader(pdf_path),
+                                                                 report=report))
+        return run, total_pages
+
+    if stage == "zip":
+        from PyPDF2 import PdfReader
+        from split_engine import iter_split_parts
+        from zip_stream import stream_zip
+        split = list(iter_split_parts(pdf_path, parts, pdf_reader=PdfReader(pdf_path)))
+
+        def run():
+            return sum(len(chunk) for chunk in stream_zip(split))
+        return run, total_pages
+
+    if stage == "split_multiple":
+        import app
+        with open(pdf_path, "rb") as f:
+            document_id = app.document_store.put(f, os.path.basename(pdf_path))
+        sections = json.dumps([{"name": name, "pages": f"{pages[0]}-{pages[-1]}"} for name, pages in parts])
+        client = app.app.test_client()
+
+        def run():
+            response = client.post("/split-multiple", data={"document_id": document_id, "sections": sections})
+            if response.status_code != 200:
+                raise RuntimeError(f"/split-multiple answered {response.status_code}")
+            return len(response.get_data())
+        return run, total_pages
+
+    if stage in ("text", "analyze"):
+        server = _start_stub_provider()
+        os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{server.server_port}"
+        from ai_analyzer import PDFAnalyzer
+        analyzer = PDFAnalyzer(provider="ollama")  # no caches: every run extracts again
+        sampled = []
+
+        # Throughput is per page actually extracted (the sample), not per document page
+        def run():
+            pdf_data = analyzer.extract_text_from_pdf(pdf_path)
+            sampled.append(pdf_data["analyzed_pages"])
+            if stage == "analyze":
+                result = analyzer.analyze_with_ai(pdf_data, use_cache=False)
+                if "error" in result:
+                    raise RuntimeError(result["error"])
+            return sum(len(page["text"]) for page in pdf_data["page_contents"])
+        return run, lambda: statistics.median(sampled)
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def run_stage(stage, pdf_path, total_pages, repeat, workdir):
+    """
+    Time one stage on one file (runs in its own process)
+
+    Returns:
+        dict with the stage's timings, throughput and peak RSS
+    """
+    # Keep the app's caches and stored documents inside the benchmark folder
+    os.environ["TEXT_CACHE_PATH"] = os.path.join(workdir, "text_cache.sqlite3")
+    os.environ["DOCUMENT_STORE_FOLDER"] = os.path.join(workdir, "documents")
+
+    run, pages = _prepare_stage(stage, pdf_path, total_pages, workdir)
+    baseline_rss = _peak_rss_mb()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output_bytes = run()
+        timings.append(time.perf_counter() - start)
+    if callable(pages):
+        pages = pages()
+
+    seconds = statistics.median(timings)
+    input_mb = os.path.getsize(pdf_path) / (1024 * 1024)
+    return {
+        "stage": stage,
+        "pages": pages,
+        "input_mb": round(input_mb, 2),
+        "output_mb": round(output_bytes / (1024 * 1024), 3),
+        "runs": repeat,
+        "seconds_median": round(seconds, 4),
+        "seconds_min": round(min(timings), 4),
+        "pages_per_second": round(pages / seconds, 1) if seconds else None,
+        "mb_per_second": round(input_mb / seconds, 2) if seconds else None,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": _peak_rss_mb()
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(sizes, stages, repeat=3, corpus_dir=None):
+    """
+    Generate the corpus and time every stage on every size
+
+    Args:
+        sizes: Names from CORPUS_SIZES (or "name=pages" for a custom size)
+        stages: Names from STAGES
+        repeat: Timed runs per stage; the median is reported
+        corpus_dir: Folder to keep generated PDFs in (reused when present);
+                    a temporary folder by default
+
+    Returns:
+        dict ready to be written as JSON
+    """
+    workdir = tempfile.mkdtemp(prefix="pdf_splitter_bench_")
+    corpus_dir = corpus_dir or workdir
+    os.makedirs(corpus_dir, exist_ok=True)
+    results = []
+
+    try:
+        for size in sizes:
+            name, _, count = size.partition("=")
+            total_pages = int(count) if count else CORPUS_SIZES[name]
+            pdf_path = os.path.join(corpus_dir, f"bench_{total_pages}_v{BENCHMARK_VERSION}.pdf")
+            if not os.path.exists(pdf_path):
+                build_synthetic_pdf(pdf_path, total_pages)
+
+            for stage in stages:
+                # A fresh interpreter per stage keeps peak RSS figures independent
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    result = pool.submit(run_stage, stage, pdf_path, total_pages, repeat, workdir).result()
+                result["size"] = name
+                results.append(result)
+                print(f"{name:>8} {stage:<15} {result['seconds_median']:>9.3f}s "
+                      f"{result['pages_per_second']:>10} pages/s {result['mb_per_second']:>8} MB/s "
+                      f"peak {result['peak_rss_mb']} MB", file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "benchmark_version": BENCHMARK_VERSION,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "results": results
+    }
+
+
+def compare(current, baseline):
+    """
+    Speed of each stage relative to a baseline run (>1 means faster now)
+
+    Returns:
+        List of {"size", "stage", "speedup", "peak_rss_change_mb"} dicts
+    """
+    if baseline.get("benchmark_version") != current.get("benchmark_version"):
+        raise ValueError("Baseline was produced by a different benchmark version")
+
+    before = {(r["size"], r["stage"]): r for r in baseline["results"]}
+    changes = []
+    for result in current["results"]:
+        old = before.get((result["size"], result["stage"]))
+        if not old:
+            continue
+        rss_change = None
+        if old["peak_rss_mb"] is not None and result["peak_rss_mb"] is not None:
+            rss_change = round(result["peak_rss_mb"] - old["peak_rss_mb"], 1)
+        changes.append({
+            "size": result["size"],
+            "stage": result["stage"],
+            "speedup": round(old["seconds_median"] / result["seconds_median"], 2),
+            "peak_rss_change_mb": rss_change
+        })
+    return changes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction, splitting, ZIP packaging and text extraction")
+    parser.add_argument("--sizes", default=",".join(CORPUS_SIZES),
+                        help=f"Comma-separated corpus sizes: {', '.join(f'{k} ({v} pages)' for k, v in CORPUS_SIZES.items())}, "
+                             f"or name=pages")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated stages: {', '.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (median is reported)")
+    parser.add_argument("--corpus-dir", help="Keep generated PDFs here and reuse them on later runs")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    report = run_benchmarks([size.strip() for size in args.sizes.split(",") if size.strip()], stages,
+                            repeat=args.repeat, corpus_dir=args.corpus_dir)
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
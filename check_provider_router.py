@@ -0,0 +1,183 @@
+"""
+Provider Router Check
+
+Exercises provider_router.ProviderRouter against local stub providers
+(small HTTP servers speaking the Ollama /api/generate API), so failover,
+hedging, cancellation and the circuit breaker can be re-checked after a
+change without any network or API key:
+
+- failover:   a provider answering HTTP 500 is skipped for the next one
+- hedging:    a provider slower than its p95 is hedged; the faster answer
+              wins and the slow call is cancelled (its provider slot is
+              free again long before the stub would have answered)
+- cold start: a provider without latency history is never hedged
+- budget:     a call running past its latency budget is cancelled and
+              counted as a failure
+- circuit:    repeated failures open the circuit, the provider is skipped,
+              and after the cool-down one trial request closes it again
+
+Usage:
+    python check_provider_router.py        # exit code 0 when every check passes
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import sys
+import threading
+import time
+
+import ai_analyzer
+import provider_router
+from ai_analyzer import PDFAnalyzer
+from provider_router import ProviderRouter, get_health
+
+
+ANSWER = json.dumps({
+    "document_type": "check",
+    "structure": "stub",
+    "suggestions": [{"name": "All", "description": "stub", "page_ranges": "1-1", "sections": []}]
+})
+
+PDF_DATA = {"total_pages": 1, "page_contents": [{"page_number": 1, "text": "Chapter 1"}]}
+
+
+def _start_stub(delay=0.0, status=200):
+    """Start a stub provider; returns (server, url). Its behaviour can be changed via server.delay/status"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            server.calls += 1
+            time.sleep(server.delay)
+            body = json.dumps({"response": ANSWER, "done": True}).encode()
+            try:
+                self.send_response(server.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except OSError:
+                pass  # the router cancelled the call and closed the connection
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.delay, server.status, server.calls = delay, status, 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class StubAnalyzer(PDFAnalyzer):
+    """A PDFAnalyzer with its own provider name that talks to a stub server"""
+
+    def __init__(self, name, url):
+        super().__init__(provider="ollama", max_concurrency=1)
+        self.provider = name
+        self.ollama_url = url
+
+    def _missing_client_error(self):
+        return None
+
+    async def _call_provider(self, prompt, timeout=None):
+        return await self._call_ollama(prompt, timeout)
+
+
+def _slot_free(name, wait=1.0):
+    """Whether the provider's call slot on the shared loop is released within `wait` seconds"""
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        slots = ai_analyzer._provider_slots.get(ai_analyzer._get_shared_loop(), {})
+        if name not in slots or not slots[name].locked():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _route(analyzers, **options):
+    started = time.monotonic()
+    result = ProviderRouter(analyzers, **options).analyze_with_ai(PDF_DATA, use_cache=False)
+    return result, time.monotonic() - started
+
+
+def check_failover():
+    _, failing_url = _start_stub(status=500)
+    _, good_url = _start_stub()
+    result, _ = _route([StubAnalyzer("failover-a", failing_url), StubAnalyzer("failover-b", good_url)], hedge=False)
+    assert result.get("provider") == "failover-b", result
+    assert get_health("failover-a").failures == 1
+
+
+def check_hedging():
+    slow, slow_url = _start_stub(delay=5)
+    _, fast_url = _start_stub()
+    for _ in range(5):  # a known p95 of 50 ms, so the hedge goes out right away
+        get_health("hedge-a").record_success(0.05)
+
+    result, seconds = _route([StubAnalyzer("hedge-a", slow_url), StubAnalyzer("hedge-b", fast_url)], hedge=True)
+    assert result.get("provider") == "hedge-b", result
+    assert seconds < 2, f"hedged answer took {seconds:.1f}s"
+    assert slow.calls == 1
+    assert _slot_free("hedge-a"), "the losing call still holds its provider slot"
+    assert get_health("hedge-a").failures == 0, "a cancelled call counted as a failure"
+
+
+def check_cold_start():
+    _, slow_url = _start_stub(delay=1)
+    spare, spare_url = _start_stub()
+    result, _ = _route([StubAnalyzer("cold-a", slow_url), StubAnalyzer("cold-b", spare_url)],
+                       latency_budgets={"cold-a": 5}, hedge=True)
+    assert result.get("provider") == "cold-a", result
+    assert spare.calls == 0, "a provider without a p95 was hedged"
+
+
+def check_budget():
+    _, slow_url = _start_stub(delay=5)
+    _, good_url = _start_stub()
+    result, seconds = _route([StubAnalyzer("budget-a", slow_url), StubAnalyzer("budget-b", good_url)],
+                             latency_budgets={"budget-a": 0.5}, hedge=False)
+    assert result.get("provider") == "budget-b", result
+    assert seconds < 2, f"failover after the budget took {seconds:.1f}s"
+    assert _slot_free("budget-a"), "the call past its budget still holds its provider slot"
+    assert get_health("budget-a").failures == 1
+
+
+def check_circuit():
+    flaky, flaky_url = _start_stub(status=500)
+    _, good_url = _start_stub()
+    analyzers = [StubAnalyzer("circuit-a", flaky_url), StubAnalyzer("circuit-b", good_url)]
+    health = get_health("circuit-a")
+    health.reset_timeout = 0.3
+
+    for _ in range(provider_router.FAILURE_THRESHOLD):
+        _route(analyzers, hedge=False)
+    assert health.state == "open", health.snapshot()
+
+    _route(analyzers, hedge=False)
+    assert flaky.calls == provider_router.FAILURE_THRESHOLD, "an open circuit still sent requests"
+
+    time.sleep(0.4)
+    flaky.status = 200
+    result, _ = _route(analyzers, hedge=False)
+    assert result.get("provider") == "circuit-a", result
+    assert health.state == "closed", health.snapshot()
+
+
+CHECKS = [check_failover, check_hedging, check_cold_start, check_budget, check_circuit]
+
+
+def main():
+    failed = 0
+    for check in CHECKS:
+        name = check.__name__.removeprefix("check_")
+        try:
+            check()
+            print(f"ok      {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAILED  {name}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Map-Reduce Analysis Helpers
+
+A single prompt only has room for a sample of a long document's pages.
+For large PDFs, PDFAnalyzer.analyze_chunked() splits the document into
+page windows, asks the provider where sections begin inside each window
+(all windows concurrently), and merges the answers here into one set of
+suggestions that covers every page.
+
+This module holds the provider-independent parts: planning the windows,
+the per-window prompt, parsing a window's answer and the merge.
+"""
+
+from collections import Counter
+import json
+
+
+MIN_WINDOW_PAGES = 50          # windows are never smaller than this
+FALLBACK_PAGES_PER_PART = 25   # part size when no section starts were found at all
+
+
+def plan_windows(total_pages, concurrency, window_pages=None):
+    """
+    Split a document into consecutive page windows
+
+    Args:
+        total_pages: Page count of the document
+        concurrency: Provider calls that may run at once
+        window_pages: Pages per window; by default chosen so there is about
+                      one window per concurrent call (one round of calls)
+
+    Returns:
+        List of (first, stop) 0-based page index pairs, stop exclusive
+    """
+    if window_pages is None:
+        window_pages = max(MIN_WINDOW_PAGES, -(-total_pages // max(1, concurrency)))
+    return [(first, min(first + window_pages, total_pages)) for first in range(0, total_pages, window_pages)]
+
+
+def build_window_prompt(pdf_data, window, user_question=None):
+    """Prompt asking where sections begin inside one window"""
+    first, stop = window
+    page_summaries = []
+    for page in pdf_data["page_contents"]:
+        preview = page["text"] or "[blank page]"
+        page_summaries.append(f"Page {page['page_number']}: {preview}")
+
+    prompt = f"""I am splitting a PDF document with {pdf_data['total_pages']} total pages into logical sections. This request covers pages {first + 1}-{stop} only.
+
+Here are the opening lines of {len(page_summaries)} pages sampled from that range:
+
+{chr(10).join(page_summaries)}
+
+"""
+
+    if user_question:
+        prompt += f"\nUser's specific question: {user_question}\n"
+
+    prompt += f"""
+List every page between {first + 1} and {stop} where a new chapter or major section begins. Use level 1 for chapters or parts and level 2 for sections inside them.
+
+Format your response as JSON:
+{{
+  "document_type": "type here",
+  "sections": [
+    {{"name": "Section title", "start_page": {first + 1}, "level": 1}}
+  ]
+}}
+"""
+    return prompt
+
+
+def parse_window_response(ai_response, window):
+    """
+    Read the section starts out of one window's answer
+
+    Returns:
+        dict with document_type and sections ([{"name", "start_page", "level"}]
+        limited to the window's pages), or an error dict
+    """
+    first, stop = window
+    try:
+        start = ai_response.find('{')
+        end = ai_response.rfind('}') + 1
+        data = json.loads(ai_response[start:end]) if start >= 0 and end > start else None
+    except ValueError:
+        data = None
+
+    if not isinstance(data, dict):
+        return {"error": "Could not parse the answer for this window", "raw_response": ai_response}
+
+    sections = []
+    for section in data.get("sections") or []:
+        try:
+            page = int(section.get("start_page"))
+            level = int(section.get("level") or 1)
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if first < page <= stop:
+            name = str(section.get("name") or "").strip() or f"Section at page {page}"
+            sections.append({"name": name, "start_page": page, "level": 1 if level <= 1 else 2})
+
+    return {"document_type": str(data.get("document_type") or ""), "sections": sections}
+
+
+def _sections_from_starts(starts, total_pages):
+    """Turn sorted (page, name) starts into sections covering pages 1..total_pages"""
+    sections = []
+    for i, (page, name) in enumerate(starts):
+        end = starts[i + 1][0] - 1 if i + 1 < len(starts) else total_pages
+        sections.append({"name": name, "pages": f"{page}-{end}" if end > page else f"{page}"})
+    return sections
+
+
+def _suggestion(name, description, sections):
+    return {
+        "name": name,
+        "description": description,
+        "page_ranges": ",".join(section["pages"] for section in sections),
+        "sections": sections
+    }
+
+
+def merge_windows(window_results, windows, total_pages):
+    """
+    Merge per-window section starts into whole-document suggestions
+
+    A window that failed or found nothing simply continues the section
+    that was open before it, so every page is always covered.
+
+    Args:
+        window_results: Results of parse_window_response, one per window
+        windows: The (first, stop) windows they belong to
+        total_pages: Page count of the document
+
+    Returns:
+        dict in the same shape as PDFAnalyzer._parse_ai_response
+    """
+    starts = {}  # page -> (level, name); the coarser level wins
+    document_types = Counter()
+    failed = []
+
+    for window, result in zip(windows, window_results):
+        if "error" in result:
+            failed.append(f"{window[0] + 1}-{window[1]}")
+            continue
+        if result["document_type"]:
+            document_types[result["document_type"]] += 1
+        for section in result["sections"]:
+            page = section["start_page"]
+            if page not in starts or section["level"] < starts[page][0]:
+                starts[page] = (section["level"], section["name"])
+
+    if len(failed) == len(windows):
+        return {"error": "AI analysis failed for every part of the document", "suggestions": []}
+
+    if 1 not in starts:
+        starts[1] = (1, "Opening pages")
+
+    all_starts = sorted((page, name) for page, (_, name) in starts.items())
+    chapter_starts = sorted((page, name) for page, (level, name) in starts.items() if level == 1)
+
+    suggestions = []
+    if len(chapter_starts) >= 2:
+        sections = _sections_from_starts(chapter_starts, total_pages)
+        suggestions.append(_suggestion(
+            "Split by chapters (whole document)",
+            f"{len(sections)} chapters or parts found across all {total_pages} pages.",
+            sections
+        ))
+    if len(all_starts) > max(len(chapter_starts), 1):
+        sections = _sections_from_starts(all_starts, total_pages)
+        suggestions.append(_suggestion(
+            "Split by all detected sections",
+            f"Finer split at every section start found ({len(sections)} sections).",
+            sections
+        ))
+    if not suggestions:
+        size = FALLBACK_PAGES_PER_PART
+        sections = _sections_from_starts(
+            [(page, f"Pages {page}-{min(page + size - 1, total_pages)}") for page in range(1, total_pages + 1, size)],
+            total_pages
+        )
+        suggestions.append(_suggestion(
+            f"Split into {size}-page parts",
+            "No section starts were found, so the document is split into equal parts.",
+            sections
+        ))
+
+    structure = f"{len(all_starts)} section start(s) found across {len(windows)} windows"
+    if failed:
+        structure += f"; pages {', '.join(failed)} could not be analyzed"
+
+    return {
+        "document_type": document_types.most_common(1)[0][0] if document_types else "Unknown",
+        "structure": structure,
+        "suggestions": suggestions,
+        "analysis_source": "chunked",
+        "windows": len(windows),
+        "failed_windows": failed
+    }
@@ -0,0 +1,469 @@
+"""
+Chunked, Resumable Uploads
+
+Large PDFs can be uploaded in numbered chunks instead of one multipart
+POST, so a dropped connection only costs the chunk in flight:
+
+1. create() an upload with the file's size (and optionally its SHA-256;
+   if that document is already stored, nothing needs to be sent),
+2. write_chunk() each chunk, in any order and as often as needed:
+   every chunk is hashed as it arrives, and a chunk that was already
+   received is skipped,
+3. status() lists the chunks still missing, to resume after a failure,
+4. finalize() moves the assembled file into the DocumentStore, where
+   every processing route reads it by document ID.
+
+The whole-file SHA-256 (the document ID) and the PDF sniffing of
+pdf_sniffer.py are computed while chunks are written: each chunk that
+continues the file in order is fed to a PdfSniffer as it arrives, and
+chunks that arrived early are read back as soon as the gap before them
+is filled. finalize() then only reads what this process has not seen
+yet, which is nothing when the client sends chunks in order.
+
+Chunks are written at their offset into one file inside the document
+store's folder, so finalizing is a rename, not a copy. A marker file per
+received chunk records its hash; together with the upload's manifest
+this is all the persistent state, so any worker process can serve any
+chunk (the in-order hashing state is only an in-memory shortcut).
+Uploads untouched for longer than the TTL are garbage collected.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+from pdf_sniffer import PdfSniffer
+
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024    # bytes per chunk unless the client asks otherwise
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+READ_SIZE = 1024 * 1024                 # request body read blocks
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadError(Exception):
+    """A request that cannot be applied to an upload, with the HTTP status to answer"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _Progress:
+    """Whole-file hashing state of one upload: chunks before next_index are fed"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start over from the first chunk (called with lock held)"""
+        self.next_index = 0
+        self.sniffer = PdfSniffer()
+
+
+class ChunkedUploadStore:
+    """Resumable uploads that finish as documents in a DocumentStore"""
+
+    def __init__(self, document_store, ttl_seconds=24 * 3600, max_bytes=2 * 1024 * 1024 * 1024,
+                 default_chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Initialize the upload store
+
+        Args:
+            document_store: DocumentStore that finished uploads are moved into
+            ttl_seconds: Uploads without a new chunk for this long are removed
+            max_bytes: Largest file that may be uploaded
+            default_chunk_size: Chunk size when the client does not pick one
+        """
+        self.document_store = document_store
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.default_chunk_size = default_chunk_size
+        # Inside the document store's folder: same filesystem, so finalize can rename
+        self.root = os.path.join(document_store.root, "uploads")
+        self._lock = threading.Lock()
+        self._progress = {}  # upload_id -> _Progress, for uploads written by this process
+
+        os.makedirs(self.root, exist_ok=True)
+
+    def create(self, filename, size, chunk_size=None, sha256=None):
+        """
+        Start an upload
+
+        Args:
+            filename: Original filename, kept for download names
+            size: Total file size in bytes
+            chunk_size: Bytes per chunk (every chunk but the last is this size)
+            sha256: Optional hex SHA-256 of the whole file; verified on
+                    finalize, and used to skip the upload entirely when the
+                    document is already stored
+
+        Returns:
+            Upload status dict (see status())
+
+        Raises:
+            UploadError: if the size or chunk size is not acceptable
+        """
+        self.collect_garbage()
+
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError("size must be a positive number of bytes")
+        if size > self.max_bytes:
+            raise UploadError(f"File too large (limit {self.max_bytes // (1024 * 1024)} MB)", 413)
+
+        chunk_size = chunk_size or self.default_chunk_size
+        if not isinstance(chunk_size, int) or not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise UploadError(f"chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes")
+
+        sha256 = (sha256 or "").lower() or None
+        if sha256 and not SHA256_PATTERN.match(sha256):
+            raise UploadError("sha256 must be a hex SHA-256 digest")
+
+        upload_id = uuid.uuid4().hex
+        manifest = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "size": size,
+            "chunk_size": chunk_size,
+            "total_chunks": -(-size // chunk_size),
+            "sha256": sha256,
+            "document_id": None,
+            "created_at": time.time()
+        }
+
+        # The same content is already stored: nothing to send
+        if sha256 and self.document_store.get_path(sha256):
+            manifest["document_id"] = sha256
+            os.makedirs(self._dir(upload_id))
+            self._write_manifest(manifest)
+            return self.status(upload_id)
+
+        os.makedirs(self._dir(upload_id))
+        with open(self._data_path(upload_id), "wb") as data_file:
+            data_file.truncate(size)  # sparse; chunks are written at their offsets
+        self._write_manifest(manifest)
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        """
+        Progress of an upload
+
+        Returns:
+            dict with upload_id, filename, size, chunk_size, total_chunks,
+            received_chunks, missing_chunks, bytes_received, complete and
+            document_id (set once finalized), or None if unknown
+        """
+        manifest = self._read_manifest(upload_id)
+        if manifest is None:
+            return None
+
+        total = manifest["total_chunks"]
+        finished = manifest["document_id"] is not None
+        received = list(range(total)) if finished else sorted(self._received(upload_id))
+        received_set = set(received)
+        return {
+            "upload_id": upload_id,
+            "filename": manifest["filename"],
+            "size": manifest["size"],
+            "chunk_size": manifest["chunk_size"],
+            "total_chunks": total,
+            "received_chunks": len(received),
+            "missing_chunks": [index for index in range(total) if index not in received_set],
+            "bytes_received": sum(self._chunk_length(manifest, index) for index in received),
+            "complete": finished,
+            "document_id": manifest["document_id"]
+        }
+
+    def write_chunk(self, upload_id, index, stream, sha256=None):
+        """
+        Store one chunk, hashing it while it is written
+
+        Args:
+            upload_id: ID returned by create()
+            index: 0-based chunk number
+            stream: Readable binary stream with exactly the chunk's bytes
+            sha256: Optional hex SHA-256 the client computed for the chunk;
+                    when it matches an already received chunk, the body is
+                    not even read
+
+        Returns:
+            dict with index, sha256, duplicate (True when the chunk had
+            already been received) and received_chunks/total_chunks
+
+        Raises:
+            UploadError: unknown upload, bad index or length, hash mismatch,
+                         or different content for a chunk already received
+        """
+        manifest = self._require_open(upload_id)
+        if not isinstance(index, int) or not 0 <= index < manifest["total_chunks"]:
+            raise UploadError(f"Chunk index must be between 0 and {manifest['total_chunks'] - 1}")
+
+        expected_length = self._chunk_length(manifest, index)
+        sha256 = (sha256 or "").lower() or None
+        existing = self._read_marker(upload_id, index)
+
+        if existing and sha256 == existing:
+            return self._chunk_result(upload_id, manifest, index, existing, duplicate=True)
+
+        digest = hashlib.sha256()
+        length = 0
+        if existing:
+            # Re-sent without a hash: compare it, but never overwrite received data
+            while True:
+                block = stream.read(READ_SIZE)
+                if not block:
+                    break
+                digest.update(block)
+                length += len(block)
+
+            self._check_chunk(index, length, expected_length, digest.hexdigest(), sha256)
+            if existing != digest.hexdigest():
+                raise UploadError(f"Chunk {index} was already received with different content", 409)
+            return self._chunk_result(upload_id, manifest, index, existing, duplicate=True)
+
+        # The chunk that continues the file in order is fed to the whole-file hash as it is written
+        progress = self._claim_progress(upload_id, index)
+        try:
+            with open(self._data_path(upload_id), "r+b") as data_file:
+                data_file.seek(index * manifest["chunk_size"])
+                while length < expected_length:
+                    block = stream.read(min(READ_SIZE, expected_length - length))
+                    if not block:
+                        break
+                    digest.update(block)
+                    if progress:
+                        progress.sniffer.update(block)
+                    data_file.write(block)
+                    length += len(block)
+            # Never write past the chunk's own range; extra bytes make it invalid
+            if length == expected_length and stream.read(1):
+                length += 1
+
+            chunk_hash = digest.hexdigest()
+            self._check_chunk(index, length, expected_length, chunk_hash, sha256)
+            self._write_marker(upload_id, index, chunk_hash)
+        except BaseException:
+            if progress:
+                # It has been fed bytes that were not accepted
+                progress.reset()
+                progress.lock.release()
+            raise
+
+        if progress:
+            progress.next_index += 1
+            try:
+                self._catch_up(upload_id, manifest, progress)
+            finally:
+                progress.lock.release()
+        else:
+            self._catch_up_if_idle(upload_id, manifest)
+
+        return self._chunk_result(upload_id, manifest, index, chunk_hash, duplicate=False)
+
+    def finalize(self, upload_id):
+        """
+        Move the complete file into the document store under its SHA-256
+
+        Finalizing an upload twice returns the same document ID, so a
+        client whose finalize response was lost can simply retry.
+
+        Returns:
+            dict with document_id, filename and size
+
+        Raises:
+            UploadError: unknown upload, chunks missing, or the file does not
+                         match the SHA-256 given at create()
+        """
+        if self._read_manifest(upload_id) is None:
+            raise UploadError("Unknown or expired upload", 404)
+        with self._lock:
+            progress = self._progress.setdefault(upload_id, _Progress())
+
+        # One finalize at a time per upload; in-flight chunks finish feeding first
+        with progress.lock:
+            manifest = self._read_manifest(upload_id)
+            if manifest is None:
+                raise UploadError("Unknown or expired upload", 404)
+
+            if manifest["document_id"] is None:
+                missing = [index for index in range(manifest["total_chunks"])
+                           if index not in self._received(upload_id)]
+                if missing:
+                    raise UploadError(f"{len(missing)} chunk(s) missing, first: {missing[0]}", 409)
+
+                # Only the part this process has not hashed yet is read back
+                self._catch_up(upload_id, manifest, progress)
+                document_id = progress.sniffer.hexdigest()
+
+                if manifest["sha256"] and manifest["sha256"] != document_id:
+                    with self._lock:
+                        self._remove(upload_id)
+                    raise UploadError("The uploaded file does not match its SHA-256; upload it again", 422)
+
+                self.document_store.adopt(self._data_path(upload_id), document_id, manifest["filename"],
+                                          progress.sniffer.result())
+                for name in os.listdir(self._dir(upload_id)):
+                    if name.endswith(".sha256"):
+                        os.remove(os.path.join(self._dir(upload_id), name))
+                manifest["document_id"] = document_id
+                self._write_manifest(manifest)
+
+        with self._lock:
+            self._progress.pop(upload_id, None)
+        return {"document_id": manifest["document_id"], "filename": manifest["filename"], "size": manifest["size"]}
+
+    def abort(self, upload_id):
+        """Discard an upload and its chunks"""
+        if self._is_valid_id(upload_id):
+            with self._lock:
+                self._remove(upload_id)
+
+    def collect_garbage(self):
+        """
+        Remove uploads that have not received a chunk within the TTL
+
+        Returns:
+            Number of uploads removed
+        """
+        removed = 0
+        now = time.time()
+        for upload_id in os.listdir(self.root):
+            try:
+                last_activity = os.stat(self._dir(upload_id)).st_mtime
+            except OSError:
+                continue
+            if now - last_activity > self.ttl_seconds:
+                with self._lock:
+                    self._remove(upload_id)
+                removed += 1
+        return removed
+
+    def _claim_progress(self, upload_id, index):
+        """The upload's locked _Progress if chunk index is the next one to feed, else None"""
+        with self._lock:
+            progress = self._progress.setdefault(upload_id, _Progress())
+            if not progress.lock.acquire(blocking=False):
+                return None
+        if progress.next_index != index:
+            progress.lock.release()
+            return None
+        return progress
+
+    def _catch_up(self, upload_id, manifest, progress):
+        """Feed chunks that arrived ahead of their turn once the gap before them is filled"""
+        received = self._received(upload_id)
+        if progress.next_index not in received:
+            return
+        with open(self._data_path(upload_id), "rb") as data_file:
+            data_file.seek(progress.next_index * manifest["chunk_size"])
+            while progress.next_index in received:
+                remaining = self._chunk_length(manifest, progress.next_index)
+                while remaining:
+                    block = data_file.read(min(READ_SIZE, remaining))
+                    progress.sniffer.update(block)
+                    remaining -= len(block)
+                progress.next_index += 1
+
+    def _catch_up_if_idle(self, upload_id, manifest):
+        with self._lock:
+            progress = self._progress.get(upload_id)
+        if progress and progress.lock.acquire(blocking=False):
+            try:
+                self._catch_up(upload_id, manifest, progress)
+            finally:
+                progress.lock.release()
+
+    @staticmethod
+    def _check_chunk(index, length, expected_length, chunk_hash, sha256):
+        if length != expected_length:
+            raise UploadError(f"Chunk {index} must be {expected_length} bytes, received {length}")
+        if sha256 and sha256 != chunk_hash:
+            raise UploadError(f"Chunk {index} does not match its SHA-256; send it again", 422)
+
+    def _require_open(self, upload_id):
+        manifest = self._read_manifest(upload_id)
+        if manifest is None:
+            raise UploadError("Unknown or expired upload", 404)
+        if manifest["document_id"] is not None:
+            raise UploadError("Upload is already finalized", 409)
+        return manifest
+
+    def _chunk_result(self, upload_id, manifest, index, chunk_hash, duplicate):
+        # Any chunk counts as activity, so resumed uploads are not collected
+        os.utime(self._dir(upload_id))
+        return {
+            "index": index,
+            "sha256": chunk_hash,
+            "duplicate": duplicate,
+            "received_chunks": len(self._received(upload_id)),
+            "total_chunks": manifest["total_chunks"]
+        }
+
+    @staticmethod
+    def _chunk_length(manifest, index):
+        start = index * manifest["chunk_size"]
+        return min(manifest["chunk_size"], manifest["size"] - start)
+
+    @staticmethod
+    def _is_valid_id(upload_id):
+        return bool(upload_id) and bool(UPLOAD_ID_PATTERN.match(upload_id))
+
+    def _received(self, upload_id):
+        try:
+            names = os.listdir(self._dir(upload_id))
+        except OSError:
+            return set()
+        return {int(name[:-7]) for name in names if name.endswith(".sha256")}
+
+    def _read_marker(self, upload_id, index):
+        try:
+            with open(self._marker_path(upload_id, index)) as marker:
+                return marker.read().strip()
+        except OSError:
+            return None
+
+    def _write_marker(self, upload_id, index, chunk_hash):
+        # Written after the data, so a marker always means a complete chunk
+        temp_path = self._marker_path(upload_id, index) + ".tmp"
+        with open(temp_path, "w") as marker:
+            marker.write(chunk_hash)
+        os.replace(temp_path, self._marker_path(upload_id, index))
+
+    def _read_manifest(self, upload_id):
+        if not self._is_valid_id(upload_id):
+            return None
+        try:
+            with open(self._manifest_path(upload_id)) as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest):
+        path = self._manifest_path(manifest["upload_id"])
+        with open(path + ".tmp", "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(path + ".tmp", path)
+
+    def _remove(self, upload_id):
+        self._progress.pop(upload_id, None)
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def _dir(self, upload_id):
+        return os.path.join(self.root, upload_id)
+
+    def _data_path(self, upload_id):
+        return os.path.join(self._dir(upload_id), "data.part")
+
+    def _manifest_path(self, upload_id):
+        return os.path.join(self._dir(upload_id), "manifest.json")
+
+    def _marker_path(self, upload_id, index):
+        return os.path.join(self._dir(upload_id), f"{index:06d}.sha256")
@@ -0,0 +1,249 @@
+"""
+Upload-once Document Store
+
+Stores uploaded PDFs once under their SHA-256 content hash so that
+/analyze, /upload and /split-multiple can work from a document ID
+instead of receiving the same file again for every step.
+
+Stored documents are evicted when they have not been used for a while
+(TTL) and when the store grows past its size cap (least recently used
+first), so the temp directory stays bounded. Documents pinned by a
+queued or running job are never evicted until the job unpins them.
+
+Uploads are sniffed while they are written (see pdf_sniffer.py): the
+PDF version, page count and bookmark flag are kept with each document,
+so routes can use them without parsing the file again.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+from pdf_sniffer import PdfSniffer
+
+
+CHUNK_SIZE = 1024 * 1024  # 1MB read/write blocks
+DOCUMENT_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class DocumentStore:
+    """Content-addressed storage for uploaded PDFs with TTL and size-capped eviction"""
+
+    def __init__(self, root, ttl_seconds=3600, max_bytes=2 * 1024 * 1024 * 1024):
+        """
+        Initialize the document store
+
+        Args:
+            root: Directory where documents are kept (created if missing)
+            ttl_seconds: Documents unused for longer than this are evicted
+            max_bytes: Total size cap; least recently used documents go first
+        """
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pins = {}  # document ID -> number of holders
+
+        os.makedirs(self.root, exist_ok=True)
+
+    def put(self, stream, filename=None):
+        """
+        Store a PDF from a file-like object, hashing and sniffing it while it is written
+
+        Args:
+            stream: Readable binary stream (e.g. werkzeug FileStorage.stream)
+            filename: Original filename, kept for download names
+
+        Returns:
+            The document ID (hex SHA-256 of the content)
+        """
+        sniffer = PdfSniffer()
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sniffer.update(chunk)
+                    out.write(chunk)
+
+            return self.adopt(temp_path, sniffer.hexdigest(), filename, sniffer.result())
+
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def adopt(self, temp_path, document_id, filename=None, info=None):
+        """
+        Move an already-hashed file into the store under its document ID
+
+        If the same content is already stored, the temp file is discarded
+        and the existing copy is refreshed instead.
+
+        Args:
+            temp_path: Path to a complete file on the same filesystem
+            document_id: Hex SHA-256 of the file content
+            filename: Original filename, kept for download names
+            info: Optional PdfSniffer.result() for the file, see get_info()
+
+        Returns:
+            The document ID
+        """
+        pdf_path = self._pdf_path(document_id)
+
+        with self._lock:
+            if os.path.exists(pdf_path):
+                os.remove(temp_path)
+                os.utime(pdf_path)
+            else:
+                os.replace(temp_path, pdf_path)
+
+            info = info or self.get_info(document_id)
+            with open(self._meta_path(document_id), "w") as meta_file:
+                json.dump({"filename": filename or f"{document_id[:12]}.pdf", "info": info}, meta_file)
+
+        self.evict(keep=document_id)
+        return document_id
+
+    def get_path(self, document_id):
+        """
+        Look up the local path of a stored document and mark it as recently used
+
+        Args:
+            document_id: ID returned by put()
+
+        Returns:
+            Path to the stored PDF, or None if unknown or evicted
+        """
+        if not self.is_valid_id(document_id):
+            return None
+
+        pdf_path = self._pdf_path(document_id)
+        with self._lock:
+            if not os.path.exists(pdf_path):
+                return None
+            os.utime(pdf_path)
+        return pdf_path
+
+    def get_filename(self, document_id):
+        """Return the original filename recorded for a document"""
+        return self._read_meta(document_id).get("filename") or f"{document_id[:12]}.pdf"
+
+    def get_info(self, document_id):
+        """
+        What was sniffed from a document while it was stored
+
+        Returns:
+            dict with pdf_version, page_count, has_outline, linearized and
+            complete (see PdfSniffer.result()); empty for documents stored
+            without it. page_count and has_outline may be None.
+        """
+        return self._read_meta(document_id).get("info") or {}
+
+    def pin(self, document_id):
+        """
+        Keep a document from being evicted until unpin() is called (once per pin)
+
+        Returns:
+            Path to the stored PDF, or None (and nothing pinned) if unknown or evicted
+        """
+        if not self.is_valid_id(document_id):
+            return None
+
+        pdf_path = self._pdf_path(document_id)
+        with self._lock:
+            if not os.path.exists(pdf_path):
+                return None
+            os.utime(pdf_path)
+            self._pins[document_id] = self._pins.get(document_id, 0) + 1
+        return pdf_path
+
+    def unpin(self, document_id):
+        """Release one pin taken with pin(); the document is marked as recently used"""
+        with self._lock:
+            count = self._pins.get(document_id, 0) - 1
+            if count > 0:
+                self._pins[document_id] = count
+            else:
+                self._pins.pop(document_id, None)
+            try:
+                os.utime(self._pdf_path(document_id))
+            except OSError:
+                pass
+
+    def delete(self, document_id):
+        """Remove a document from the store"""
+        if not self.is_valid_id(document_id):
+            return
+        with self._lock:
+            self._remove(document_id)
+
+    def evict(self, keep=None):
+        """
+        Drop expired documents, then the least recently used ones until
+        the store fits within max_bytes; pinned documents are skipped
+
+        Args:
+            keep: Optional document ID that is never dropped (the one just
+                  stored, even if it alone is larger than max_bytes)
+
+        Returns:
+            Number of documents removed
+        """
+        removed = 0
+        now = time.time()
+
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                if not name.endswith(".pdf"):
+                    continue
+                path = os.path.join(self.root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name[:-4]))
+
+            entries.sort()  # oldest access first
+            total = sum(size for _, size, _ in entries)
+
+            for mtime, size, document_id in entries:
+                if document_id == keep or document_id in self._pins:
+                    continue
+                if now - mtime > self.ttl_seconds or total > self.max_bytes:
+                    self._remove(document_id)
+                    total -= size
+                    removed += 1
+
+        return removed
+
+    @staticmethod
+    def is_valid_id(document_id):
+        """Document IDs are SHA-256 hex digests; anything else is rejected"""
+        return bool(document_id) and bool(DOCUMENT_ID_PATTERN.match(document_id))
+
+    def _read_meta(self, document_id):
+        try:
+            with open(self._meta_path(document_id)) as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _remove(self, document_id):
+        for path in (self._pdf_path(document_id), self._meta_path(document_id)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _pdf_path(self, document_id):
+        return os.path.join(self.root, f"{document_id}.pdf")
+
+    def _meta_path(self, document_id):
+        return os.path.join(self.root, f"{document_id}.json")
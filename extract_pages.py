@@ -2,10 +2,17 @@
 Extract Specific Pages from PDF
 
 Simple script to extract specific page numbers from a PDF file.
-You can specify individual pages or ranges (e.g., 1, 3, 5-10, 15)
+You can specify individual pages or ranges (e.g., 1, 3, 5-10, 15, 20-),
+or count from the end (last, -3-); see page_selection.py
+
+Run without arguments for the interactive prompts, or non-interactively
+with the arguments of "split_pdf.py extract":
+
+    python extract_pages.py "in/*.pdf" --pages 1-3 --output extracted --jobs 4
 """
 
 from PyPDF2 import PdfReader, PdfWriter
+from page_selection import PageSelection, as_selection
 import os
 
 
@@ -16,24 +23,24 @@ def extract_pages(input_pdf, output_pdf, page_numbers):
     Args:
         input_pdf: Path to the input PDF file
         output_pdf: Path for the output PDF file
-        page_numbers: List of page numbers to extract (1-based)
+        page_numbers: PageSelection, or list of page numbers to extract (1-based)
     """
     # Read the PDF
     pdf_reader = PdfReader(input_pdf)
     pdf_writer = PdfWriter()
     total_pages = len(pdf_reader.pages)
+    selection = as_selection(page_numbers)
+    pages = selection.resolve(total_pages)
 
     print(f"Total pages in PDF: {total_pages}")
-    print(f"Extracting pages: {sorted(page_numbers)}")
+    print(f"Extracting pages: {pages}")
+    missing = selection.out_of_range(total_pages)
+    if missing:
+        print(f"  Warning: Pages {missing} don't exist (skipped)")
 
-    # Add selected pages
-    for page_num in sorted(page_numbers):
-        if 1 <= page_num <= total_pages:
-            # Convert to 0-based index
-            pdf_writer.add_page(pdf_reader.pages[page_num - 1])
-            print(f"  Added page {page_num}")
-        else:
-            print(f"  Warning: Page {page_num} doesn't exist (skipped)")
+    # Add selected pages (converted to 0-based indexes)
+    for page_num in pages:
+        pdf_writer.add_page(pdf_reader.pages[page_num - 1])
 
     # Write output file
     with open(output_pdf, 'wb') as output_file:
@@ -42,36 +49,13 @@ def extract_pages(input_pdf, output_pdf, page_numbers):
     print(f"\nSuccess! Created '{output_pdf}' with {len(pdf_writer.pages)} pages")
 
 
-def parse_page_input(page_string):
-    """
-    Parse page numbers from user input.
-    Supports: "1,3,5" or "1-5,8,10-12" format
-
-    Returns:
-        List of page numbers
-    """
-    pages = []
-    parts = page_string.replace(" ", "").split(",")
-
-    for part in parts:
-        if "-" in part:
-            # Handle range (e.g., "5-10")
-            try:
-                start, end = part.split("-")
-                pages.extend(range(int(start), int(end) + 1))
-            except:
-                print(f"Warning: Invalid range '{part}' (skipped)")
-        else:
-            # Handle single page
-            try:
-                pages.append(int(part))
-            except:
-                print(f"Warning: Invalid page number '{part}' (skipped)")
-
-    return list(set(pages))  # Remove duplicates
-
-
 if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        # Non-interactive: same as "split_pdf.py extract ..."
+        from split_pdf import main
+        sys.exit(main(["extract"] + sys.argv[1:]))
+
     print("=" * 60)
     print("EXTRACT SPECIFIC PAGES FROM PDF")
     print("=" * 60)
@@ -101,10 +85,11 @@ if __name__ == "__main__":
     print("  - Single pages: 1,3,5")
     print("  - Range: 1-5")
     print("  - Mixed: 1,3,5-10,15")
+    print("  - To the end: 20-   Last page: last   Last three: -3-")
     print()
 
     page_input = input("Enter page numbers: ").strip()
-    page_numbers = parse_page_input(page_input)
+    page_numbers = PageSelection.parse(page_input, warn=lambda message: print(f"Warning: {message}"))
 
     if not page_numbers:
         print("No valid page numbers entered!")
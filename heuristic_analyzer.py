@@ -0,0 +1,243 @@
+"""
+Heuristic Section Boundary Detector
+
+A zero-network analysis provider: finds where chapters or sections start
+using layout signals pdfplumber already exposes, with no AI model at all.
+
+Signals per page:
+- Large font on the first lines compared to the document's body text
+- "Chapter 3" / "Part II" / "4 Results" style headings near the top
+- A mostly blank page right before (section separators)
+- A change in the running header
+
+The result has the same JSON shape as the AI analysis, so the web UI
+handles it unchanged.
+"""
+
+import re
+import statistics
+
+from pdf_session import PDFSession
+
+
+BLANK_PAGE_CHARS = 30          # fewer characters than this counts as blank
+HEADER_ZONE = 0.08             # top 8% of the page holds running headers
+LARGE_FONT_RATIO = 1.4         # heading font vs. body font size
+BOUNDARY_SCORE = 3             # score needed to start a new section
+FALLBACK_PAGES_PER_PART = 10   # pages per part in the plain fixed-size suggestion
+
+CHAPTER_PATTERN = re.compile(
+    r"^(chapter|part|section|appendix|book|unit|lesson|kapitel|chapitre|cap[ií]tulo)\s+([0-9]+|[ivxlcdm]+|[a-z])\b",
+    re.IGNORECASE
+)
+NUMBERED_HEADING_PATTERN = re.compile(r"^\d{1,2}\.?\s+[A-Z][^.]{2,60}$")
+
+
+def _group_lines(chars, max_lines=3):
+    """Group a page's characters into its first few text lines (top to bottom)"""
+    lines = {}
+    for char in chars:
+        lines.setdefault(round(char["top"]), []).append(char)
+
+    result = []
+    for top in sorted(lines)[:max_lines]:
+        line_chars = sorted(lines[top], key=lambda char: char["x0"])
+
+        # Whitespace chars are dropped, so put spaces back at visible gaps
+        text = line_chars[0]["text"]
+        for previous, char in zip(line_chars, line_chars[1:]):
+            if char["x0"] - previous["x1"] > previous["size"] * 0.2:
+                text += " "
+            text += char["text"]
+
+        result.append({
+            "text": text.strip(),
+            "size": max(char["size"] for char in line_chars),
+            "top": top
+        })
+    return result
+
+
+def page_features(page):
+    """
+    Collect the layout signals for one pdfplumber page
+
+    Returns:
+        dict with char_count, body_size, first_lines and header
+    """
+    chars = [char for char in page.chars if char["text"].strip()]
+    first_lines = _group_lines(chars)
+
+    header = ""
+    if first_lines and first_lines[0]["top"] < page.height * HEADER_ZONE:
+        header = first_lines[0]["text"]
+
+    return {
+        "char_count": len(chars),
+        "body_size": statistics.median(char["size"] for char in chars) if chars else 0,
+        "first_lines": first_lines,
+        "header": header
+    }
+
+
+def extract_page_features(pdf_path, session=None):
+    """
+    Collect layout signals for every page of a PDF
+
+    Args:
+        pdf_path: Path to the PDF file
+        session: Optional PDFSession already open on pdf_path
+
+    Returns:
+        List of page_features() dicts, one per page
+    """
+    owns_session = session is None
+    session = session or PDFSession(pdf_path)
+
+    try:
+        features = []
+        for index in range(session.page_count):
+            page = session.plumber_page(index)
+            features.append(page_features(page))
+            page.close()  # free the parsed layout as we go
+        return features
+    finally:
+        if owns_session:
+            session.close()
+
+
+def features_from_page_contents(page_contents, total_pages=None):
+    """
+    Fallback features from plain extracted text when layout data is missing
+
+    page_contents may be a sample of the document's pages; pages that were
+    not sampled get neutral features (neither blank nor a heading).
+    """
+    total_pages = total_pages or max((page["page_number"] for page in page_contents), default=0)
+    features = [
+        {"char_count": BLANK_PAGE_CHARS, "body_size": 0, "first_lines": [], "header": ""}
+        for _ in range(total_pages)
+    ]
+    for page in page_contents:
+        lines = [line.strip() for line in page["text"].splitlines() if line.strip()][:3]
+        features[page["page_number"] - 1] = {
+            "char_count": page["char_count"],
+            "body_size": 0,
+            "first_lines": [{"text": line, "size": 0, "top": 0} for line in lines],
+            "header": ""
+        }
+    return features
+
+
+def _normalize_header(text):
+    """Running headers differ only by page number from page to page"""
+    return re.sub(r"\d+", "", text).strip().lower()
+
+
+def _heading_title(first_lines):
+    """Best guess at a section title from a page's first lines"""
+    if not first_lines:
+        return None
+    largest = max(first_lines, key=lambda line: line["size"])
+    return largest["text"][:80] or None
+
+
+def _score_page(features, previous, body_size, previous_header):
+    """How strongly a page looks like the start of a new section"""
+    if features["char_count"] < BLANK_PAGE_CHARS:
+        return 0
+
+    score = 0
+    lines = features["first_lines"]
+
+    if any(CHAPTER_PATTERN.match(line["text"]) for line in lines):
+        score += 3
+    elif any(NUMBERED_HEADING_PATTERN.match(line["text"]) for line in lines):
+        score += 1
+
+    if body_size and lines and max(line["size"] for line in lines) >= body_size * LARGE_FONT_RATIO:
+        score += 2
+
+    if previous is not None and previous["char_count"] < BLANK_PAGE_CHARS:
+        score += 1
+
+    header = _normalize_header(features["header"])
+    if header and previous_header and header != previous_header:
+        score += 1
+
+    return score
+
+
+def _sections_to_suggestion(name, description, sections):
+    return {
+        "name": name,
+        "description": description,
+        "page_ranges": ",".join(section["pages"] for section in sections),
+        "sections": sections
+    }
+
+
+def analyze_features(features, total_pages=None):
+    """
+    Detect section boundaries from per-page features
+
+    Args:
+        features: List of page feature dicts, one per page in order
+        total_pages: Page count of the whole document (defaults to len(features))
+
+    Returns:
+        dict in the same shape as PDFAnalyzer._parse_ai_response
+    """
+    total_pages = total_pages or len(features)
+    sizes = [page["body_size"] for page in features if page["body_size"]]
+    body_size = statistics.median(sizes) if sizes else 0
+
+    starts = [(0, _heading_title(features[0]["first_lines"]) if features else None)]
+    previous_header = ""
+    for index, page in enumerate(features):
+        previous = features[index - 1] if index > 0 else None
+        if index > 0 and _score_page(page, previous, body_size, previous_header) >= BOUNDARY_SCORE:
+            starts.append((index, _heading_title(page["first_lines"])))
+        header = _normalize_header(page["header"])
+        if header:
+            previous_header = header
+
+    suggestions = []
+    if len(starts) >= 2:
+        sections = []
+        for i, (start, title) in enumerate(starts):
+            end = starts[i + 1][0] if i + 1 < len(starts) else total_pages
+            pages = f"{start + 1}-{end}" if end > start + 1 else f"{start + 1}"
+            sections.append({"name": title or f"Section {i + 1}", "pages": pages})
+
+        suggestions.append(_sections_to_suggestion(
+            "Split at detected section starts",
+            f"Found {len(sections)} pages that look like chapter or section openings "
+            f"(large headings, numbered titles, separator pages, running header changes).",
+            sections
+        ))
+
+    # Always offer a plain fixed-size split as well
+    size = FALLBACK_PAGES_PER_PART
+    chunks = []
+    for start in range(1, total_pages + 1, size):
+        end = min(start + size - 1, total_pages)
+        chunks.append({"name": f"Pages {start}-{end}", "pages": f"{start}-{end}" if end > start else f"{start}"})
+    if len(chunks) > 1:
+        suggestions.append(_sections_to_suggestion(
+            f"Split into {size}-page parts",
+            "Equal-sized parts, useful when the document has no clear chapter structure.",
+            chunks
+        ))
+
+    structure = (
+        f"{len(starts)} section start(s) detected locally"
+        if len(starts) >= 2 else "No clear section structure detected"
+    )
+
+    return {
+        "document_type": "Unknown (local heuristic analysis)",
+        "structure": structure,
+        "suggestions": suggestions,
+        "analysis_source": "heuristic"
+    }
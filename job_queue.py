@@ -0,0 +1,167 @@
+"""
+Background Job Queue
+
+Runs long analyses and splits outside the request thread. Submitting work
+returns a job ID right away; the job's status, progress counters and
+result can then be polled.
+
+The queue has a fixed number of worker threads and a maximum number of
+waiting jobs. When it is full, submit() raises QueueFullError so the web
+app can reject the request cleanly instead of piling up threads.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import threading
+import time
+import uuid
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds its maximum number of jobs"""
+
+
+class Job:
+    """One unit of background work and its observable state"""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"  # queued -> running -> done | failed
+        self.progress = {}
+        self.result = None       # JSON-serializable result, if any
+        self.result_path = None  # file to download, if any
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def update_progress(self, **counters):
+        """Set progress counters, e.g. job.update_progress(pages_extracted=12)"""
+        with self._lock:
+            self.progress.update(counters)
+
+    def to_dict(self):
+        """Status snapshot for the /jobs/<id> endpoint"""
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "error": self.error,
+                "has_result": self.result is not None or self.result_path is not None,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+
+
+class JobQueue:
+    """Bounded worker pool with a maximum queue depth"""
+
+    def __init__(self, workers=2, max_queued=20, result_ttl_seconds=3600):
+        """
+        Initialize the job queue
+
+        Args:
+            workers: Number of jobs that run at the same time
+            max_queued: Jobs allowed to wait for a worker; more are rejected
+            result_ttl_seconds: Finished jobs (and their result files) are
+                                forgotten this long after they finish
+        """
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl_seconds = result_ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind, func, *args, **kwargs):
+        """
+        Queue func(job, *args, **kwargs) to run in the background
+
+        The function reports progress through job.update_progress() and
+        returns either a JSON-serializable result or, by setting
+        job.result_path itself, a file to download.
+
+        Returns:
+            The new Job
+
+        Raises:
+            QueueFullError: if workers + max_queued jobs are already pending
+        """
+        self._expire_finished()
+
+        job = Job(kind)
+        with self._lock:
+            if self._pending >= self.workers + self.max_queued:
+                raise QueueFullError("Server is busy, please try again later")
+            self._pending += 1
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """Return the Job for an ID, or None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        """Counts of jobs by status plus queue limits"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                "pending": self._pending,
+                "workers": self.workers,
+                "max_queued": self.max_queued,
+                "jobs": counts
+            }
+
+    def _run(self, job, func, args, kwargs):
+        with job._lock:
+            job.status = "running"
+            job.started_at = time.time()
+
+        try:
+            result = func(job, *args, **kwargs)
+            with job._lock:
+                job.result = result
+                job.status = "done"
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            with job._lock:
+                job.error = str(e)
+                job.status = "failed"
+        finally:
+            with job._lock:
+                job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+
+    def _expire_finished(self):
+        """Forget finished jobs past their TTL and delete their result files"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                job for job in self._jobs.values()
+                if job.finished_at and now - job.finished_at > self.result_ttl_seconds
+            ]
+            for job in expired:
+                del self._jobs[job.id]
+
+        for job in expired:
+            if job.result_path and os.path.exists(job.result_path):
+                try:
+                    os.remove(job.result_path)
+                except OSError:
+                    pass
@@ -0,0 +1,246 @@
+"""
+Request and Stage Metrics
+
+Hot-path instrumentation without extra dependencies:
+
+- stage("extract") times one step of the work (upload save, text
+  extraction, prompt building, provider call, parsing, splitting...) and
+  records it under the route being served,
+- count_pages() / count_bytes() add to the pages-processed and
+  bytes-written counters,
+- render() writes every metric in the Prometheus text format for the
+  /metrics endpoint.
+
+The route a stage belongs to is taken from the RequestTimer of the
+current context (set per request by the Flask hooks, or with track() in
+background jobs). The timer also keeps the request's own stage durations
+for the optional Server-Timing response header.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+
+PREFIX = "pdf_splitter"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+HELP = {
+    "requests_total": ("counter", "HTTP requests by route and status code"),
+    "request_seconds": ("histogram", "Time to the response headers by route (streamed bodies continue after it)"),
+    "stage_seconds": ("histogram", "Time spent in each processing stage by route"),
+    "pages_processed_total": ("counter", "PDF pages read or written by route and stage"),
+    "bytes_written_total": ("counter", "Bytes of PDF/ZIP output or stored uploads by route and stage")
+}
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name and labels"""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Record one observation (e.g. seconds) in a histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += 1
+            entry[-1] += value
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(entry)) for key, entry in self._histograms.items())
+
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described:
+                described.add(name)
+                kind, text = HELP.get(name, ("untyped", name))
+                lines.append(f"# HELP {PREFIX}_{name} {text}")
+                lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f"{PREFIX}_{name}{_labels(labels)} {_number(value)}")
+
+        for (name, labels), entry in histograms:
+            describe(name)
+            for bound, count in zip(self.buckets, entry):
+                lines.append(f"{PREFIX}_{name}_bucket{_labels(labels + (('le', _number(bound)),))} {count}")
+            lines.append(f"{PREFIX}_{name}_bucket{_labels(labels + (('le', '+Inf'),))} {entry[-2]}")
+            lines.append(f"{PREFIX}_{name}_count{_labels(labels)} {entry[-2]}")
+            lines.append(f"{PREFIX}_{name}_sum{_labels(labels)} {_number(entry[-1])}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class RequestTimer:
+    """Stage durations of one request or background job"""
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self._stages = []  # (name, seconds); appended from any thread
+
+    def record(self, name, seconds):
+        self._stages.append((name, seconds))
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """
+        Server-Timing header value: total milliseconds per stage, in first-seen order
+
+        Stages that ran several times (e.g. concurrent provider calls)
+        are summed and their count is given as the description.
+        """
+        totals = {}
+        for name, seconds in list(self._stages):
+            count, total = totals.get(name, (0, 0.0))
+            totals[name] = (count + 1, total + seconds)
+
+        entries = []
+        for name, (count, total) in totals.items():
+            description = f';desc="{count}x"' if count > 1 else ""
+            entries.append(f"{name}{description};dur={total * 1000:.1f}")
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(entries)
+
+
+registry = MetricsRegistry()
+_current_timer = ContextVar("request_timer", default=None)
+
+
+def current_timer():
+    """The RequestTimer of the current request or job, or None"""
+    return _current_timer.get()
+
+
+def _route():
+    timer = _current_timer.get()
+    return timer.route if timer else "other"
+
+
+def start_request(route):
+    """Begin timing a request; returns (timer, token) for finish_request"""
+    timer = RequestTimer(route)
+    return timer, _current_timer.set(timer)
+
+
+def finish_request(timer, token, status_code):
+    """Record a request's status and duration and leave its context"""
+    registry.inc("requests_total", route=timer.route, status=status_code)
+    registry.observe("request_seconds", timer.elapsed(), route=timer.route)
+    _current_timer.reset(token)
+
+
+@contextmanager
+def track(route=None, timer=None):
+    """
+    Attribute the stages inside the block to a route (e.g. in a background job)
+
+    Args:
+        route: Route label for a new timer
+        timer: Existing RequestTimer to continue, e.g. inside a streamed
+               response body that runs after the request has finished
+    """
+    token = _current_timer.set(timer or RequestTimer(route))
+    try:
+        yield _current_timer.get()
+    finally:
+        _current_timer.reset(token)
+
+
+def record_stage(name, seconds):
+    """Record a stage duration measured by the caller"""
+    timer = _current_timer.get()
+    registry.observe("stage_seconds", seconds, route=timer.route if timer else "other", stage=name)
+    if timer:
+        timer.record(name, seconds)
+
+
+@contextmanager
+def stage(name):
+    """Time the block as one stage of the current route's work"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def timed_iter(iterable, name):
+    """
+    Yield from iterable, recording the time spent producing its items as one stage
+
+    Time the consumer spends between items (e.g. sending them to the
+    client) is not counted.
+    """
+    iterator = iter(iterable)
+    seconds = 0.0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                seconds += time.perf_counter() - started
+            yield item
+    finally:
+        record_stage(name, seconds)
+
+
+def count_pages(count, stage_name):
+    """Add to the pages-processed counter of the current route"""
+    if count:
+        registry.inc("pages_processed_total", count, route=_route(), stage=stage_name)
+
+
+def count_bytes(count, stage_name):
+    """Add to the bytes-written counter of the current route"""
+    if count:
+        registry.inc("bytes_written_total", count, route=_route(), stage=stage_name)
+
+
+def render():
+    """Prometheus text for the /metrics endpoint"""
+    return registry.render()
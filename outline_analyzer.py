@@ -0,0 +1,208 @@
+"""
+Outline-Based Structure Analyzer
+
+Many PDFs already carry bookmarks (an outline) with the page each
+chapter starts on. This module turns that outline, plus the document's
+page labels, into splitting suggestions in the same JSON shape the AI
+analysis returns, so /analyze can skip the model call entirely when the
+outline is detailed enough.
+"""
+
+from PyPDF2 import PdfReader
+
+
+ROMAN_STYLES = ("/r", "/R")
+
+
+def _flatten_outline(pdf_reader, outline, depth=0, entries=None):
+    """Walk the nested outline into a flat list of (depth, title, page_index)"""
+    if entries is None:
+        entries = []
+
+    for item in outline:
+        if isinstance(item, list):
+            _flatten_outline(pdf_reader, item, depth + 1, entries)
+            continue
+        try:
+            page_index = pdf_reader.get_destination_page_number(item)
+        except Exception:
+            continue
+        if page_index is None or page_index < 0:
+            continue
+        title = str(item.title or "").strip() or f"Section {len(entries) + 1}"
+        entries.append((depth, title, page_index))
+
+    return entries
+
+
+def outline_page_indexes(pdf_reader):
+    """
+    0-based page indexes the PDF's bookmarks point to, in outline order
+
+    Returns an empty list when the PDF has no outline or it cannot be read.
+    """
+    try:
+        if "/Outlines" not in pdf_reader.trailer["/Root"]:
+            return []
+        return [page_index for _, _, page_index in _flatten_outline(pdf_reader, pdf_reader.outline)]
+    except Exception:
+        return []
+
+
+def _read_page_labels(pdf_reader):
+    """
+    Read the /PageLabels number tree from the document catalog
+
+    Returns:
+        Sorted list of (start_page_index, style) for each label range,
+        e.g. [(0, "/r"), (12, "/D")]; empty if the PDF has no page labels
+    """
+    try:
+        root = pdf_reader.trailer["/Root"]
+        if "/PageLabels" not in root:
+            return []
+        tree = root["/PageLabels"].get_object()
+    except Exception:
+        return []
+
+    ranges = []
+    nodes = [tree]
+    while nodes:
+        node = nodes.pop()
+        nums = node.get("/Nums", [])
+        for i in range(0, len(nums) - 1, 2):
+            label = nums[i + 1].get_object()
+            ranges.append((int(nums[i]), str(label.get("/S", ""))))
+        nodes.extend(kid.get_object() for kid in node.get("/Kids", []))
+
+    return sorted(ranges)
+
+
+def _front_matter_end(label_ranges):
+    """
+    Page index where the main body starts, if page labels mark front matter
+
+    Front matter is a leading roman-numbered range followed by a range
+    with another numbering style (usually decimal starting at 1).
+    """
+    if len(label_ranges) >= 2 and label_ranges[0][0] == 0 and label_ranges[0][1] in ROMAN_STYLES:
+        return label_ranges[1][0]
+    return None
+
+
+def _build_sections(entries, total_pages, front_matter_end=None):
+    """
+    Turn (title, page_index) boundaries into consecutive page-range sections
+
+    Each section runs from its bookmark's page up to the page before the
+    next bookmark; pages before the first bookmark become front matter.
+    """
+    boundaries = []
+    for title, page_index in sorted(entries, key=lambda entry: entry[1]):
+        if boundaries and boundaries[-1][1] == page_index:
+            continue  # several bookmarks on the same page - keep the first
+        boundaries.append((title, page_index))
+
+    first_page = boundaries[0][1] if boundaries else total_pages
+    if first_page > 0:
+        boundaries.insert(0, ("Front matter", 0))
+    elif front_matter_end and front_matter_end < (boundaries[1][1] if len(boundaries) > 1 else total_pages):
+        boundaries.insert(1, (boundaries[0][0], front_matter_end))
+        boundaries[0] = ("Front matter", 0)
+
+    sections = []
+    for i, (title, page_index) in enumerate(boundaries):
+        start = page_index + 1
+        end = boundaries[i + 1][1] if i + 1 < len(boundaries) else total_pages
+        pages = f"{start}-{end}" if end > start else f"{start}"
+        sections.append({"name": title, "pages": pages})
+
+    return sections
+
+
+def _section_length(pages):
+    start, _, end = pages.partition("-")
+    return int(end or start) - int(start) + 1
+
+
+def _suggestion(name, description, sections):
+    return {
+        "name": name,
+        "description": description,
+        "page_ranges": ",".join(section["pages"] for section in sections),
+        "sections": sections
+    }
+
+
+def analyze_outline(pdf_path, min_sections=3, max_section_share=0.6, pdf_reader=None):
+    """
+    Suggest splits from the PDF's bookmarks and page labels
+
+    Args:
+        pdf_path: Path to the PDF file
+        min_sections: Fewest top-level sections for the outline to count as usable
+        max_section_share: Largest fraction of the document one section may
+                           cover before the outline is considered too coarse
+        pdf_reader: Already-open PdfReader for pdf_path (optional)
+
+    Returns:
+        dict in the same shape as PDFAnalyzer._parse_ai_response, or None
+        when the outline is missing or too coarse and the AI should decide
+    """
+    try:
+        pdf_reader = pdf_reader or PdfReader(pdf_path)
+        total_pages = len(pdf_reader.pages)
+        entries = _flatten_outline(pdf_reader, pdf_reader.outline)
+    except Exception:
+        return None
+
+    if total_pages == 0 or not entries:
+        return None
+
+    front_matter_end = _front_matter_end(_read_page_labels(pdf_reader))
+
+    depths = sorted({depth for depth, _, _ in entries})
+    top_level_count = sum(1 for depth, _, _ in entries if depth == depths[0])
+
+    suggestions = []
+    for depth in depths:
+        # Each level also keeps its parents' boundaries (chapter intros
+        # before the first subsection stay attached to the chapter)
+        level_entries = [(title, page_index) for d, title, page_index in entries if d <= depth]
+        sections = _build_sections(level_entries, total_pages, front_matter_end)
+        if len(sections) < min_sections:
+            continue
+
+        largest = max(_section_length(section["pages"]) for section in sections)
+        if largest > max_section_share * total_pages:
+            continue
+
+        # A deeper level only helps if it actually adds boundaries
+        if suggestions and len(sections) <= len(suggestions[-1]["sections"]):
+            continue
+
+        if depth == depths[0]:
+            name = "Split by chapters (from bookmarks)"
+            description = f"The PDF's outline lists {len(sections)} top-level sections; each becomes its own file."
+        else:
+            name = f"Split by level {depth + 1} bookmarks"
+            description = f"Finer split using nested outline entries down to level {depth + 1} ({len(sections)} sections)."
+        suggestions.append(_suggestion(name, description, sections))
+
+        if len(suggestions) == 2:
+            break
+
+    if not suggestions:
+        return None
+
+    structure = f"Outline with {top_level_count} top-level bookmarks across {len(depths)} level(s)"
+    if front_matter_end:
+        structure += f"; page labels mark {front_matter_end} page(s) of front matter"
+
+    return {
+        "document_type": "Bookmarked document",
+        "structure": structure,
+        "suggestions": suggestions,
+        "total_pages": total_pages,
+        "analysis_source": "outline"
+    }
@@ -0,0 +1,152 @@
+"""
+Lazy Page Extractor
+
+Fast path for pulling a few pages out of a very large PDF. A plain
+PdfReader(path) copies the whole file into memory, and reader.pages[i]
+flattens the entire page tree before returning a single page. Here the
+file is memory-mapped instead, and each requested page is found by
+descending the page tree with the /Count of every node, so only the
+nodes on the way to that page are resolved. PdfWriter then copies just
+the objects the selected pages reference.
+
+Extraction time and memory therefore follow the number of pages
+selected, not the size of the document (apart from the cross-reference
+table, which PyPDF2 always reads in full).
+"""
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2._page import PageObject
+from PyPDF2.generic import NameObject
+import mmap
+
+from page_selection import as_selection
+
+
+# Page attributes a /Page may inherit from its /Pages ancestors
+INHERITABLE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+class LazyPageReader:
+    """Memory-mapped PDF with page lookup by index, without flattening the page tree"""
+
+    def __init__(self, pdf_path):
+        """
+        Map the file and read its cross-reference table
+
+        Args:
+            pdf_path: Path to the PDF file
+        """
+        self.pdf_path = pdf_path
+        self._file = open(pdf_path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.reader = PdfReader(self._map)
+        except Exception:
+            self.close()
+            raise
+        self._page_count = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _pages_root(self):
+        return self.reader.trailer["/Root"]["/Pages"].get_object()
+
+    @property
+    def page_count(self):
+        """Number of pages, read from the root page tree's /Count"""
+        if self._page_count is None:
+            try:
+                self._page_count = int(self._pages_root()["/Count"])
+            except Exception:
+                self._page_count = len(self.reader.pages)
+        return self._page_count
+
+    def page(self, index):
+        """
+        PyPDF2 page object for a 0-based page index
+
+        Falls back to PyPDF2's flattened page list if the page tree's
+        /Count values turn out to be inconsistent.
+        """
+        if not 0 <= index < self.page_count:
+            raise IndexError(f"Page index {index} out of range")
+        try:
+            return self._find_page(index)
+        except Exception:
+            return self.reader.pages[index]
+
+    def _find_page(self, index):
+        """Descend the page tree to the index-th leaf, collecting inherited attributes"""
+        node = self._pages_root()
+        inherited = {}
+
+        while True:
+            for attribute in INHERITABLE_ATTRIBUTES:
+                if attribute in node:
+                    inherited[attribute] = node[attribute]
+
+            for kid_reference in node["/Kids"]:
+                kid = kid_reference.get_object()
+                if "/Kids" in kid:
+                    count = int(kid["/Count"])
+                    if index < count:
+                        node = kid
+                        break
+                    index -= count
+                elif index == 0:
+                    page = PageObject(self.reader, kid_reference)
+                    page.update(kid)
+                    for attribute, value in inherited.items():
+                        if attribute not in page:
+                            page[NameObject(attribute)] = value
+                    return page
+                else:
+                    index -= 1
+            else:
+                raise IndexError("Page tree /Count does not match its /Kids")
+
+    def close(self):
+        """Unmap and close the file"""
+        self.reader = None
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def extract_pages(input_path, output_path, pages):
+    """
+    Write the given pages of a PDF to a new file using lazy page lookup
+
+    Args:
+        input_path: Path to input PDF
+        output_path: Path to save extracted PDF
+        pages: PageSelection, or list of page numbers to extract (1-based)
+
+    Returns:
+        Tuple of (pages_extracted: int, invalid_pages: str) where
+        invalid_pages lists the requested pages past the end (e.g. "31-40");
+        nothing is written when no page is valid
+    """
+    selection = as_selection(pages)
+    with LazyPageReader(input_path) as lazy_reader:
+        pdf_writer = PdfWriter()
+        total_pages = lazy_reader.page_count
+
+        extracted_count = 0
+        for page_num in selection.resolve(total_pages):
+            pdf_writer.add_page(lazy_reader.page(page_num - 1))
+            extracted_count += 1
+
+        if extracted_count:
+            # Written before the map is closed: page content is read on demand
+            with open(output_path, 'wb') as output_file:
+                pdf_writer.write(output_file)
+
+    return extracted_count, selection.out_of_range(total_pages)
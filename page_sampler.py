@@ -0,0 +1,171 @@
+"""
+Budgeted Page Sampler
+
+Decides which pages the AI prompt is built from. Instead of sending the
+opening pages of a document, the sampler spreads a token budget across
+the whole file:
+
+- likely section starts come first (bookmark targets, and the page after
+  a blank separator page),
+- then pages in coverage order: first, last, middle, quarters, eighths...
+  so that any number of samples is spread evenly over the document.
+
+Pages are handed out one batch at a time and only those are extracted;
+sampling stops as soon as the budget is used up.
+"""
+
+from heuristic_analyzer import BLANK_PAGE_CHARS, CHAPTER_PATTERN, NUMBERED_HEADING_PATTERN
+
+
+CHARS_PER_TOKEN = 4            # rough average for English text
+DEFAULT_TOKEN_BUDGET = 4000    # tokens of page text per prompt
+DEFAULT_PAGE_TOKENS = 120      # most tokens taken from any one page
+PAGE_LABEL_TOKENS = 4          # "Page 123: " prefix in the prompt
+
+
+def estimate_tokens(text):
+    """Approximate token count of a piece of text"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def coverage_order(total_pages):
+    """
+    Yield every page index once, ordered so each prefix covers the document evenly
+
+    First and last page, then the middle, then quarters, eighths and so on.
+    """
+    if total_pages <= 0:
+        return
+
+    seen = set()
+    for index in (0, total_pages - 1):
+        if index not in seen:
+            seen.add(index)
+            yield index
+
+    step = 1
+    while step < total_pages:
+        step *= 2
+    while step >= 1:
+        for index in range(0, total_pages, step):
+            if index not in seen:
+                seen.add(index)
+                yield index
+        step //= 2
+
+
+def page_excerpt(text, max_tokens):
+    """Opening of a page's text (where headings are) within max_tokens"""
+    return " ".join(text.split())[:max_tokens * CHARS_PER_TOKEN]
+
+
+def looks_like_heading(text):
+    """Whether a page opens with a chapter or numbered section title"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()][:3]
+    return any(CHAPTER_PATTERN.match(line) or NUMBERED_HEADING_PATTERN.match(line) for line in lines)
+
+
+class PageSampler:
+    """Pick pages across a document until a token budget is spent"""
+
+    def __init__(self, total_pages, token_budget=DEFAULT_TOKEN_BUDGET, page_tokens=DEFAULT_PAGE_TOKENS,
+                 priority_pages=(), max_pages=None, first_page=0):
+        """
+        Initialize the sampler
+
+        Args:
+            total_pages: Number of pages to sample from
+            token_budget: Tokens of page text to collect in total
+            page_tokens: Most tokens to take from a single page
+            priority_pages: 0-based page indexes that likely start sections
+                            (e.g. bookmark targets); sampled before the rest
+            max_pages: Optional hard limit on the number of sampled pages
+            first_page: 0-based index of the first page to sample, to cover
+                        a window of a larger document; all indexes passed
+                        in and handed out are document page indexes
+        """
+        self.total_pages = total_pages
+        self.first_page = first_page
+        self.token_budget = token_budget
+        self.page_tokens = page_tokens
+        self.max_pages = max_pages if max_pages is not None else total_pages
+        self.tokens_used = 0
+        self.samples = {}  # page index -> {"text", "char_count", "heading"}
+        self._priority = [index for index in dict.fromkeys(priority_pages)
+                          if first_page <= index < first_page + total_pages]
+        self._order = coverage_order(total_pages)
+        self._handed_out = set()
+        self._followups = set()
+
+    @property
+    def exhausted(self):
+        """True once the budget, the page limit or the document is used up"""
+        return (self.tokens_used >= self.token_budget
+                or len(self.samples) >= min(self.max_pages, self.total_pages))
+
+    def estimated_pages(self):
+        """How many pages the budget is expected to cover"""
+        per_page = self.page_tokens + PAGE_LABEL_TOKENS
+        return max(1, min(self.total_pages, self.max_pages, -(-self.token_budget // per_page)))
+
+    def next_batch(self, size=1):
+        """
+        Page indexes to extract next (fewer, or none, once sampling is done)
+
+        Args:
+            size: How many pages the caller wants to extract at once
+        """
+        batch = []
+        room = min(self.max_pages, self.total_pages) - len(self.samples)
+        while len(batch) < min(size, room) and not self.exhausted:
+            if self._priority:
+                index = self._priority.pop(0)
+            else:
+                index = next(self._order, None)
+                if index is None:
+                    break
+                index += self.first_page
+            if index not in self._handed_out:
+                self._handed_out.add(index)
+                batch.append(index)
+        return batch
+
+    def add(self, index, text):
+        """
+        Record the full text of an extracted page
+
+        Returns:
+            True while budget is left for more pages
+        """
+        if self.exhausted:
+            return False
+
+        remaining = self.token_budget - self.tokens_used - PAGE_LABEL_TOKENS
+        excerpt = page_excerpt(text, max(0, min(self.page_tokens, remaining)))
+        self.tokens_used += estimate_tokens(excerpt) + PAGE_LABEL_TOKENS
+        self.samples[index] = {
+            "text": excerpt,
+            "char_count": len(text),
+            "heading": looks_like_heading(text)
+        }
+
+        # The page after a blank separator page usually starts a new section
+        # (not chained, so a run of near-empty pages is not read in sequence)
+        if (len(text.strip()) < BLANK_PAGE_CHARS and index + 1 < self.first_page + self.total_pages
+                and index not in self._followups):
+            self._followups.add(index + 1)
+            self._priority.insert(0, index + 1)
+
+        return not self.exhausted
+
+    def page_contents(self):
+        """Sampled pages in page order, shaped like extract_text_from_pdf's page_contents"""
+        return [
+            {
+                "page_number": index + 1,
+                "text": sample["text"],
+                "char_count": sample["char_count"],
+                "heading": sample["heading"]
+            }
+            for index, sample in sorted(self.samples.items())
+        ]
@@ -0,0 +1,200 @@
+"""
+Page Selection
+
+Parses page selections such as "1-5,8,10-12" into ranges instead of
+expanding every page into a list, so "1-10000000" costs two integers,
+not ten million. A selection is parsed on its own (PageSelection) and
+then resolved against the document's real page count (PageRanges):
+clamped to the pages that exist, and iterated lazily.
+
+Syntax (comma separated, spaces ignored):
+
+    7          one page
+    3-9        pages 3 to 9
+    5-         page 5 to the last page
+    -1, last   the last page; -3 is the third page from the end
+    -3-        the last three pages
+    2--2       page 2 to the second-to-last page
+
+By default a selection is normalized: sorted, without duplicates, with
+overlapping and adjacent ranges merged (a reversed range like "9-3"
+means pages 3 to 9). An ordered selection keeps the pages as written,
+including repeats and descending ranges ("3,1,1,9-7"), e.g. to reorder
+pages while extracting.
+
+Shared by the web app, split_pdf.py, extract_pages.py and batch_split.py.
+"""
+
+import bisect
+import re
+
+
+_REFERENCE = r"(?:-?\d+|last)"
+_SINGLE = re.compile(rf"^({_REFERENCE})$")
+_RANGE = re.compile(rf"^({_REFERENCE})?-({_REFERENCE})?$")
+
+
+def _reference(text):
+    """1-based page number, negative from the end (-1 = last), or None for an open end"""
+    if text is None:
+        return None
+    if text == "last":
+        return -1
+    return int(text)
+
+
+class PageSelection:
+    """A parsed page selection, independent of any document"""
+
+    def __init__(self, items, ordered=False):
+        """
+        Args:
+            items: (start, end) page references; negative counts from the
+                   end and None is an open end (first or last page)
+            ordered: Keep the written order and repeats instead of normalizing
+        """
+        self.items = list(items)
+        self.ordered = ordered
+
+    @classmethod
+    def parse(cls, text, ordered=False, warn=None):
+        """
+        Parse a selection like "1-5,8,10-"
+
+        Args:
+            text: The selection as typed
+            ordered: Keep the written order and repeats instead of normalizing
+            warn: Optional callback warn(message) for each part that is skipped
+
+        Returns:
+            A PageSelection; it is empty (false) when no part was valid
+        """
+        items = []
+        for part in str(text or "").replace(" ", "").lower().split(","):
+            if not part:
+                continue
+
+            single = _SINGLE.match(part)
+            span = None if single else _RANGE.match(part)
+            if single:
+                start = end = _reference(single.group(1))
+            elif span and part != "-":
+                start, end = _reference(span.group(1)), _reference(span.group(2))
+            else:
+                start = end = 0
+
+            if start == 0 or end == 0:
+                if warn:
+                    warn(f"Invalid page selection '{part}' (skipped)")
+                continue
+            items.append((start, end))
+
+        return cls(items, ordered)
+
+    @classmethod
+    def from_pages(cls, page_numbers):
+        """Ordered selection of explicit 1-based page numbers (e.g. an existing list)"""
+        return cls([(page, page) for page in page_numbers], ordered=True)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def resolve(self, total_pages):
+        """
+        The selected pages that exist in a document of total_pages pages
+
+        Returns:
+            PageRanges; pages outside 1..total_pages are left out
+        """
+        spans = []
+        for start, end in self.items:
+            first = self._absolute(start, total_pages, 1)
+            last = self._absolute(end, total_pages, total_pages)
+            low, high = max(min(first, last), 1), min(max(first, last), total_pages)
+            if low > high:
+                continue
+            spans.append((high, low) if self.ordered and first > last else (low, high))
+
+        return PageRanges(spans if self.ordered else _merge(spans), ordered=self.ordered)
+
+    def out_of_range(self, total_pages):
+        """
+        The requested pages outside the document, for messages
+
+        Pages past the end are given as page numbers; references from the
+        end that reach before the first page are given as written (as
+        negative references).
+
+        Returns:
+            Text like "-30,31-40,99", or "" when every page exists
+        """
+        before, after = [], []
+        for start, end in self.items:
+            first = self._absolute(start, total_pages, 1)
+            last = self._absolute(end, total_pages, total_pages)
+            low, high = min(first, last), max(first, last)
+            if low < 1:
+                before.append((low - total_pages - 1, min(high, 0) - total_pages - 1))
+            if high > total_pages:
+                after.append((max(low, total_pages + 1), high))
+        return ",".join(text for text in (str(PageRanges(_merge(before))), str(PageRanges(_merge(after)))) if text)
+
+    @staticmethod
+    def _absolute(reference, total_pages, default):
+        if reference is None:
+            return default
+        return total_pages + 1 + reference if reference < 0 else reference
+
+
+def as_selection(pages):
+    """A PageSelection as is; a list of page numbers as an ordered selection"""
+    return pages if isinstance(pages, PageSelection) else PageSelection.from_pages(pages)
+
+
+def _merge(spans):
+    """Sort ascending (low, high) spans and merge overlapping or adjacent ones"""
+    merged = []
+    for low, high in sorted(spans):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+        else:
+            merged.append((low, high))
+    return merged
+
+
+class PageRanges:
+    """Pages of a resolved selection, held as (first, last) spans and iterated lazily"""
+
+    def __init__(self, spans, ordered=False):
+        """
+        Args:
+            spans: (first, last) 1-based inclusive spans; first > last runs
+                   backwards (ordered selections only)
+            ordered: Spans are in written order, not sorted and merged
+        """
+        self.spans = list(spans)
+        self.ordered = ordered
+        self._starts = None if ordered else [first for first, _ in self.spans]
+
+    def __iter__(self):
+        for first, last in self.spans:
+            step = 1 if first <= last else -1
+            yield from range(first, last + step, step)
+
+    def __len__(self):
+        return sum(abs(last - first) + 1 for first, last in self.spans)
+
+    def __bool__(self):
+        return bool(self.spans)
+
+    def __contains__(self, page):
+        if self._starts is None:
+            return any(min(first, last) <= page <= max(first, last) for first, last in self.spans)
+        index = bisect.bisect_right(self._starts, page) - 1
+        return index >= 0 and page <= self.spans[index][1]
+
+    def __str__(self):
+        return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in self.spans)
+
+    def __repr__(self):
+        return f"PageRanges('{self}'{', ordered=True' if self.ordered else ''})"
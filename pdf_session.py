@@ -0,0 +1,141 @@
+"""
+PDF Document Session
+
+One workflow used to parse the same file several times: pdfplumber for
+text, PyPDF2 for extraction and splitting, and pdfplumber again just to
+count pages. A PDFSession parses each library's view of the file at
+most once and serves page count, page text and page objects to all of
+those callers.
+
+Everything is lazy: PyPDF2 is only opened when page objects or the page
+count are needed (the count comes from the page tree's /Count, without
+touching page content), and pdfplumber pages are created one by one up
+to the highest page actually requested.
+"""
+
+from PyPDF2 import PdfReader
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import resolve1
+import pdfplumber
+from pdfplumber.page import Page
+
+
+class PDFSession:
+    """Shared, lazily opened PyPDF2 + pdfplumber handles for one PDF file"""
+
+    def __init__(self, pdf_path, page_count=None, has_outline=None):
+        """
+        Create a session; nothing is parsed until first use
+
+        Args:
+            pdf_path: Path to the PDF file
+            page_count: Page count if already known (e.g. sniffed during upload)
+            has_outline: Whether the catalog has bookmarks, if already known
+        """
+        self.pdf_path = pdf_path
+        self._reader = None
+        self._page_count = page_count
+        self._has_outline = has_outline
+        self._plumber = None
+        self._plumber_pages = []
+        self._page_iter = None
+        self._doctop = 0
+        self._texts = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def reader(self):
+        """PyPDF2 PdfReader for the file, parsed on first access"""
+        if self._reader is None:
+            self._reader = PdfReader(self.pdf_path)
+        return self._reader
+
+    @property
+    def page_count(self):
+        """
+        Number of pages
+
+        Read from the root page tree's /Count when possible, which avoids
+        walking every page node (PyPDF2's len(reader.pages) flattens the
+        whole tree first).
+        """
+        if self._page_count is None:
+            if self._reader is None:
+                try:
+                    pages_root = resolve1(self._open_plumber().doc.catalog["Pages"])
+                    self._page_count = int(resolve1(pages_root["Count"]))
+                except Exception:
+                    self._page_count = len(self.reader.pages)
+            else:
+                self._page_count = len(self._reader.pages)
+        return self._page_count
+
+    @property
+    def has_outline(self):
+        """Whether the document catalog has bookmarks, checked without opening PyPDF2"""
+        if self._has_outline is not None:
+            return self._has_outline
+        if self._reader is not None:
+            return "/Outlines" in self._reader.trailer["/Root"]
+        try:
+            return "Outlines" in self._open_plumber().doc.catalog
+        except Exception:
+            return False
+
+    def page(self, index):
+        """PyPDF2 page object for a 0-based page index (for PdfWriter.add_page)"""
+        return self.reader.pages[index]
+
+    def plumber_page(self, index):
+        """
+        pdfplumber Page for a 0-based page index
+
+        Pages are created in order up to the one requested; later pages
+        are not touched.
+        """
+        self._open_plumber()
+
+        while len(self._plumber_pages) <= index:
+            try:
+                pdfminer_page = next(self._page_iter)
+            except StopIteration:
+                raise IndexError(f"Page index {index} out of range")
+            page = Page(self._plumber, pdfminer_page, page_number=len(self._plumber_pages) + 1,
+                        initial_doctop=self._doctop)
+            self._doctop += page.height
+            self._plumber_pages.append(page)
+
+        return self._plumber_pages[index]
+
+    def _open_plumber(self):
+        """Open the pdfplumber document on first use"""
+        if self._plumber is None:
+            self._plumber = pdfplumber.open(self.pdf_path)
+            self._page_iter = PDFPage.create_pages(self._plumber.doc)
+        return self._plumber
+
+    def page_text(self, index):
+        """Extracted text of a 0-based page index, computed once per session"""
+        if index not in self._texts:
+            page = self.plumber_page(index)
+            self._texts[index] = page.extract_text() or ""
+            page.close()  # drop the parsed layout, keep only the text
+        return self._texts[index]
+
+    def close(self):
+        """Release the underlying file handles"""
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+            self._plumber_pages = []
+            self._page_iter = None
+        if self._reader is not None:
+            stream = getattr(self._reader, "stream", None)
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
+            self._reader = None
@@ -0,0 +1,185 @@
+"""
+Single-pass PDF Upload Sniffing
+
+An upload used to be written to disk and then read back: once to hash
+it for the caches, and again by PyPDF2 or pdfplumber just to learn the
+page count. A PdfSniffer is fed the bytes while they are being written
+and, in the same pass, computes the SHA-256 and picks out of the raw
+PDF syntax what the routes need before any parser runs:
+
+- the header (%PDF-x.y within the first 1024 bytes), so files that are
+  not PDFs are rejected right away,
+- the trailer: the /Root reference and whether the file ends in %%EOF,
+- the document catalog and the root of the page tree, which give the
+  page count and whether the document has bookmarks.
+
+Only objects stored uncompressed are visible. When the catalog or the
+page tree sits in a compressed object stream (common since PDF 1.5),
+page_count and has_outline stay None and callers parse the file as
+before.
+"""
+
+import hashlib
+import re
+
+
+BLOCK_SIZE = 1024 * 1024     # read/write blocks for save_stream
+HEADER_WINDOW = 1024         # the header must start within this many bytes
+TAIL_WINDOW = 1024           # %%EOF must be within this many bytes of the end
+MAX_DICT_BYTES = 4096        # larger object dictionaries are not inspected
+LOOKBEHIND = 32              # bytes before "obj" holding the object number
+OVERLAP = MAX_DICT_BYTES + 64  # carried between blocks so no object is cut off
+
+_HEADER = re.compile(rb"%PDF-(\d\.\d)")
+_OBJECT = re.compile(rb"obj\s*<<")
+_OBJECT_NUMBER = re.compile(rb"(?<![0-9])(\d{1,10})\s+\d{1,5}\s+$")
+_OBJECT_END = re.compile(rb"endobj|stream")
+_NESTED_DICT = re.compile(rb"<<(?:(?!<<|>>).)*?>>", re.S)
+_ROOT = re.compile(rb"/Root\s+(\d+)\s+\d+\s+R")
+_TYPE = re.compile(rb"/Type\s*/(\w+)")
+_COUNT = re.compile(rb"/Count\s+(\d+)\b(?!\s+\d+\s+R)")
+_PAGES = re.compile(rb"/Pages\s+(\d+)\s+\d+\s+R")
+
+
+class PdfSniffer:
+    """SHA-256 and page tree facts of a PDF, fed in order one block at a time"""
+
+    def __init__(self):
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._head = b""
+        self._tail = b""
+        self._carry = b""          # unscanned end of the previous block (plus lookbehind)
+        self._carry_start = 0      # where scanning resumes inside _carry
+        self._roots = []           # /Root object numbers in file order (last one wins)
+        self._catalogs = {}        # object number -> (pages object number, has outline)
+        self._page_counts = {}     # object number -> /Count of a /Pages node
+        self._startxrefs = 0
+        self._object_streams = False
+        self._linearized = False
+
+    def update(self, block):
+        """Feed the next block of the file"""
+        if not block:
+            return
+        self.size += len(block)
+        self._digest.update(block)
+        if len(self._head) < HEADER_WINDOW:
+            self._head += block[:HEADER_WINDOW - len(self._head)]
+        self._tail = (self._tail + block[-TAIL_WINDOW:])[-TAIL_WINDOW:]
+
+        buffer = self._carry + block
+        limit = len(buffer) - OVERLAP
+        if limit > self._carry_start:
+            self._scan(buffer, self._carry_start, limit)
+            self._carry = buffer[limit - LOOKBEHIND:]
+            self._carry_start = LOOKBEHIND
+        else:
+            self._carry = buffer
+
+    def hexdigest(self):
+        """Hex SHA-256 of everything fed so far"""
+        return self._digest.hexdigest()
+
+    def result(self):
+        """
+        What was learned about the file; call once all blocks are fed
+
+        Returns:
+            dict with pdf_version (None when there is no PDF header),
+            page_count and has_outline (None when not visible without
+            parsing), linearized and complete (the file ends in %%EOF)
+        """
+        if self._carry_start < len(self._carry):
+            self._scan(self._carry, self._carry_start, len(self._carry))
+            self._carry_start = len(self._carry)
+
+        header = _HEADER.search(self._head)
+        info = {
+            "pdf_version": header.group(1).decode() if header else None,
+            "page_count": None,
+            "has_outline": None,
+            "linearized": self._linearized,
+            "complete": b"%%EOF" in self._tail
+        }
+
+        # With incremental updates, a newer catalog or page tree may be
+        # hidden in an object stream; only trust single-revision files then
+        revisions = self._startxrefs - (1 if self._linearized else 0)
+        if header and self._roots and not (self._object_streams and revisions > 1):
+            catalog = self._catalogs.get(self._roots[-1])
+            if catalog is not None:
+                pages, has_outline = catalog
+                info["has_outline"] = has_outline
+                info["page_count"] = self._page_counts.get(pages)
+        return info
+
+    def _scan(self, buffer, start, stop):
+        """Inspect objects, /Root references and startxref keywords beginning in buffer[start:stop]"""
+        for match in _ROOT.finditer(buffer, start):
+            if match.start() >= stop:
+                break
+            self._roots.append(int(match.group(1)))
+
+        self._startxrefs += buffer.count(b"startxref", start, stop + len(b"startxref") - 1)
+
+        for match in _OBJECT.finditer(buffer, start):
+            if match.start() >= stop:
+                break
+            number = _OBJECT_NUMBER.search(buffer, max(0, match.start() - LOOKBEHIND), match.start())
+            end = _OBJECT_END.search(buffer, match.end(), match.end() + MAX_DICT_BYTES)
+            if number and end:
+                self._inspect(int(number.group(1)), buffer[match.end():end.start()])
+
+    def _inspect(self, number, body):
+        if b"/Type" not in body:
+            return
+
+        # Drop nested dictionaries so only the object's own keys are seen
+        while True:
+            flattened = _NESTED_DICT.sub(b"", body)
+            if flattened == body:
+                break
+            body = flattened
+        body = body.split(b">>", 1)[0]
+
+        object_type = _TYPE.search(body)
+        if object_type is None:
+            if b"/Linearized" in body:
+                self._linearized = True
+            return
+
+        object_type = object_type.group(1)
+        if object_type == b"Catalog":
+            pages = _PAGES.search(body)
+            if pages:
+                self._catalogs[number] = (int(pages.group(1)), b"/Outlines" in body)
+        elif object_type == b"Pages":
+            count = _COUNT.search(body)
+            if count:
+                self._page_counts[number] = int(count.group(1))
+        elif object_type == b"ObjStm":
+            self._object_streams = True
+
+
+def save_stream(stream, path, block_size=BLOCK_SIZE):
+    """
+    Write a binary stream to a file, sniffing it on the way
+
+    Args:
+        stream: Readable binary stream (e.g. werkzeug FileStorage.stream)
+        path: File to create
+        block_size: Bytes read per block
+
+    Returns:
+        The PdfSniffer that saw the whole file
+    """
+    sniffer = PdfSniffer()
+    with open(path, "wb") as out:
+        while True:
+            block = stream.read(block_size)
+            if not block:
+                break
+            sniffer.update(block)
+            out.write(block)
+    return sniffer
@@ -0,0 +1,195 @@
+"""
+Shared AI Provider Clients
+
+A PDFAnalyzer is created for every /analyze request. If each one built
+its own Anthropic/OpenAI client (or called Ollama with a bare
+requests.post), every analysis would open a new TCP and TLS connection.
+This registry keeps one client per provider, API key and endpoint for
+the whole process. Each client has a keep-alive connection pool, so
+consecutive and concurrent requests reuse warm connections.
+
+The SDK clients (httpx underneath) and requests.Session with a
+connection-pool adapter are safe to share between Flask worker threads.
+The async clients' connections belong to the event loop that opened
+them, so those are kept once per event loop instead.
+Pool sizes are set with configure() before the first client is created.
+"""
+
+from anthropic import Anthropic, AsyncAnthropic, DefaultAsyncHttpxClient as AnthropicAsyncHttpxClient
+from anthropic import DefaultHttpxClient as AnthropicHttpxClient
+from openai import AsyncOpenAI, OpenAI, DefaultAsyncHttpxClient as OpenAIAsyncHttpxClient
+from openai import DefaultHttpxClient as OpenAIHttpxClient
+from requests.adapters import HTTPAdapter
+import asyncio
+import httpx
+import requests
+import threading
+import weakref
+
+
+DEFAULT_MAX_CONNECTIONS = 20   # open connections per client
+DEFAULT_MAX_KEEPALIVE = 10     # idle connections kept warm per client
+DEFAULT_KEEPALIVE_EXPIRY = 30  # seconds an idle connection is kept
+
+_settings = {
+    "max_connections": DEFAULT_MAX_CONNECTIONS,
+    "max_keepalive": DEFAULT_MAX_KEEPALIVE,
+    "keepalive_expiry": DEFAULT_KEEPALIVE_EXPIRY
+}
+
+_clients = {}
+_http_session = None
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> {key: async client}
+_lock = threading.Lock()
+
+
+def configure(max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive=DEFAULT_MAX_KEEPALIVE,
+              keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY):
+    """
+    Set connection pool sizes for clients created from now on
+
+    Args:
+        max_connections: Most open connections per client
+        max_keepalive: Idle connections kept open for reuse per client
+        keepalive_expiry: Seconds before an idle connection is closed
+    """
+    with _lock:
+        _settings.update(
+            max_connections=max_connections,
+            max_keepalive=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=_settings["max_connections"],
+        max_keepalive_connections=_settings["max_keepalive"],
+        keepalive_expiry=_settings["keepalive_expiry"]
+    )
+
+
+def get_client(provider, api_key, base_url=None):
+    """
+    Get the shared SDK client for a cloud provider, creating it on first use
+
+    Args:
+        provider: "anthropic", or "openai"/"deepseek" (OpenAI-compatible API)
+        api_key: API key the client authenticates with
+        base_url: Optional API endpoint (e.g. DeepSeek's)
+
+    Returns:
+        An Anthropic or OpenAI client that lives for the rest of the process
+    """
+    kind = "anthropic" if provider == "anthropic" else "openai"
+    key = (kind, api_key, base_url)
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if kind == "anthropic":
+                client = Anthropic(api_key=api_key, base_url=base_url,
+                                   http_client=AnthropicHttpxClient(limits=_limits()))
+            else:
+                client = OpenAI(api_key=api_key, base_url=base_url,
+                                http_client=OpenAIHttpxClient(limits=_limits()))
+            _clients[key] = client
+        return client
+
+
+def get_http_session():
+    """
+    Get the shared requests.Session used for Ollama's REST API
+
+    Returns:
+        A requests.Session with a keep-alive pool sized like the SDK clients
+    """
+    global _http_session
+
+    with _lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_settings["max_connections"])
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def get_async_client(provider, api_key, base_url=None):
+    """
+    Get the running event loop's async SDK client for a cloud provider
+
+    Args:
+        provider: "anthropic", or "openai"/"deepseek" (OpenAI-compatible API)
+        api_key: API key the client authenticates with
+        base_url: Optional API endpoint (e.g. DeepSeek's)
+
+    Returns:
+        An AsyncAnthropic or AsyncOpenAI client that lives as long as the loop
+    """
+    kind = "anthropic" if provider == "anthropic" else "openai"
+    key = (kind, api_key, base_url)
+
+    with _lock:
+        clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+        client = clients.get(key)
+        if client is None:
+            if kind == "anthropic":
+                client = AsyncAnthropic(api_key=api_key, base_url=base_url,
+                                        http_client=AnthropicAsyncHttpxClient(limits=_limits()))
+            else:
+                client = AsyncOpenAI(api_key=api_key, base_url=base_url,
+                                     http_client=OpenAIAsyncHttpxClient(limits=_limits()))
+            clients[key] = client
+        return client
+
+
+def get_async_http_client():
+    """
+    Get the running event loop's httpx.AsyncClient for Ollama's REST API
+
+    Returns:
+        An httpx.AsyncClient with a keep-alive pool sized like the SDK clients
+    """
+    with _lock:
+        clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+        client = clients.get("http")
+        if client is None:
+            client = clients["http"] = httpx.AsyncClient(limits=_limits())
+        return client
+
+
+async def close_async_clients():
+    """Close the running event loop's async clients (e.g. before the loop stops)"""
+    with _lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        if isinstance(client, httpx.AsyncClient):
+            await client.aclose()
+        else:
+            await client.close()
+
+
+def stats():
+    """Number of shared clients and the pool settings"""
+    with _lock:
+        return {
+            "clients": len(_clients),
+            "async_clients": sum(len(clients) for clients in _async_clients.values()),
+            "http_session": _http_session is not None,
+            **_settings
+        }
+
+
+def close_all():
+    """Close every shared client and its connections (e.g. at shutdown)"""
+    global _http_session
+
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
@@ -0,0 +1,276 @@
+"""
+AI Provider Router
+
+Sends an analysis to an ordered list of providers instead of a single
+one, so one slow or failing provider does not decide /analyze latency:
+
+- Failover: when a provider errors, answers with something unparseable,
+  or exceeds its latency budget, the next provider is tried.
+- Hedging (opt-in, it can double provider spend): when the current
+  provider has not answered by its own p95 latency, a second request
+  goes to the next provider. Providers without enough latency history
+  for a p95 are never hedged. The first
+  valid parsed result wins and the other request is cancelled (its
+  coroutine is stopped, so it frees its provider slot and stops the
+  paid call); so is a request that runs past its latency budget.
+- Circuit breaking: a provider that fails several times in a row is
+  skipped for a cool-down period, then given a single trial request.
+
+Health (latencies, failures, circuit state) is tracked per provider for
+the whole process.
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, wait
+import contextvars
+import threading
+import time
+
+from ai_analyzer import CancelScope
+
+
+DEFAULT_LATENCY_BUDGET = 120   # seconds one provider may take before failing over
+FAILURE_THRESHOLD = 3          # consecutive failures that open the circuit
+RESET_TIMEOUT = 30             # seconds before an open circuit allows a trial request
+LATENCY_WINDOW = 50            # recent successful latencies kept for the p95
+MIN_LATENCY_SAMPLES = 5        # samples needed before the p95 is trusted (and hedging starts)
+
+
+class ProviderHealth:
+    """Latency history and circuit breaker state of one provider"""
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"  # closed -> open -> half_open -> closed | open
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.opened_at = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Whether a request may be sent now (one trial at a time when half-open)"""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_running = False
+            if self.state == "half_open":
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return self.state != "open"
+
+    def record_success(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.state = "closed"
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    def p95(self):
+        """95th percentile of recent successful latencies, or None without enough samples"""
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+            return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def snapshot(self):
+        """Health summary for status endpoints"""
+        p95 = self.p95()
+        with self._lock:
+            return {
+                "state": self.state,
+                "successes": self.successes,
+                "failures": self.failures,
+                "consecutive_failures": self.consecutive_failures,
+                "p95_seconds": round(p95, 3) if p95 is not None else None
+            }
+
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def get_health(provider):
+    """The process-wide ProviderHealth for a provider name"""
+    with _health_lock:
+        if provider not in _health:
+            _health[provider] = ProviderHealth(provider)
+        return _health[provider]
+
+
+def health_report():
+    """Snapshot of every provider's health"""
+    with _health_lock:
+        providers = list(_health.values())
+    return {health.name: health.snapshot() for health in providers}
+
+
+def is_valid_result(result):
+    """A usable analysis: no error and the answer parsed as JSON"""
+    return isinstance(result, dict) and "error" not in result and "raw_response" not in result
+
+
+class ProviderRouter:
+    """Route analyses over an ordered list of PDFAnalyzers"""
+
+    def __init__(self, analyzers, latency_budgets=None, hedge=False):
+        """
+        Initialize the router
+
+        Args:
+            analyzers: PDFAnalyzer instances in order of preference
+            latency_budgets: Optional dict of provider -> seconds before it
+                             counts as failed (default DEFAULT_LATENCY_BUDGET)
+            hedge: Send a second (paid) request to the next provider when
+                   the current one is slower than its usual p95
+        """
+        self.analyzers = list(analyzers)
+        self.latency_budgets = latency_budgets or {}
+        self.hedge = hedge
+
+    @property
+    def providers(self):
+        return [analyzer.provider for analyzer in self.analyzers]
+
+    def budget(self, analyzer):
+        return self.latency_budgets.get(analyzer.provider, DEFAULT_LATENCY_BUDGET)
+
+    def hedge_delay(self, analyzer):
+        """Seconds to wait for a provider before hedging to the next one, or None (no p95 yet: never hedge)"""
+        return get_health(analyzer.provider).p95()
+
+    def primary(self):
+        """First provider whose circuit is not open (for streaming and chunked analysis)"""
+        for analyzer in self.analyzers:
+            if get_health(analyzer.provider).state != "open":
+                return analyzer
+        return self.analyzers[0]
+
+    def analyze_with_ai(self, pdf_data, user_question=None, use_cache=True):
+        """
+        Like PDFAnalyzer.analyze_with_ai, answered by the first provider that succeeds
+
+        Returns:
+            The winning analysis with a "provider" key, or an error dict
+            listing what went wrong with each provider tried
+        """
+        return self.route(
+            lambda analyzer, timeout: analyzer.analyze_with_ai(pdf_data, user_question, use_cache, timeout=timeout)
+        )
+
+    def route(self, call):
+        """
+        Run call(analyzer, timeout) -> result dict with failover and hedging
+
+        Args:
+            call: Function doing the work with one analyzer; must return a
+                  result dict (errors as {"error": ...}, not exceptions).
+                  Sync PDFAnalyzer calls made inside it are cancelled when
+                  the router gives up on that provider (see CancelScope).
+        """
+        errors = []
+        pending = list(self.analyzers)  # not tried yet, in order of preference
+        running = {}                    # future -> (analyzer, start time, cancel scope)
+        max_in_flight = 2 if self.hedge else 1
+        pool = ThreadPoolExecutor(max_workers=len(pending) or 1, thread_name_prefix="provider")
+
+        def launch():
+            """Start the next provider whose circuit allows it; False when none is left"""
+            while pending:
+                analyzer = pending.pop(0)
+                if get_health(analyzer.provider).allow_request():
+                    scope = CancelScope()
+                    # Run in the caller's context so request metrics follow the call
+                    future = pool.submit(contextvars.copy_context().run, self._timed_call, call, analyzer,
+                                         self.budget(analyzer), scope)
+                    running[future] = (analyzer, time.monotonic(), scope)
+                    return True
+                errors.append(f"{analyzer.provider}: temporarily disabled after repeated failures")
+            return False
+
+        def abandon(future, analyzer, scope):
+            # A call that finished before the cancel took effect still counts for its health
+            scope.cancel()
+            future.add_done_callback(lambda done: self._record(analyzer, *done.result()))
+
+        try:
+            launch()
+            while running:
+                now = time.monotonic()
+                latest, latest_start, _ = list(running.values())[-1]
+                deadlines = [start + self.budget(analyzer) for analyzer, start, _ in running.values()]
+                hedge_delay = self.hedge_delay(latest) if self.hedge else None
+                can_hedge = hedge_delay is not None and pending and len(running) < max_in_flight
+                if can_hedge:
+                    deadlines.append(latest_start + hedge_delay)
+
+                done, _ = wait(list(running), timeout=max(0, min(deadlines) - now), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    analyzer, _, _ = running.pop(future)
+                    result, latency = future.result()
+                    self._record(analyzer, result, latency)
+                    if is_valid_result(result):
+                        for other, (other_analyzer, _, other_scope) in running.items():
+                            abandon(other, other_analyzer, other_scope)
+                        running.clear()
+                        result["provider"] = analyzer.provider
+                        return result
+                    errors.append(f"{analyzer.provider}: {result.get('error') or 'answer could not be parsed'}")
+
+                now = time.monotonic()
+                for future, (analyzer, start, scope) in list(running.items()):
+                    if now - start >= self.budget(analyzer):
+                        del running[future]
+                        scope.cancel()
+                        get_health(analyzer.provider).record_failure()
+                        errors.append(f"{analyzer.provider}: no answer within {self.budget(analyzer)}s")
+
+                if not running or (can_hedge and now >= latest_start + hedge_delay):
+                    launch()
+
+        finally:
+            for _, _, scope in running.values():
+                scope.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return {"error": "All AI providers failed: " + "; ".join(errors), "suggestions": []}
+
+    @staticmethod
+    def _timed_call(call, analyzer, timeout, scope):
+        """(result, latency) of one call; result is None when it was cancelled"""
+        start = time.monotonic()
+        try:
+            with scope:
+                result = call(analyzer, timeout)
+        except CancelledError:
+            result = None
+        except Exception as e:
+            result = {"error": str(e), "suggestions": []}
+        return result, time.monotonic() - start
+
+    @staticmethod
+    def _record(analyzer, result, latency):
+        if result is None:
+            return  # cancelled by the router; says nothing about the provider
+        health = get_health(analyzer.provider)
+        if is_valid_result(result):
+            health.record_success(latency)
+        else:
+            health.record_failure()
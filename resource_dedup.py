@@ -0,0 +1,167 @@
+"""
+Shared Resource Deduplication for Split Outputs
+
+Every part of a split is a self-contained PDF, so each one has to carry
+the fonts, images and ICC profiles its pages use. PyPDF2 handles them
+badly in two ways: it serializes every resource again for every part,
+and it keeps each copy when a document embeds the same image or font
+over and over (typical for scans and generated reports).
+
+A ResourceDeduplicator lives for one split job. It hashes each source
+stream once, the first time any part uses it. Per part it then
+- collapses streams with identical bytes into a single object, and
+- writes self-contained streams (no references inside their dictionary)
+  straight from the cached dictionary header plus the source's
+  already-compressed data; nothing is decoded or re-encoded.
+
+apply() returns per-part counters; add_report() sums them into the job's
+report, which states how many bytes the deduplication saved.
+"""
+
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    PdfObject,
+    StreamObject,
+)
+from io import BytesIO
+import hashlib
+
+
+REPORT_FIELDS = ("parts", "bytes_written", "streams", "streams_reused",
+                 "bytes_reused", "duplicates_removed", "bytes_saved")
+
+
+def new_report():
+    """Empty per-job dedup report"""
+    return dict.fromkeys(REPORT_FIELDS, 0)
+
+
+def add_report(report, counters):
+    """Add one part's counters (from apply()) into a job report"""
+    for field in REPORT_FIELDS:
+        report[field] += counters.get(field, 0)
+    return report
+
+
+class _RawStream(PdfObject):
+    """A stream written from cached header bytes and the source's encoded data"""
+
+    def __init__(self, header, data):
+        self.header = header
+        self.data = data
+
+    def write_to_stream(self, stream, encryption_key):
+        stream.write(self.header)
+        stream.write(b"\nstream\n")
+        stream.write(self.data)
+        stream.write(b"\nendstream")
+
+
+def _has_references(value):
+    """Whether a direct PDF value contains any indirect reference"""
+    if isinstance(value, IndirectObject):
+        return True
+    if isinstance(value, DictionaryObject):
+        return any(_has_references(item) for item in value.values())
+    if isinstance(value, ArrayObject):
+        return any(_has_references(item) for item in value)
+    return False
+
+
+def _replace_references(value, remap, pdf_writer):
+    """Point references to collapsed duplicates at the object that was kept"""
+    if isinstance(value, DictionaryObject):
+        items = value.items()
+    elif isinstance(value, ArrayObject):
+        items = enumerate(value)
+    else:
+        return
+
+    for key, item in list(items):
+        if isinstance(item, IndirectObject):
+            if item.pdf is pdf_writer and item.idnum in remap:
+                value[key] = IndirectObject(remap[item.idnum], 0, pdf_writer)
+        else:
+            _replace_references(item, remap, pdf_writer)
+
+
+class ResourceDeduplicator:
+    """Per-job cache of source stream digests used to slim down each part"""
+
+    def __init__(self):
+        # source object number -> (digest, serialized size, header bytes or None)
+        self._streams = {}
+
+    def _describe(self, source):
+        """Hash a source stream; keep its header if it can be written verbatim"""
+        data = source._data
+        header_dict = DictionaryObject(source)
+        header_dict[NameObject("/Length")] = NumberObject(len(data))
+
+        header_buffer = BytesIO()
+        header_dict.write_to_stream(header_buffer, None)
+        header = header_buffer.getvalue()
+
+        digest = hashlib.sha256(header)
+        digest.update(data)
+        reusable = not any(_has_references(item) for item in source.values())
+        return digest.digest(), len(header) + len(data), header if reusable else None
+
+    def apply(self, pdf_writer, pdf_reader):
+        """
+        Deduplicate the streams of one part before it is written
+
+        Args:
+            pdf_writer: PdfWriter holding the part's pages (not yet written)
+            pdf_reader: PdfReader the pages were copied from
+
+        Returns:
+            dict of counters for this part (see REPORT_FIELDS)
+        """
+        counters = new_report()
+        translated = pdf_writer._id_translated.get(id(pdf_reader), {})
+        if getattr(pdf_writer, "_encrypt", None) is not None:
+            return counters  # cached bytes would bypass encryption
+
+        kept = {}   # digest -> writer object number
+        remap = {}  # duplicate writer object number -> kept object number
+
+        for source_idnum, writer_idnum in sorted(translated.items(), key=lambda item: item[1]):
+            if not isinstance(pdf_writer._objects[writer_idnum - 1], StreamObject):
+                continue
+
+            entry = self._streams.get(source_idnum)
+            if entry is None:
+                source = pdf_reader.get_object(source_idnum)
+                if not isinstance(source, StreamObject):
+                    continue
+                entry = self._describe(source)
+                self._streams[source_idnum] = entry
+
+            digest, size, header = entry
+            counters["streams"] += 1
+
+            if digest in kept:
+                remap[writer_idnum] = kept[digest]
+                pdf_writer._objects[writer_idnum - 1] = NullObject()
+                counters["duplicates_removed"] += 1
+                counters["bytes_saved"] += size
+                continue
+
+            kept[digest] = writer_idnum
+            if header is not None:
+                data = pdf_reader.get_object(source_idnum)._data
+                pdf_writer._objects[writer_idnum - 1] = _RawStream(header, data)
+                counters["streams_reused"] += 1
+                counters["bytes_reused"] += size
+
+        if remap:
+            for obj in pdf_writer._objects:
+                _replace_references(obj, remap, pdf_writer)
+
+        return counters
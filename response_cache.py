@@ -0,0 +1,75 @@
+"""
+AI Response Cache
+
+Keeps parsed analysis results keyed by provider, model and a hash of
+the prompt, so re-analyzing the same file with the same question
+returns in milliseconds instead of paying for another model call.
+
+Entries expire after a TTL and the least recently used ones are
+evicted once the cache holds max_entries results.
+"""
+
+from collections import OrderedDict
+import copy
+import hashlib
+import threading
+import time
+
+
+class ResponseCache:
+    """In-memory TTL + LRU cache of parsed AI responses"""
+
+    def __init__(self, ttl_seconds=24 * 3600, max_entries=500):
+        """
+        Initialize the cache
+
+        Args:
+            ttl_seconds: How long a cached result stays valid
+            max_entries: Maximum number of results kept
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (stored_at, result)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(provider, model, prompt):
+        """Cache key for one provider/model/prompt combination"""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{provider}:{model}:{digest}"
+
+    def get(self, key):
+        """
+        Return a copy of the cached result for a key, or None
+
+        Expired entries are dropped on lookup.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl_seconds:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key, result):
+        """Store a copy of a parsed result, evicting the oldest beyond max_entries"""
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """Return hit/miss counters and the number of cached results"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries)
+            }
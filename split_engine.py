@@ -0,0 +1,251 @@
+"""
+PDF Split Engine
+
+Builds the output PDFs for a split (one per section or chunk). Writing a
+PDF with PyPDF2 is pure Python and CPU-bound, so the engine can spread
+the parts over a pool of worker processes. Each worker opens its own
+PdfReader on the input file; results always come back in input order.
+
+Passing a report dict turns on shared-resource deduplication (see
+resource_dedup.py) and collects the job's byte counters in it.
+
+Used by the web app's /split-multiple route, by split_pdf.py, and (for
+many input files sharing one pool) by batch_split.py.
+"""
+
+from PyPDF2 import PdfReader, PdfWriter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import atexit
+import multiprocessing
+import os
+import threading
+
+from resource_dedup import ResourceDeduplicator, add_report, new_report
+
+
+# Readers opened inside a worker process, reused across tasks for the same file,
+# with the resource deduplicator that goes with each one
+_worker_readers = {}
+_worker_dedupers = {}
+_WORKER_READER_LIMIT = 4
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Workers are not forked from the (multithreaded) web process: a fork while
+# another thread holds a lock can deadlock the child. forkserver forks from
+# a clean single-threaded server process; Windows only has spawn.
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def write_pages(pdf_reader, page_numbers, deduplicator=None, report=None):
+    """
+    Write the given pages of an open PDF into a new PDF
+
+    Args:
+        pdf_reader: Open PdfReader for the input document
+        page_numbers: Page numbers to include (1-based): a list, range or
+                      page_selection.PageRanges; pages outside the
+                      document are skipped
+        deduplicator: Optional ResourceDeduplicator for the current job
+        report: Optional dedup report dict the part's counters are added to
+
+    Returns:
+        The new PDF as bytes
+    """
+    pdf_writer = PdfWriter()
+    total_pages = len(pdf_reader.pages)
+
+    for page_num in page_numbers:
+        if 1 <= page_num <= total_pages:
+            pdf_writer.add_page(pdf_reader.pages[page_num - 1])
+
+    counters = deduplicator.apply(pdf_writer, pdf_reader) if deduplicator else new_report()
+
+    pdf_bytes = BytesIO()
+    pdf_writer.write(pdf_bytes)
+    pdf_data = pdf_bytes.getvalue()
+
+    if report is not None:
+        counters["parts"] = 1
+        counters["bytes_written"] = len(pdf_data)
+        add_report(report, counters)
+    return pdf_data
+
+
+def _worker_reader(input_path):
+    """Open (or reuse) this worker's PdfReader for a file"""
+    key = (input_path, os.path.getmtime(input_path))
+    reader = _worker_readers.get(key)
+    if reader is None:
+        if len(_worker_readers) >= _WORKER_READER_LIMIT:
+            _worker_readers.clear()
+            _worker_dedupers.clear()
+        reader = PdfReader(input_path)
+        _worker_readers[key] = reader
+        _worker_dedupers[key] = ResourceDeduplicator()
+    return reader, _worker_dedupers[key]
+
+
+def _write_pages_task(input_path, page_numbers, dedup=False):
+    """
+    Worker entry point: build one part from the file on disk
+
+    Returns:
+        Tuple of (pdf_bytes, dedup counters or None)
+    """
+    reader, deduplicator = _worker_reader(input_path)
+    if not dedup:
+        return write_pages(reader, page_numbers), None
+
+    counters = new_report()
+    return write_pages(reader, page_numbers, deduplicator, counters), counters
+
+
+def _part_result(future, report):
+    """PDF bytes of a finished worker task, merging its dedup counters"""
+    pdf_data, counters = future.result()
+    if counters is not None:
+        add_report(report, counters)
+    return pdf_data
+
+
+def get_process_pool(workers):
+    """
+    Get the shared process pool for a worker count, creating it on first use
+
+    Args:
+        workers: Number of worker processes
+
+    Returns:
+        A ProcessPoolExecutor that lives for the rest of the process
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(_START_METHOD))
+            _pools[workers] = pool
+        return pool
+
+
+@atexit.register
+def shutdown_process_pools():
+    """Stop the shared worker processes (registered to run at exit)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_split_parts(input_path, parts, workers=0, pdf_reader=None, report=None):
+    """
+    Build the PDF for each part, serially or on a worker pool
+
+    Args:
+        input_path: Path to the input PDF
+        parts: Iterable of (name, page_numbers) pairs; page_numbers is sent
+               to the workers as is (a range or PageRanges stays compact)
+        workers: Worker processes to use; 0 or 1 builds parts in this process
+        pdf_reader: Already-open reader for input_path, reused when serial
+        report: Dict from resource_dedup.new_report() to deduplicate shared
+                resources and collect bytes written/saved; None disables it
+
+    Yields:
+        Tuples of (name, pdf_bytes) in the same order as parts. In parallel
+        mode at most 2 * workers parts are in flight at a time, so memory
+        stays bounded for long splits.
+    """
+    if workers <= 1:
+        reader = pdf_reader or PdfReader(input_path)
+        deduplicator = ResourceDeduplicator() if report is not None else None
+        for name, page_numbers in parts:
+            yield name, write_pages(reader, page_numbers, deduplicator, report)
+        return
+
+    pool = get_process_pool(workers)
+    pending = deque()
+
+    try:
+        for name, page_numbers in parts:
+            task = pool.submit(_write_pages_task, input_path, page_numbers, report is not None)
+            pending.append((name, task))
+
+            if len(pending) >= workers * 2:
+                name, future = pending.popleft()
+                yield name, _part_result(future, report)
+
+        while pending:
+            name, future = pending.popleft()
+            yield name, _part_result(future, report)
+
+    finally:
+        # Consumer stopped early (e.g. client disconnected) - drop queued work
+        for _, future in pending:
+            future.cancel()
+
+
+def iter_batch_parts(tasks, workers=0, report=None):
+    """
+    Build parts of many input files, serially or on one shared worker pool
+
+    Unlike iter_split_parts, the pool is kept busy across file boundaries,
+    and a part that cannot be built (e.g. from a damaged file) does not
+    stop the others.
+
+    Args:
+        tasks: Iterable of (key, input_path, page_numbers); consumed lazily,
+               page_numbers as in iter_split_parts
+        workers: Worker processes to use; 0 or 1 builds parts in this process
+        report: Dict from resource_dedup.new_report() to deduplicate shared
+                resources (per input file) and collect bytes written/saved
+
+    Yields:
+        Tuples of (key, pdf_bytes, error) in the same order as tasks; error
+        is None on success, else a message (and pdf_bytes is None)
+    """
+    if workers <= 1:
+        current_path = reader = deduplicator = open_error = None
+        for key, input_path, page_numbers in tasks:
+            if input_path != current_path:
+                current_path = input_path
+                deduplicator = ResourceDeduplicator() if report is not None else None
+                try:
+                    reader, open_error = PdfReader(input_path), None
+                except Exception as e:
+                    reader, open_error = None, str(e)
+
+            pdf_data, error = None, open_error
+            if reader is not None:
+                try:
+                    pdf_data = write_pages(reader, page_numbers, deduplicator, report)
+                except Exception as e:
+                    error = str(e)
+            yield key, pdf_data, error
+        return
+
+    pool = get_process_pool(workers)
+    pending = deque()
+
+    def finished(key, future):
+        try:
+            return key, _part_result(future, report), None
+        except Exception as e:
+            return key, None, str(e) or type(e).__name__
+
+    try:
+        for key, input_path, page_numbers in tasks:
+            task = pool.submit(_write_pages_task, input_path, page_numbers, report is not None)
+            pending.append((key, task))
+
+            if len(pending) >= workers * 2:
+                yield finished(*pending.popleft())
+
+        while pending:
+            yield finished(*pending.popleft())
+
+    finally:
+        for _, future in pending:
+            future.cancel()
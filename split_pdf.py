@@ -5,13 +5,34 @@ This script allows you to split a PDF in different ways:
 1. Split into individual pages (one page per file)
 2. Split into chunks of N pages
 3. Extract specific page ranges
+
+Run without arguments for the interactive menu, or with a subcommand
+for scripts and pipelines (no prompts):
+
+    python split_pdf.py split "scans/*.pdf" --pages-per-file 10 --output split_output --jobs 4
+    python split_pdf.py extract report.pdf --pages 1-3,8 --stdout > summary.pdf
+    python split_pdf.py sections "in/**/*.pdf" --sections sections.json --stdout > parts.zip
+
+Inputs may be glob patterns. --jobs N builds the parts of all inputs on
+one pool of N worker processes; results still come out in input order.
+A summary with pages/s is printed to stderr at the end.
 """
 
 from PyPDF2 import PdfReader, PdfWriter
+from split_engine import iter_batch_parts, iter_split_parts
+from page_extractor import LazyPageReader
+from resource_dedup import new_report
+from zip_stream import stream_zip
+from page_selection import PageSelection
+import argparse
+import glob
+import json
 import os
+import sys
+import time
 
 
-def split_by_pages(input_pdf, output_folder, pages_per_file=1):
+def split_by_pages(input_pdf, output_folder, pages_per_file=1, workers=0, dedup=True):
     """
     Split a PDF into multiple files with specified pages per file.
 
@@ -19,6 +40,8 @@ def split_by_pages(input_pdf, output_folder, pages_per_file=1):
         input_pdf: Path to the input PDF file
         output_folder: Folder where split PDFs will be saved
         pages_per_file: Number of pages in each output file (default: 1)
+        workers: Worker processes for writing files in parallel (default: 0, serial)
+        dedup: Collapse duplicate fonts/images within each file and report bytes saved
     """
     # Create output folder if it doesn't exist
     if not os.path.exists(output_folder):
@@ -31,29 +54,30 @@ def split_by_pages(input_pdf, output_folder, pages_per_file=1):
     print(f"Total pages in PDF: {total_pages}")
     print(f"Splitting into files with {pages_per_file} page(s) each...\n")
 
-    # Split the PDF
-    file_number = 1
-    for page_num in range(0, total_pages, pages_per_file):
-        pdf_writer = PdfWriter()
-
-        # Add pages to the current output file
+    # One part per chunk of pages
+    base_name = os.path.splitext(os.path.basename(input_pdf))[0]
+    parts = []
+    for file_number, page_num in enumerate(range(0, total_pages, pages_per_file), start=1):
         end_page = min(page_num + pages_per_file, total_pages)
-        for page in range(page_num, end_page):
-            pdf_writer.add_page(pdf_reader.pages[page])
-
-        # Create output filename
-        base_name = os.path.splitext(os.path.basename(input_pdf))[0]
         output_filename = f"{base_name}_part_{file_number}.pdf"
-        output_path = os.path.join(output_folder, output_filename)
+        parts.append((output_filename, range(page_num + 1, end_page + 1)))
 
-        # Write the output file
+    # Write the output files
+    page_ranges = dict(parts)
+    report = new_report() if dedup else None
+    for output_filename, pdf_bytes in iter_split_parts(input_pdf, parts, workers=workers,
+                                                       pdf_reader=pdf_reader, report=report):
+        output_path = os.path.join(output_folder, output_filename)
         with open(output_path, 'wb') as output_file:
-            pdf_writer.write(output_file)
+            output_file.write(pdf_bytes)
 
-        print(f"Created: {output_filename} (pages {page_num + 1}-{end_page})")
-        file_number += 1
+        pages = page_ranges[output_filename]
+        print(f"Created: {output_filename} (pages {pages.start}-{pages.stop - 1})")
 
-    print(f"\nDone! Created {file_number - 1} files in '{output_folder}'")
+    print(f"\nDone! Created {len(parts)} files in '{output_folder}'")
+    if report:
+        print(f"Wrote {report['bytes_written']:,} bytes; shared-resource deduplication saved "
+              f"{report['bytes_saved']:,} bytes ({report['duplicates_removed']} duplicate streams)")
 
 
 def extract_page_range(input_pdf, output_pdf, start_page, end_page):
@@ -66,28 +90,30 @@ def extract_page_range(input_pdf, output_pdf, start_page, end_page):
         start_page: First page to extract (1-based)
         end_page: Last page to extract (1-based, inclusive)
     """
-    pdf_reader = PdfReader(input_pdf)
-    pdf_writer = PdfWriter()
+    # Memory-mapped reader: only the requested pages are resolved
+    with LazyPageReader(input_pdf) as lazy_reader:
+        total_pages = lazy_reader.page_count
 
-    total_pages = len(pdf_reader.pages)
+        # Validate page numbers
+        if start_page < 1 or end_page > total_pages or start_page > end_page:
+            print(f"Invalid page range! PDF has {total_pages} pages.")
+            return
 
-    # Validate page numbers
-    if start_page < 1 or end_page > total_pages or start_page > end_page:
-        print(f"Invalid page range! PDF has {total_pages} pages.")
-        return
+        pdf_writer = PdfWriter()
 
-    # Add selected pages (convert to 0-based index)
-    for page_num in range(start_page - 1, end_page):
-        pdf_writer.add_page(pdf_reader.pages[page_num])
+        # Add selected pages (convert to 0-based index)
+        for page_num in range(start_page - 1, end_page):
+            pdf_writer.add_page(lazy_reader.page(page_num))
 
-    # Write output file
-    with open(output_pdf, 'wb') as output_file:
-        pdf_writer.write(output_file)
+        # Write output file
+        with open(output_pdf, 'wb') as output_file:
+            pdf_writer.write(output_file)
 
     print(f"Extracted pages {start_page}-{end_page} to '{output_pdf}'")
 
 
-if __name__ == "__main__":
+def interactive():
+    """The original question-and-answer menu"""
     print("=" * 60)
     print("PDF SPLITTER")
     print("=" * 60)
@@ -122,3 +148,215 @@ if __name__ == "__main__":
 
     print("\nPress Enter to exit...")
     input()
+
+
+def expand_inputs(patterns):
+    """Input files for command-line arguments that may be glob patterns (e.g. "in/**/*.pdf")"""
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if any(c in pattern for c in "*?[") else [pattern]
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+def output_base_names(inputs):
+    """Base names for each input's outputs, made unique when two inputs share a filename"""
+    names = {}
+    used = set()
+    for input_pdf in inputs:
+        name = base = os.path.splitext(os.path.basename(input_pdf))[0]
+        suffix = 2
+        while name in used:
+            name, suffix = f"{base}_{suffix}", suffix + 1
+        used.add(name)
+        names[input_pdf] = name
+    return names
+
+
+def plan_parts(args, base_name, total_pages, several_inputs, warn=None):
+    """
+    The (output_name, page_numbers) parts a subcommand makes from one input
+
+    Output names are relative to the output folder (or ZIP archive).
+
+    Args:
+        warn: Optional callback warn(message) for each section page range
+              that is skipped and each section left without pages
+    """
+    if args.command == "split":
+        return [(f"{base_name}_part_{file_number}.pdf", range(start + 1, min(start + args.pages_per_file, total_pages) + 1))
+                for file_number, start in enumerate(range(0, total_pages, args.pages_per_file), start=1)]
+
+    if args.command == "extract":
+        page_numbers = args.selection.resolve(total_pages)
+        return [(f"{base_name}_extracted.pdf", page_numbers)] if page_numbers else []
+
+    # One folder per input when there are several, so section names cannot collide
+    prefix = f"{base_name}/" if several_inputs else ""
+    parts = []
+    for section in args.section_list:
+        name = str(section.get("name") or "Section")
+        section_warn = warn and (lambda message: warn(f"section '{name}': {message}"))
+        page_numbers = PageSelection.parse(str(section.get("pages", "")), warn=section_warn).resolve(total_pages)
+        if not page_numbers:
+            if warn:
+                warn(f"section '{name}': no valid pages in '{section.get('pages', '')}' "
+                     f"({total_pages} pages, skipped)")
+            continue
+        safe_name = name.replace("/", "_").replace("\\", "_")
+        parts.append((f"{prefix}{safe_name}.pdf", page_numbers))
+    return parts
+
+
+def run_command(args):
+    """
+    Run a split/extract/sections command over all inputs
+
+    Returns:
+        Process exit code (0 when every input produced all of its output,
+        without skipped sections)
+    """
+    inputs = expand_inputs(args.inputs)
+    if not inputs:
+        print("Error: no input files match", file=sys.stderr)
+        return 2
+
+    stats = {"files": 0, "pages": 0, "bytes": 0}
+    failed_inputs = set()  # each input counts once, however many of its parts fail
+    base_names = output_base_names(inputs)
+    page_counts = {}
+    part_inputs = {}
+
+    def log(message):
+        if not args.quiet:
+            print(message, file=sys.stderr)
+
+    def tasks():
+        for input_pdf in inputs:
+            try:
+                # Only the cross-reference table is read to learn the page count
+                with LazyPageReader(input_pdf) as reader:
+                    total_pages = reader.page_count
+            except Exception as e:
+                failed_inputs.add(input_pdf)
+                print(f"Error: cannot read '{input_pdf}': {e}", file=sys.stderr)
+                continue
+
+            def warn(message, input_pdf=input_pdf):
+                # A section that lost pages makes the input partial, like a failed part
+                failed_inputs.add(input_pdf)
+                print(f"Warning: {input_pdf}: {message}", file=sys.stderr)
+
+            parts = plan_parts(args, base_names[input_pdf], total_pages, len(inputs) > 1, warn=warn)
+            if not parts:
+                failed_inputs.add(input_pdf)
+                print(f"Error: no valid pages for '{input_pdf}' ({total_pages} pages)", file=sys.stderr)
+            for name, page_numbers in parts:
+                page_counts[name] = len(page_numbers)
+                part_inputs[name] = input_pdf
+                yield name, input_pdf, page_numbers
+
+    def written_parts():
+        for name, pdf_bytes, error in iter_batch_parts(tasks(), workers=args.jobs, report=report):
+            if error:
+                failed_inputs.add(part_inputs[name])
+                print(f"Error: {name}: {error}", file=sys.stderr)
+                continue
+            stats["files"] += 1
+            stats["pages"] += page_counts[name]
+            stats["bytes"] += len(pdf_bytes)
+            yield name, pdf_bytes
+
+    report = None if args.no_dedup else new_report()
+    started = time.perf_counter()
+
+    if args.stdout and args.command == "extract":
+        # A single PDF goes to stdout as is
+        if len(inputs) > 1:
+            print("Error: extract --stdout takes one input PDF", file=sys.stderr)
+            return 2
+        for name, pdf_bytes in written_parts():
+            sys.stdout.buffer.write(pdf_bytes)
+    elif args.stdout:
+        for chunk in stream_zip(written_parts()):
+            sys.stdout.buffer.write(chunk)
+    else:
+        single_file = args.command == "extract" and len(inputs) == 1 and args.output.lower().endswith(".pdf")
+        for name, pdf_bytes in written_parts():
+            output_path = args.output if single_file else os.path.join(args.output, *name.split("/"))
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            with open(output_path, 'wb') as output_file:
+                output_file.write(pdf_bytes)
+            log(f"Created: {output_path} ({page_counts[name]} page(s))")
+    sys.stdout.flush()
+
+    seconds = time.perf_counter() - started
+    rate = stats["pages"] / seconds if seconds else 0
+    print(f"{len(inputs)} input(s), {len(failed_inputs)} failed: wrote {stats['files']} file(s), "
+          f"{stats['pages']:,} page(s), {stats['bytes']:,} bytes in {seconds:.2f}s ({rate:,.0f} pages/s)",
+          file=sys.stderr)
+    return 1 if failed_inputs else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Split PDFs or extract pages without prompts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name, help_text, default_output):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("inputs", nargs="+", help="Input PDFs or glob patterns (quote them)")
+        destination = command.add_mutually_exclusive_group()
+        destination.add_argument("--output", default=default_output,
+                                 help=f"Output folder (default: {default_output})")
+        destination.add_argument("--stdout", action="store_true",
+                                 help="Write to stdout instead: a ZIP, or the PDF for extract")
+        command.add_argument("--jobs", type=int, default=0,
+                             help="Worker processes shared by all inputs (default: 0, in this process)")
+        command.add_argument("--no-dedup", action="store_true", help="Do not deduplicate shared fonts/images")
+        command.add_argument("--quiet", action="store_true", help="Only print errors and the summary")
+        return command
+
+    split = add_command("split", "Split into files of N pages", "split_output")
+    split.add_argument("--pages-per-file", type=int, default=1, help="Pages per output file (default: 1)")
+
+    extract = add_command("extract", "Extract pages, e.g. --pages 1,3,5-10", "extracted")
+    extract.add_argument("--pages", required=True, help="Pages to extract, e.g. 1,3,5-10, 20- or -5- (last five)")
+    extract.add_argument("--ordered", action="store_true",
+                         help="Keep the pages in the order given, with repeats (e.g. 3,1,9-7)")
+
+    sections = add_command("sections", "Split by a JSON list of {name, pages} sections", "split_output")
+    sections.add_argument("--sections", required=True, metavar="JSON_FILE",
+                          help="File with [{\"name\": ..., \"pages\": \"1-5\"}, ...] ('-' for stdin)")
+    return parser
+
+
+def main(argv=None):
+    """Command-line entry point; returns the process exit code"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "split" and args.pages_per_file < 1:
+        parser.error("--pages-per-file must be at least 1")
+    if args.command == "extract":
+        args.selection = PageSelection.parse(args.pages, ordered=args.ordered,
+                                             warn=lambda message: print(f"Warning: {message}", file=sys.stderr))
+        if not args.selection:
+            parser.error("no valid page numbers in --pages")
+    if args.command == "sections":
+        try:
+            with (sys.stdin if args.sections == "-" else open(args.sections)) as sections_file:
+                args.section_list = json.load(sections_file)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read --sections: {e}")
+        if not isinstance(args.section_list, list) or not all(isinstance(item, dict) for item in args.section_list):
+            parser.error("--sections must be a JSON list of {name, pages} objects")
+
+    return run_command(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main() if len(sys.argv) > 1 else interactive())
@@ -0,0 +1,84 @@
+"""
+Incremental Suggestion Parser
+
+The AI answers with one JSON object whose "suggestions" array holds the
+splitting suggestions. When the answer is streamed token by token, this
+parser watches the text as it grows and hands back each suggestion as
+soon as its closing brace arrives, so the browser can show the first
+suggestion card long before the model finishes.
+"""
+
+import json
+
+
+class SuggestionStreamParser:
+    """Pull complete suggestion objects out of a partially received JSON answer"""
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0            # next character to scan
+        self._in_array = False   # inside the "suggestions" array
+        self._done = False       # the array has been closed
+        self._depth = 0          # brace depth inside the array
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None
+
+    def feed(self, chunk):
+        """
+        Add streamed text and return any suggestions completed by it
+
+        Args:
+            chunk: Next piece of the model's answer
+
+        Returns:
+            List of suggestion dicts that became complete
+        """
+        self.text += chunk
+        found = []
+
+        if self._done:
+            return found
+
+        if not self._in_array:
+            key = self.text.find('"suggestions"')
+            if key < 0:
+                return found
+            bracket = self.text.find("[", key)
+            if bracket < 0:
+                return found
+            self._in_array = True
+            self._pos = max(self._pos, bracket + 1)
+
+        while self._pos < len(self.text):
+            char = self.text[self._pos]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._object_start = self._pos
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    try:
+                        found.append(json.loads(self.text[self._object_start:self._pos + 1]))
+                    except ValueError:
+                        pass
+                    self._object_start = None
+            elif char == "]" and self._depth == 0:
+                # End of the suggestions array - ignore anything after it
+                self._done = True
+                break
+
+            self._pos += 1
+
+        return found
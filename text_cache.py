@@ -0,0 +1,179 @@
+"""
+Extracted Page Text Cache
+
+Persistent, content-addressed cache of pdfplumber page text. Entries are
+keyed by the SHA-256 of the PDF bytes plus the page index, so the same
+contract or manual uploaded again skips text extraction entirely, and a
+document analyzed further than before only extracts its new pages.
+
+The cache lives in a SQLite file, is capped in size, and evicts the
+least recently used pages first.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+CHUNK_SIZE = 1024 * 1024  # 1MB read blocks when hashing
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's content, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PageTextCache:
+    """On-disk LRU cache of extracted page text keyed by file hash and page index"""
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        """
+        Open (or create) the cache
+
+        Args:
+            path: SQLite database file
+            max_bytes: Size cap for cached text; least recently used pages
+                       are evicted beyond it
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    doc_hash TEXT NOT NULL,
+                    page_index INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    char_count INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (doc_hash, page_index)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_hash TEXT PRIMARY KEY,
+                    total_pages INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+
+    def get_page_count(self, doc_hash):
+        """Return the recorded page count of a document, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT total_pages FROM documents WHERE doc_hash = ?", (doc_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_page_count(self, doc_hash, total_pages):
+        """Record the page count of a document"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (doc_hash, total_pages) VALUES (?, ?)",
+                (doc_hash, total_pages)
+            )
+
+    def get_pages(self, doc_hash, page_indexes):
+        """
+        Look up cached pages and mark them as recently used
+
+        Args:
+            doc_hash: Hex SHA-256 of the PDF
+            page_indexes: 0-based page indexes wanted
+
+        Returns:
+            dict of page_index -> (text, char_count) for the pages found
+        """
+        page_indexes = list(page_indexes)
+        found = {}
+
+        with self._lock, self._conn:
+            # Stay under SQLite's bound-parameter limit on long documents
+            for start in range(0, len(page_indexes), 500):
+                batch = page_indexes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT page_index, text, char_count FROM pages "
+                    f"WHERE doc_hash = ? AND page_index IN ({placeholders})",
+                    [doc_hash] + batch
+                ).fetchall()
+                for page_index, text, char_count in rows:
+                    found[page_index] = (text, char_count)
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE pages SET last_used = ? WHERE doc_hash = ? AND page_index = ?",
+                    [(time.time(), doc_hash, page_index) for page_index in found]
+                )
+
+            self.hits += len(found)
+            self.misses += len(page_indexes) - len(found)
+
+        return found
+
+    def put_pages(self, doc_hash, page_texts):
+        """
+        Store extracted pages, then evict down to the size cap
+
+        Args:
+            doc_hash: Hex SHA-256 of the PDF
+            page_texts: dict of page_index -> full page text
+        """
+        now = time.time()
+        rows = [
+            (doc_hash, page_index, text, len(text), len(text.encode("utf-8")), now)
+            for page_index, text in page_texts.items()
+        ]
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (doc_hash, page_index, text, char_count, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+
+    def stats(self):
+        """Return hit/miss counters and current cache size"""
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": total_bytes
+        }
+
+    def _evict(self):
+        """Delete least recently used pages until the cache fits (lock held)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        victims = []
+        for doc_hash, page_index, size in self._conn.execute(
+            "SELECT doc_hash, page_index, size FROM pages ORDER BY last_used"
+        ):
+            victims.append((doc_hash, page_index))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+        self._conn.executemany(
+            "DELETE FROM pages WHERE doc_hash = ? AND page_index = ?", victims
+        )
+        self._conn.execute(
+            "DELETE FROM documents WHERE doc_hash NOT IN (SELECT DISTINCT doc_hash FROM pages)"
+        )
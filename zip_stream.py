@@ -0,0 +1,55 @@
+"""
+Streaming ZIP Writer
+
+Builds a ZIP archive incrementally and yields its bytes as each entry is
+added, so a response can start sending the first file while later ones
+are still being generated. Only the entry currently being written is
+held in memory.
+"""
+
+import zipfile
+
+
+class _ChunkSink:
+    """Write-only, non-seekable target that collects bytes until drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries, compression=zipfile.ZIP_DEFLATED):
+    """
+    Yield a ZIP archive chunk by chunk
+
+    Args:
+        entries: Iterable of (archive_name, data_bytes) pairs; it is consumed
+                 lazily, one entry at a time
+        compression: zipfile compression method
+
+    Yields:
+        Bytes of the archive, one chunk per entry plus the central directory
+    """
+    sink = _ChunkSink()
+
+    # zipfile detects the sink is not seekable and writes data descriptors
+    # after each entry instead of seeking back to patch local headers
+    with zipfile.ZipFile(sink, "w", compression) as zip_file:
+        for archive_name, data in entries:
+            zip_file.writestr(archive_name, data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+    yield sink.drain()